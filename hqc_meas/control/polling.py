@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# module : control/polling.py
+# author : Matthieu Dartiailh
+# license : MIT license
+# =============================================================================
+""" Scheduler shared by the control panels to poll their instruments.
+
+A single thread is used whatever the number of panels. The polls of a same
+owner (typically a panel, hence an instrument) which are due at about the same
+time are coalesced into a single call of their callback. The interval of a
+poll grows while the polled value does not change and goes back to its base
+value as soon as it changes.
+
+:Contains:
+    PollingScheduler
+        Scheduler calling callbacks periodically from a single thread.
+    shared_scheduler
+        Function returning the scheduler shared by all the panels.
+    value_changed
+        Function telling whether a polled value changed.
+
+"""
+import heapq
+import logging
+from itertools import count
+from threading import Thread, Condition, Lock
+from time import time
+
+import numpy as np
+
+
+class _Poll(object):
+    """ State of a scheduled poll.
+
+    """
+    __slots__ = ('owner', 'name', 'callback', 'interval', 'base_interval',
+                 'max_interval', 'due', 'key')
+
+    def __init__(self, owner, name, callback, interval, max_interval):
+        self.owner = owner
+        self.name = name
+        self.callback = callback
+        self.interval = interval
+        self.base_interval = interval
+        self.max_interval = max(max_interval or interval, interval)
+        self.due = time() + interval
+        self.key = None
+
+
+class PollingScheduler(object):
+    """ Call periodically some callbacks from a single thread.
+
+    The callbacks are called from the scheduler thread and should hence return
+    quickly (typically by delegating the actual work to the thread of the
+    owner).
+
+    Parameters
+    ----------
+    tolerance : float, optional
+        Fraction of its interval by which a poll can be advanced so that it is
+        coalesced with another poll of the same owner.
+
+    growth : float, optional
+        Factor by which the interval of a poll is multiplied each time the
+        polled value is reported unchanged.
+
+    """
+
+    def __init__(self, tolerance=0.2, growth=1.5):
+        self.tolerance = tolerance
+        self.growth = growth
+        self._polls = {}
+        self._heap = []
+        self._counter = count()
+        self._condition = Condition(Lock())
+        self._thread = None
+        self._stop = False
+
+    def schedule(self, owner, name, callback, interval, max_interval=None):
+        """ Poll periodically a value.
+
+        Parameters
+        ----------
+        owner : object
+            Object owning the poll. Polls of the same owner using the same
+            callback are coalesced.
+
+        name : str
+            Name of the polled value, unique for a given owner.
+
+        callback : callable
+            Callable called with the list of the names of the due polls.
+
+        interval : float
+            Time in seconds between two polls.
+
+        max_interval : float, optional
+            Maximal interval reached when the value does not change. By default
+            the interval is not adapted.
+
+        """
+        poll = _Poll(owner, name, callback, interval, max_interval)
+        with self._condition:
+            self._polls[(id(owner), name)] = poll
+            self._push(poll)
+            self._condition.notify()
+            if self._thread is None:
+                self._stop = False
+                self._thread = Thread(target=self._run,
+                                      name='PollingScheduler')
+                self._thread.daemon = True
+                self._thread.start()
+
+    def unschedule(self, owner, name=None):
+        """ Stop polling a value, or all the values of an owner.
+
+        """
+        with self._condition:
+            if name is not None:
+                poll = self._polls.pop((id(owner), name), None)
+                if poll is not None:
+                    poll.key = None
+                return
+
+            for key in [k for k in self._polls if k[0] == id(owner)]:
+                self._polls.pop(key).key = None
+
+    def report(self, owner, name, changed):
+        """ Report whether a polled value changed, to adapt the interval.
+
+        """
+        with self._condition:
+            poll = self._polls.get((id(owner), name))
+            if poll is None or poll.max_interval == poll.base_interval:
+                return
+            if changed:
+                new = poll.base_interval
+            else:
+                new = min(poll.interval*self.growth, poll.max_interval)
+            if new < poll.interval:
+                # Poll sooner than planned.
+                poll.due = min(poll.due, time() + new)
+                poll.interval = new
+                self._push(poll)
+                self._condition.notify()
+            else:
+                poll.interval = new
+
+    def stop(self):
+        """ Stop the scheduler thread, the polls are forgotten.
+
+        """
+        with self._condition:
+            self._stop = True
+            self._polls.clear()
+            self._heap = []
+            self._condition.notify()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    # --- Private API ---------------------------------------------------------
+
+    def _push(self, poll):
+        """ Add a poll to the heap, invalidating its previous entry.
+
+        Must be called with the condition lock held.
+
+        """
+        poll.key = next(self._counter)
+        heapq.heappush(self._heap, (poll.due, poll.key, poll))
+
+    def _pop_due(self):
+        """ Wait for polls to be due and collect the polls to perform.
+
+        Returns
+        -------
+        calls : list
+            List of (callback, names) to call, None if the thread should stop.
+
+        """
+        with self._condition:
+            while True:
+                if self._stop:
+                    return None
+                heap = self._heap
+                while heap and heap[0][2].key != heap[0][1]:
+                    heapq.heappop(heap)
+                if not heap:
+                    self._condition.wait()
+                    continue
+                now = time()
+                if heap[0][0] > now:
+                    self._condition.wait(heap[0][0] - now)
+                    continue
+                break
+
+            due = []
+            while heap and heap[0][0] <= now:
+                _, key, poll = heapq.heappop(heap)
+                if poll.key == key:
+                    due.append(poll)
+
+            # Advance the polls of the same owners due soon.
+            owners = set((id(p.owner), p.callback) for p in due)
+            for poll in self._polls.values():
+                if (poll.key is not None and poll not in due and
+                        (id(poll.owner), poll.callback) in owners and
+                        poll.due - now <= self.tolerance*poll.interval):
+                    due.append(poll)
+
+            calls = {}
+            for poll in due:
+                group = (id(poll.owner), poll.callback)
+                calls.setdefault(group, (poll.callback, []))[1].append(
+                    poll.name)
+                poll.due = now + poll.interval
+                self._push(poll)
+
+            return calls.values()
+
+    def _run(self):
+        """ Perform the polls when they are due.
+
+        """
+        while True:
+            calls = self._pop_due()
+            if calls is None:
+                break
+            for callback, names in calls:
+                try:
+                    callback(sorted(names))
+                except Exception:
+                    logger = logging.getLogger(__name__)
+                    logger.exception('Poll of {} failed'.format(names))
+
+
+#: Scheduler shared by all the panels.
+_SCHEDULER = None
+
+#: Lock protecting the creation of the shared scheduler.
+_SCHEDULER_LOCK = Lock()
+
+
+def shared_scheduler():
+    """ Get the scheduler shared by all the control panels.
+
+    """
+    global _SCHEDULER
+    with _SCHEDULER_LOCK:
+        if _SCHEDULER is None:
+            _SCHEDULER = PollingScheduler()
+        return _SCHEDULER
+
+
+def value_changed(old, new):
+    """ Tell whether a polled value changed, the values can be arrays.
+
+    Values which cannot be compared are considered as changed.
+
+    """
+    try:
+        return not np.array_equal(old, new)
+    except Exception:
+        return True
@@ -1,55 +1,29 @@
 # -*- coding: utf-8 -*-
 
-from threading import Thread, Timer
+from threading import Thread
 from Queue import Queue
-from atom.api import (Atom, Typed, Bool, Str, Instance, Float, Callable, Tuple,
-                      Dict, List, Event, Int, Value)
+from atom.api import (Typed, Bool, Str, Instance, Float, Callable, Dict, List,
+                      Event, Int, Value)
 from inspect import getmembers, ismethod, cleandoc
 from configobj import ConfigObj
-from ..instruments.drivers import BaseInstrument, InstrError, DRIVERS
-from ..atom_util import PrefAtom, tagged_members
+from ..instruments.driver_tools import BaseInstrument, InstrError
+from ..utils.atom_util import HasPrefAtom, tagged_members
+from .polling import shared_scheduler, value_changed
 
 
-class RepeatedTimer(Atom):
-    """
-    """
-    interval = Float()
-    function = Callable()
-    args = Tuple()
-    kwargs = Dict()
-    is_running = Bool()
-    _timer = Typed(Thread)  # the Timer class is not supposed to be accessed to
-
-    def __init__(self, interval, function, *args, **kwargs):
-        super(RepeatedTimer, self).__init__()
-        self.interval   = interval
-        self.function   = function
-        self.args       = args
-        self.kwargs     = kwargs
-        self.start()
-
-    #---- Public API ----------------------------------------------------------
-
-    def start(self):
-        if not self.is_running:
-            self._timer = Timer(self.interval, self._run)
-            self._timer.start()
-            self.is_running = True
-
-    def cancel(self):
-        self._timer.cancel()
-        self.is_running = False
-
-    #---- Private API ---------------------------------------------------------
+class SingleInstrPanel(HasPrefAtom):
+    """ Panel controlling a single instrument.
 
-    def _run(self):
-        self.is_running = False
-        self.start()
-        self.function(*self.args, **self.kwargs)
+    Parameters
+    ----------
+    state : dict
+        State of the panel, preferences and profile availability.
 
+    drivers : dict
+        Mapping between the names of the drivers and their classes (as
+        returned by the instrument manager), used to build the driver declared
+        in the profile.
 
-class SingleInstrPanel(PrefAtom):
-    """
     """
     # Class attribute
     driver_type = None
@@ -81,14 +55,14 @@ class SingleInstrPanel(PrefAtom):
 
     _op_queue = Value(factory=Queue)
     _process_thread = Typed(Thread)
-    _corrup_timer = Typed(RepeatedTimer)
-    _fast_refresh_timer = Typed(RepeatedTimer)
-    _refresh_timer = Typed(RepeatedTimer)
+    # Polls are performed by a scheduler shared by all the panels which
+    # coalesces the refreshes of a panel.
+    _scheduler = Value(factory=shared_scheduler)
     _dgetters = Dict(Str(), Callable())
     _dsetters = Dict(Str(), Callable())
     _proposed_val_counter = Int()
 
-    def __init__(self, state):
+    def __init__(self, state, drivers):
         super(SingleInstrPanel, self).__init__()
 
         # Collect dgetter and dsetters here (as we inspect the object we get
@@ -104,7 +78,7 @@ class SingleInstrPanel(PrefAtom):
             self.profile_available = True
         config = ConfigObj(self.profile)
 
-        driver_class = DRIVERS[config['driver']]
+        driver_class = drivers[config['driver']]
         try:
             self.driver = driver_class(config,
                                        caching_allowed=False,
@@ -126,17 +100,7 @@ class SingleInstrPanel(PrefAtom):
             self._process_thread = Thread(target=self._process_pending_op)
             self._process_thread.start()
             self.refresh_driver_info()
-            if self.check_corrupt:
-                self._corrupt_timer = RepeatedTimer(self.corrupt_time,
-                                                    self.check_driver_state)
-            if self.fast_refresh:
-                self._fast_refresh_timer =\
-                    RepeatedTimer(self.fast_refresh_time,
-                                  self.refresh_driver_info,
-                                  self.fast_refresh_members)
-
-            self._refresh_timer = RepeatedTimer(self.refresh_time,
-                                                self.refresh_driver_info)
+            self._schedule_polls()
 
     #---- Public API ----------------------------------------------------------
 
@@ -171,23 +135,12 @@ class SingleInstrPanel(PrefAtom):
         self._process_thread.start()
 
         self.refresh_driver_info()
-        if self.check_corrupt:
-            self._corrupt_timer = RepeatedTimer(self.corrupt_time,
-                                                self.check_driver_state)
-        if self.fast_refresh:
-            self._fast_refresh_timer = RepeatedTimer(self.fast_refresh_times,
-                                                     self.refresh_driver_info,
-                                                     self.fast_refresh_members)
-        self._refresh_timer = RepeatedTimer(self.refresh_time,
-                                            self.refresh_driver_info)
+        self._schedule_polls()
 
     def release_driver(self):
         """
         """
-        if self._corrup_timer:
-            self._corrupt_timer.cancel()
-        if self._refresh_timer:
-            self._refresh_timer.cancel()
+        self._scheduler.unschedule(self)
         self._op_queue.put(None)
         self._process_thread.join()
         self._process_thread = None
@@ -232,7 +185,9 @@ class SingleInstrPanel(PrefAtom):
             val = None
             try:
                 val = self._dgetters[member]()
+                changed = value_changed(getattr(self, member), val)
                 setattr(self, member, val)
+                self._scheduler.report(self, member, changed)
             except InstrError as e:
                 val = e
             validators = self.registered_validators.get(member, [])
@@ -276,51 +231,72 @@ class SingleInstrPanel(PrefAtom):
     def _observe_check_corrupt(self, change):
         """
         """
-        if change['value']:
-            if self._process_thread:
-                self._corrupt_timer = RepeatedTimer(self.corrupt_time,
-                                                    self.check_driver_state)
-        else:
-            if self._corrup_timer:
-                self._corrup_timer.cancel()
+        self._schedule_polls()
 
-    def _observe_check_corrupt_time(self, change):
+    def _observe_corrupt_time(self, change):
         """
         """
-        if self._process_thread and self._corrup_timer:
-            self._corrup_timer.cancel()
-            self._corrupt_timer = RepeatedTimer(change['value'],
-                                                self.check_driver_state)
+        self._schedule_polls()
 
     def _observe_fast_refresh(self, change):
         """
         """
-        if change['value']:
-            if self._process_thread:
-                self._fast_refresh_timer =\
-                    RepeatedTimer(self.fast_refresh_time,
-                                  self.refresh_driver_info,
-                                  self.fast_refresh_members)
-        else:
-            if self._fast_refresh_timer:
-                self._fast_refresh_timer.cancel()
+        self._schedule_polls()
 
     def _observe_fast_refresh_time(self, change):
         """
         """
-        if self._process_thread and self._fast_refresh_timer:
-            self._fast_refresh_timer.cancel()
-            self._fast_refresh_timer = RepeatedTimer(change['value'],
-                                                     self.refresh_driver_info,
-                                                     self.fast_refresh_members)
+        self._schedule_polls()
+
+    def _observe_fast_refresh_members(self, change):
+        """
+        """
+        self._schedule_polls()
 
     def _observe_refresh_time(self, change):
         """
         """
-        if self._process_thread and self._refresh_timer:
-            self._refresh_timer.cancel()
-            self._refresh_timer = RepeatedTimer(change['value'],
-                                                self.refresh_driver_info)
+        self._schedule_polls()
+
+    #---- Polling -------------------------------------------------------------
+
+    def _schedule_polls(self):
+        """ (Re)schedule the polls of the driver in the shared scheduler.
+
+        Each getter is polled every refresh_time. If fast refresh is enabled,
+        the fast refresh members are polled every fast_refresh_time, this
+        interval growing up to refresh_time while their value does not change.
+
+        """
+        scheduler = self._scheduler
+        scheduler.unschedule(self)
+        if not self._process_thread:
+            return
+
+        fast = self.fast_refresh_members if self.fast_refresh else []
+        for member in self._dgetters:
+            if member in fast:
+                scheduler.schedule(self, member, self._poll_members,
+                                   self.fast_refresh_time, self.refresh_time)
+            else:
+                scheduler.schedule(self, member, self._poll_members,
+                                   self.refresh_time)
+
+        if self.check_corrupt:
+            scheduler.schedule(self, '__corrupt__', self._poll_corrupt,
+                               self.corrupt_time)
+
+    def _poll_members(self, members):
+        """ Called by the scheduler to refresh the due members.
+
+        """
+        self.refresh_driver_info(*members)
+
+    def _poll_corrupt(self, names):
+        """ Called by the scheduler to check the state of the driver.
+
+        """
+        self.check_driver_state()
 
     #---- Default values ------------------------------------------------------
 
@@ -26,11 +26,16 @@ the VISA library.
     secure_communication :
         decorator making sure that a communication error cannot simply be
         resolved by attempting again to send a message.
+    OperationFuture :
+        future tracking the completion of an operation run by an instrument.
+    wait_operations :
+        function waiting for the completion of several operations.
 
 """
 from textwrap import fill
 from inspect import cleandoc
 import inspect
+import time
 from functools import wraps
 
 
@@ -136,6 +141,158 @@ def secure_communication(max_iter=2):
     return decorator
 
 
+#: Factor and margin in s used to derive the timeout of an operation from its
+#: expected duration (see `operation_timeout`).
+OPERATION_TIMEOUT_FACTOR = 2.
+OPERATION_TIMEOUT_MARGIN = 10.
+
+
+def operation_timeout(expected):
+    """Timeout to use for an operation expected to last `expected` s.
+
+    """
+    return OPERATION_TIMEOUT_FACTOR*expected + OPERATION_TIMEOUT_MARGIN
+
+
+class OperationFuture(object):
+    """Future tracking the completion of an operation run by an instrument.
+
+    The instrument is polled only when the future is queried and only once a
+    poll is due, so that a single thread can wait for the operations run by
+    several instruments (see `wait_operations`). The interval between two
+    polls grows geometrically from `poll_interval` to `max_interval`.
+
+    Parameters
+    ----------
+    poll : callable
+        Callable returning True once the operation is over.
+    timeout : float, optionnal
+        Time in s after which the operation is considered as failed. By
+        default there is no deadline.
+    expected : float, optionnal
+        Expected duration of the operation in s, the instrument is not polled
+        before.
+    poll_interval : float, optionnal
+        Initial interval between two polls in s.
+    max_interval : float, optionnal
+        Maximal interval between two polls in s.
+
+    Attributes
+    ----------
+    deadline : float or None
+        Time after which the operation is considered as failed.
+    next_poll : float
+        Time at which the instrument should be polled again.
+
+    """
+    growth = 2.
+
+    def __init__(self, poll, timeout=None, expected=0., poll_interval=0.01,
+                 max_interval=1.):
+        now = time.time()
+        self.deadline = None if timeout is None else now + timeout
+        self.next_poll = now + expected
+        self._poll = poll
+        self._interval = poll_interval
+        self._max_interval = max(max_interval, poll_interval)
+        self._done = False
+
+    def done(self):
+        """Return whether the operation is over, without blocking.
+
+        """
+        if not self._done:
+            now = time.time()
+            if now >= self.next_poll:
+                self._done = bool(self._poll())
+                self.next_poll = now + self._interval
+                self._interval = min(self._interval*self.growth,
+                                     self._max_interval)
+        return self._done
+
+    def expired(self):
+        """Return whether the deadline of the operation is over.
+
+        """
+        return self.deadline is not None and time.time() > self.deadline
+
+    def result(self, timeout=None, stop=None):
+        """Wait for the operation to complete.
+
+        Parameters
+        ----------
+        timeout : float, optionnal
+            Maximum time to wait in s.
+        stop : Event, optionnal
+            Event interrupting the wait when set.
+
+        Returns
+        -------
+        completed : bool
+            False if the wait was interrupted.
+
+        Raises
+        ------
+        InstrIOError :
+            If the operation is not over before the deadline or the timeout.
+
+        """
+        return wait_operations([self], timeout, stop)
+
+
+def wait_operations(futures, timeout=None, stop=None):
+    """Wait for several operations to complete.
+
+    The instruments are polled in turn when their polls are due, so that the
+    waits overlap.
+
+    Parameters
+    ----------
+    futures : iterable(OperationFuture)
+        Futures tracking the operations.
+    timeout : float, optionnal
+        Maximum time to wait in s.
+    stop : Event, optionnal
+        Event interrupting the wait when set, typically the should_stop event
+        of the root task.
+
+    Returns
+    -------
+    completed : bool
+        True if all the operations are over, False if the wait was
+        interrupted.
+
+    Raises
+    ------
+    InstrIOError :
+        If one operation is not over before its deadline or the timeout.
+
+    """
+    limit = None if timeout is None else time.time() + timeout
+    pending = list(futures)
+    while True:
+        pending = [f for f in pending if not f.done()]
+        if not pending:
+            return True
+        if stop is not None and stop.is_set():
+            return False
+        if any(f.expired() for f in pending) or\
+                (limit is not None and time.time() > limit):
+            raise InstrIOError('Operation did not complete in time')
+
+        wake_up = min(f.next_poll for f in pending)
+        deadlines = [f.deadline for f in pending if f.deadline is not None]
+        if limit is not None:
+            deadlines.append(limit)
+        if deadlines:
+            wake_up = min(wake_up, min(deadlines) + 1e-3)
+        delay = max(0, wake_up - time.time())
+        if stop is not None:
+            stop.wait(delay)
+        else:
+            time.sleep(delay)
+
+
 class BaseInstrument(object):
     """Base class for all drivers
 
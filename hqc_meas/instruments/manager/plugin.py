@@ -7,9 +7,10 @@
 """
 """
 import os
+import sys
 import logging
 from importlib import import_module
-from atom.api import (Str, Dict, List, Unicode, Typed, Subclass, Tuple)
+from atom.api import (Str, Dict, List, Unicode, Typed, Tuple)
 from enaml.application import deferred_call
 import enaml
 
@@ -21,9 +22,10 @@ from inspect import cleandoc, getmodule, getmembers, isclass
 from collections import defaultdict
 
 from hqc_meas.utils.has_pref_plugin import HasPrefPlugin
-from ..driver_tools import BaseInstrument
+from hqc_meas.utils.discovery import (DiscoveryIndex, LazyObject, LazyDict,
+                                      IndexUpdater, default_index_path)
 from .instr_user import InstrUser
-from .profile_utils import open_profile
+from .profile_utils import ProfileCache
 
 with enaml.imports():
     from .forms.views.base_form_views import EmptyView
@@ -35,6 +37,9 @@ PACKAGE_PATH = os.path.join(os.path.dirname(__file__), '..')
 
 MODULE_ANCHOR = 'hqc_meas'
 
+#: Name of the file in which the content of the drivers packages is indexed.
+INDEX_FILE = 'drivers_index.json'
+
 
 class InstrManagerPlugin(HasPrefPlugin):
     """
@@ -61,6 +66,12 @@ class InstrManagerPlugin(HasPrefPlugin):
     # Name of the currently available profiles.
     available_profiles = List()
 
+    # Path to the file in which the content of the drivers packages is
+    # indexed. Modules already indexed are imported only when first needed.
+    # By default the index is saved along the preferences (see
+    # default_index_path).
+    index_path = Unicode().tag(pref=True)
+
     def start(self):
         """ Start the plugin life-cycle.
 
@@ -92,6 +103,7 @@ class InstrManagerPlugin(HasPrefPlugin):
         self._drivers.clear()
         self._forms.clear()
         self._profiles_map.clear()
+        self._profile_cache.invalidate()
         self._used_profiles.clear()
 
     def driver_types_request(self, driver_types):
@@ -115,8 +127,8 @@ class InstrManagerPlugin(HasPrefPlugin):
         missing = [driver_type for driver_type in driver_types
                    if driver_type not in self.driver_types]
 
-        found = {key: val for key, val in self._driver_types.iteritems()
-                 if key in driver_types}
+        found = {key: self._driver_types[key] for key in driver_types
+                 if key in self._driver_types}
 
         return found, missing
 
@@ -137,13 +149,7 @@ class InstrManagerPlugin(HasPrefPlugin):
             The list of drivers that was not found.
 
         """
-        missing = [driver for driver in drivers
-                   if driver not in self.drivers]
-
-        found = {key: val for key, val in self._drivers.iteritems()
-                 if key in drivers}
-
-        return found, missing
+        return self._drivers.request(drivers)
 
     def profile_path(self, profile):
         """ Request the path of the file storing a profile
@@ -166,6 +172,26 @@ class InstrManagerPlugin(HasPrefPlugin):
         """
         return self._profiles_map.get(profile, None)
 
+    def profile_infos(self, profile):
+        """ Read the content of a profile without requesting its use.
+
+        Parameters
+        ----------
+        profile : str
+            Name of the profile to read.
+
+        Returns
+        -------
+        infos : dict or None
+            Copy of the content of the profile, None if the profile is not
+            known.
+
+        """
+        path = self._profiles_map.get(profile)
+        if path is None:
+            return None
+        return self._profile_cache.get(path)
+
     def profiles_request(self, new_owner, profiles):
         """ Register the user of the specified profiles.
 
@@ -232,7 +258,7 @@ class InstrManagerPlugin(HasPrefPlugin):
         self._used_profiles.update(used)
 
         mapping = self._profiles_map
-        profile_objects = {prof: open_profile(mapping[prof])
+        profile_objects = {prof: self._profile_cache.get(mapping[prof])
                            for prof in profiles}
 
         return profile_objects, []
@@ -301,7 +327,7 @@ class InstrManagerPlugin(HasPrefPlugin):
         profiles = []
         for driver in drivers:
             profs = [prof for prof, path in self._profiles_map.iteritems()
-                     if open_profile(path)['driver'] == driver]
+                     if self._profile_cache.get(path)['driver'] == driver]
             profiles.extend(profs)
 
         return profiles
@@ -395,11 +421,14 @@ class InstrManagerPlugin(HasPrefPlugin):
         return self._drivers[driver]
 
     # --- Private API ---------------------------------------------------------
-    # Drivers types
-    _driver_types = Dict(Str(), Subclass(BaseInstrument))
+    # Drivers types (imported on first access).
+    _driver_types = Typed(LazyDict, ())
+
+    # Drivers (imported on first access).
+    _drivers = Typed(LazyDict, ())
 
-    # Drivers
-    _drivers = Dict(Str(), Subclass(BaseInstrument))
+    # Index of the content of the explored modules.
+    _index = Typed(DiscoveryIndex)
 
     # Connections forms and views {driver_name: (form, view)}.
     _forms = Dict(Str(), Tuple())
@@ -407,6 +436,9 @@ class InstrManagerPlugin(HasPrefPlugin):
     # Mapping between profile names and path to .ini file holding the data.
     _profiles_map = Dict(Str(), Unicode())
 
+    # Cache of the parsed profiles.
+    _profile_cache = Typed(ProfileCache, ())
+
     # Mapping between profile names and user id.
     _used_profiles = Dict(Unicode(), Unicode())
 
@@ -462,6 +494,10 @@ class InstrManagerPlugin(HasPrefPlugin):
         """
         path = PACKAGE_PATH
         failed = {}
+        if self._index is None:
+            index_path = (self.index_path or
+                          default_index_path(self.workbench, INDEX_FILE))
+            self._index = DiscoveryIndex(index_path)
 
         modules = self._explore_package('instruments', path, failed,
                                         self.drivers_loading)
@@ -495,19 +531,23 @@ class InstrManagerPlugin(HasPrefPlugin):
                 if pack in self.drivers_loading:
                     driver_packages.remove(pack)
 
-        self._drivers = drivers
-        self._driver_types = driver_types
+        self._index.save()
+
+        self._drivers = LazyDict(drivers)
+        self._driver_types = LazyDict(driver_types)
 
         self.driver_types = sorted(driver_types.keys())
         self.drivers = sorted(drivers.keys())
         self._failed = failed
         # TODO do something with failed
 
-    @staticmethod
-    def _explore_modules_for_drivers(modules, types, packages, drivers, failed,
-                                     prefix):
+    def _explore_modules_for_drivers(self, modules, types, packages, drivers,
+                                     failed, prefix):
         """ Explore a list of modules.
 
+        Modules whose content is known from the index are not imported, the
+        drivers they declare are stored as LazyObject.
+
         Parameters
         ----------
         modules : list
@@ -527,6 +567,21 @@ class InstrManagerPlugin(HasPrefPlugin):
 
         """
         for mod in modules:
+            name = MODULE_ANCHOR + '.' + mod
+            mod_path = os.path.realpath(os.path.join(PACKAGE_PATH, '..',
+                                                     *mod.split('.'))) + '.py'
+            exports = self._index.get(name, mod_path)
+            if exports is not None:
+                types.update({k: LazyObject(name, 'DRIVER_TYPES', (k,))
+                              for k in exports['types']})
+                drivers.update({k: LazyObject(name, 'DRIVERS', (k,))
+                                for k in exports['drivers']})
+                packs = [prefix + '.' + pack for pack in exports['packages']]
+                packages.extend(packs)
+                continue
+
+            # A module imported before may not match its file anymore.
+            up_to_date = name not in sys.modules
             try:
                 m = import_module('.' + mod, MODULE_ANCHOR)
             except Exception as e:
@@ -546,6 +601,13 @@ class InstrManagerPlugin(HasPrefPlugin):
             if hasattr(m, 'DRIVERS'):
                 drivers.update(m.DRIVERS)
 
+            if up_to_date:
+                exports = {'types': list(getattr(m, 'DRIVER_TYPES', {})),
+                           'drivers': list(getattr(m, 'DRIVERS', {})),
+                           'packages': list(getattr(m, 'DRIVER_PACKAGES',
+                                                    []))}
+                self._index.update(name, mod_path, exports)
+
     def _refresh_forms(self):
         """ Refresh the list of known forms.
 
@@ -721,9 +783,12 @@ class InstrManagerPlugin(HasPrefPlugin):
         point.observe('extensions', self._on_users_updated)
 
         for folder in self.profiles_folders:
-            handler = _FileListUpdater(self._refresh_profiles_map)
+            handler = _FileListUpdater(self._refresh_profiles_map,
+                                       self._profile_cache)
             self._observer.schedule(handler, folder, recursive=True)
 
+        self._schedule_index_updater()
+
         self._observer.start()
         self.observe('drivers_loading', self._update_drivers)
         self.observe('profiles_folders', self._update_profiles)
@@ -748,16 +813,39 @@ class InstrManagerPlugin(HasPrefPlugin):
         """
         self._refresh_drivers()
 
+    def _refresh_drivers_deferred(self, deferred=False):
+        """ Refresh the drivers, from the main thread if deferred is True.
+
+        """
+        if deferred:
+            deferred_call(self._refresh_drivers)
+        else:
+            self._refresh_drivers()
+
     def _update_profiles(self, change):
         """ Observer ensuring that we observe the right profile folders.
 
         """
         self._observer.unschedule_all()
+        self._profile_cache.invalidate()
 
         for folder in self.profiles_folders:
-            handler = _FileListUpdater(self._refresh_profiles_map)
+            handler = _FileListUpdater(self._refresh_profiles_map,
+                                       self._profile_cache)
             self._observer.schedule(handler, folder, recursive=True)
 
+        self._schedule_index_updater()
+
+    def _schedule_index_updater(self):
+        """ Watch the instruments package to keep the index up to date.
+
+        """
+        handler = IndexUpdater(self._index,
+                               lambda: self._refresh_drivers_deferred(True),
+                               ('.py',))
+        self._observer.schedule(handler, os.path.realpath(PACKAGE_PATH),
+                                recursive=True)
+
     @staticmethod
     def _normalise_name(name):
         """ Normalize the name of the profiles by replacing '_' by spaces,
@@ -796,9 +884,20 @@ class InstrManagerPlugin(HasPrefPlugin):
 class _FileListUpdater(FileSystemEventHandler):
     """Simple watchdog handler used for auto-updating the profiles list
 
+    If a profile cache is given, the cached profiles are invalidated when
+    their file is modified.
+
     """
-    def __init__(self, handler):
+    def __init__(self, handler, cache=None):
         self.handler = handler
+        self.cache = cache
+
+    def dispatch(self, event):
+        if self.cache is not None:
+            for path in (event.src_path, getattr(event, 'dest_path', '')):
+                if path.endswith('.ini'):
+                    self.cache.invalidate(path)
+        super(_FileListUpdater, self).dispatch(event)
 
     def on_created(self, event):
         super(_FileListUpdater, self).on_created(event)
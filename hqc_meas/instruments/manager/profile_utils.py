@@ -7,6 +7,8 @@
 """
 """
 import os
+from copy import deepcopy
+from threading import Lock
 from configobj import ConfigObj
 
 
@@ -38,3 +40,58 @@ def save_profile(directory, profile_name, profile_infos):
     conf.update(profile_infos)
     with open(path, 'w') as f:
         conf.write(f)
+
+
+class ProfileCache(object):
+    """ In memory cache of the parsed profiles.
+
+    The profiles are parsed again only if the modification time of their file
+    changed or if they were explicitly invalidated (the manager does so when
+    watchdog notifies it of a modification). Copies of the cached profiles are
+    returned so that the users can freely modify them.
+
+    """
+
+    def __init__(self):
+        self._cache = {}
+        self._lock = Lock()
+
+    def get(self, profile_path):
+        """ Access the profile stored in a file.
+
+        Parameters
+        ----------
+        profile_path : unicode
+            Path to the file in which the profile is stored
+
+        Returns
+        -------
+        profile : dict
+            Copy of the profile.
+
+        """
+        path = os.path.abspath(profile_path)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            self.invalidate(path)
+            return open_profile(path)
+
+        with self._lock:
+            cached = self._cache.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, open_profile(path))
+            with self._lock:
+                self._cache[path] = cached
+
+        return deepcopy(cached[1])
+
+    def invalidate(self, profile_path=None):
+        """ Forget the cached profile stored in a file, or all profiles.
+
+        """
+        with self._lock:
+            if profile_path is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(os.path.abspath(profile_path), None)
@@ -13,19 +13,12 @@ This module defines drivers for agilent PNA.
     AgilentPNA
 
 """
-import logging
 from inspect import cleandoc
 import numpy as np
 
-try:
-    from visa import ascii, single, double
-except ImportError:
-    ascii = 0
-    single = 1
-    double = 3
-
-from ..driver_tools import (BaseInstrument, InstrIOError, InstrError,
-                            secure_communication, instrument_property)
+from ..driver_tools import (BaseInstrument, InstrIOError,
+                            secure_communication, instrument_property,
+                            operation_timeout)
 from ..visa_tools import VisaInstrument
 
 
@@ -35,6 +28,19 @@ FORMATTING_DICT = {'PHAS': lambda x: np.angle(x, deg=True),
                    'REAL': np.real,
                    'IMAG': np.imag}
 
+#: Numpy types of the values transferred using the binary formats, without
+#: the byte order which depends on the FORMat:BORDer setting.
+BINARY_TYPES = {'REAL,32': 'f4', 'REAL,64': 'f8'}
+
+#: Numpy byte order flags matching the FORMat:BORDer settings.
+BYTE_ORDERS = {'NORM': '>', 'SWAP': '<'}
+
+#: Code of the error reported by the PNA when it does not know a query.
+UNDEFINED_HEADER = '-113'
+
+#: Maximum number of errors read from the error queue of the PNA.
+MAX_ERRORS = 20
+
 
 class AgilentPNAChannelError(Exception):
     """
@@ -55,7 +61,8 @@ class AgilentPNAChannel(BaseInstrument):
                            'sweep_points': True,
                            'average_state': True,
                            'average_count': True,
-                           'average_mode': True}
+                           'average_mode': True,
+                           'measure_numbers': True}
 
     def __init__(self, pna, channel_num, caching_allowed=True,
                  caching_permissions={}):
@@ -92,17 +99,10 @@ class AgilentPNAChannel(BaseInstrument):
             meas_name = self.selected_measure
 
         data_request = 'CALCulate{}:DATA? FDATA'.format(self._channel)
-        if self._pna.data_format == 'REAL,32':
-            data = self._pna.ask_for_values(data_request, single)
-
-        elif self._pna.data_format == 'REAL,64':
-            data = self._pna.ask_for_values(data_request, double)
+        data = self._pna.read_data(data_request)
 
-        else:
-            data = self._pna.ask_for_values(data_request, ascii)
-
-        if data:
-            return np.array(data)
+        if data.size:
+            return data
         else:
             raise InstrIOError(cleandoc('''Agilent PNA did not return the
                 channel {} formatted data for meas {}'''.format(
@@ -129,26 +129,64 @@ class AgilentPNAChannel(BaseInstrument):
             self.selected_measure = meas_name
 
         data_request = 'CALCulate{}:DATA? SDATA'.format(self._channel)
-        if self._pna.data_format == 'REAL,32':
-            data = self._pna.ask_for_values(data_request, single)
-
-        elif self._pna.data_format == 'REAL,64':
-            data = self._pna.ask_for_values(data_request, double)
-
-        else:
-            data = self._pna.ask_for_values(data_request, ascii)
+        data = self._pna.read_data(data_request, True)
 
         if not meas_name:
             meas_name = self.selected_measure
 
-        if data:
-            aux = np.array(data)
-            return aux[::2] + 1j*aux[1::2]
+        if data.size:
+            return data
         else:
             raise InstrIOError(cleandoc('''Agilent PNA did not return the
                 channel {} formatted data for meas {}'''.format(
                 self._channel, meas_name)))
 
+    def read_multiple_data(self, meas_numbers, formatted=False):
+        """ Read the data of several measures in a single transfer.
+
+        If the PNA does not support multiple measures queries, the measures
+        are read one after the other. Any other failure of the query is raised.
+
+        Parameters
+        ----------
+        meas_numbers : list(int)
+            Numbers of the measures to read (see measure_numbers).
+        formatted : bool, optional
+            Whether to read the formatted data or the raw (complex) data.
+
+        Returns
+        -------
+        data : list(numpy.array)
+            Data of each measure.
+
+        """
+        pna = self._pna
+        if pna.multiple_data_supported and len(meas_numbers) > 1:
+            request = 'CALCulate{}:DATA:{}? "{}"'.format(
+                self._channel, 'MFData' if formatted else 'MSData',
+                ','.join(str(num) for num in meas_numbers))
+            try:
+                data = pna.read_data(request, not formatted)
+            except pna.secure_com_except:
+                if not pna._query_undefined():
+                    raise
+                pna.multiple_data_supported = False
+            else:
+                if data.size and data.size % len(meas_numbers) == 0:
+                    return np.split(data, len(meas_numbers))
+                raise InstrIOError(cleandoc('''Agilent PNA did not return the
+                    channel {} data for meas {}'''.format(self._channel,
+                                                         meas_numbers)))
+
+        data = []
+        for num in meas_numbers:
+            self.tracenb = num
+            if formatted:
+                data.append(self.read_formatted_data())
+            else:
+                data.append(self.read_raw_data())
+        return data
+
     def read_and_format_raw_data(self, meas_format, meas_name=''):
         """
         """
@@ -156,41 +194,43 @@ class AgilentPNAChannel(BaseInstrument):
         return FORMATTING_DICT[meas_format](data)
 
     @secure_communication()
-    def run_averaging(self, aver_count=''):
+    def run_averaging(self, aver_count='', stop=None):
         """ Restart averaging on the channel and wait until it is over
 
         Parameters
         ----------
         aver_count : str, optional
             Number of averages to perform. Default value is the current one
+        stop : Event, optional
+            Event interrupting the averaging when set.
+
+        Returns
+        -------
+        completed : bool
+            False if the averaging was interrupted.
+
         """
         self._pna.trigger_source = 'Immediate'
         self.sweep_mode = 'Hold'
         self._pna.clear_averaging()
-        self._pna.timeout = 10
 
         if aver_count:
             self.average_count = aver_count
 
         self.average_state = 1
-
-        for i in range(0,int(self.average_count)):
-            self._pna.write('sense{}:sweep:mode gro'.format(self._channel))
-
-            while True:
-                try:
-                    done = self._pna.ask_for_values('*OPC?')[0]
-                    break
-                except Exception:
-                    self._pna.timeout = self._pna.timeout*2
-                    logger = logging.getLogger(__name__)
-                    msg = cleandoc('''PNA timeout increased to {} s
-                        This will make the PNA diplay 420 error w/o issue''')
-                    logger.info(msg.format(self._pna.timeout))
-
-            if done != 1:
-                raise InstrError(cleandoc('''Agilent PNA did could  not perform
-                the average on channel {} '''.format(self._channel)))
+        count = int(self.average_count)
+        expected = count*self.sweep_time
+
+        # The group count is set explicitly as it is shared with
+        # average_channels. Polling the status byte does not keep a query
+        # pending while the PNA sweeps, so the VISA timeout does not need to
+        # exceed the sweep time.
+        self._pna.write('SENSe{}:SWEep:GROups:COUNt {}'.format(self._channel,
+                                                              count))
+        operation = self._pna.start_operation(
+            'sense{}:sweep:mode gro'.format(self._channel),
+            operation_timeout(expected), expected)
+        return operation.result(stop=stop)
 
     @secure_communication()
     def list_existing_measures(self):
@@ -225,6 +265,7 @@ class AgilentPNAChannel(BaseInstrument):
             self._pna.write(create_meas.format(self._channel,
                                                meas_name,
                                                param))
+            self.clear_cache(['measure_numbers'])
 
             meas = self._pna.ask(catalog_request.format(self._channel))
             if meas:
@@ -241,6 +282,7 @@ class AgilentPNAChannel(BaseInstrument):
         self._pna.write(
             "CALCulate{}:PARameter:DELete '{}'".format(self._channel,
                                                        meas_name))
+        self.clear_cache(['measure_numbers'])
         meas = self._pna.ask('CALCulate{}:PARameter:CATalog:EXTended?'.format(
                              self._channel))
         if meas:
@@ -256,7 +298,7 @@ class AgilentPNAChannel(BaseInstrument):
             self._pna.write(
                 "CALCulate{}:PARameter:DELete '{}'".format(self._channel,
                                                            meas['name']))
-        self.clear_cache(['selected_measure'])
+        self.clear_cache(['selected_measure', 'measure_numbers'])
         if self.list_existing_measures():
             raise InstrIOError(cleandoc('''The Pna did not delete all meas
                 for channel {}'''.format(self._channel)))
@@ -365,6 +407,23 @@ class AgilentPNAChannel(BaseInstrument):
             raise InstrIOError(cleandoc('''PNA did not set correctly the
                     channel {} frequency'''.format(self._channel)))
 
+    @instrument_property
+    @secure_communication()
+    def measure_numbers(self):
+        """Numbers of the measures of the channel as a dict {name: number}.
+
+        """
+        catalog = self._pna.ask('SYSTem:MEASurement:CATalog? {}'.format(
+            self._channel)).strip('"')
+        numbers = {}
+        if not catalog or 'NO CATALOG' in catalog:
+            return numbers
+        for num in catalog.split(','):
+            name = self._pna.ask('SYSTem:MEASurement{}:NAME?'.format(
+                int(num)))
+            numbers[name.strip('"')] = int(num)
+        return numbers
+
     @instrument_property
     @secure_communication()
     def tracenb(self):
@@ -388,6 +447,7 @@ class AgilentPNAChannel(BaseInstrument):
         """
         self._pna.write('CALC{}:PAR:MNUM {}'.format(self._channel,
                                                             value))
+        self.clear_cache(['selected_measure'])
         result = self._pna.ask_for_values('CALC{}:PAR:MNUM?'.format(
                                           self._channel))
         if result:
@@ -732,7 +792,19 @@ class AgilentPNA(VisaInstrument):
     channels = {}
     caching_permissions = {'defined_channels': True,
                            'trigger_scope': True,
-                           'data_format': True}
+                           'data_format': True,
+                           'byte_order': True}
+
+    #: Whether the PNA answers the queries reading the data of several
+    #: measures at once. Set to False once it reports them as undefined.
+    multiple_data_supported = True
+
+    def __init__(self, connection_info, caching_allowed=True,
+                 caching_permissions={}, auto_open=True):
+        super(AgilentPNA, self).__init__(connection_info, caching_allowed,
+                                         caching_permissions, auto_open)
+        # Channels drivers are bound to this connection.
+        self.channels = {}
 
     def get_channel(self, num):
         """
@@ -763,23 +835,170 @@ class AgilentPNA(VisaInstrument):
                 raise InstrIOError(cleandoc('''Agilent PNA did not clear all
                     traces from window {}'''.format(window_num)))
 
-    @secure_communication()
-    def fire_trigger(self, channel=None):
+    def binary_type(self):
+        """ Select a binary format for the data transfers if necessary.
+
+        REAL,32 is used unless REAL,64 is already selected. The byte order of
+        the values is the one currently used by the PNA.
+
+        Returns
+        -------
+        dtype : str
+            Numpy type of the transferred values.
+
+        """
+        data_format = self.data_format.upper().replace('+', '')
+        if data_format not in BINARY_TYPES:
+            data_format = 'REAL,32'
+            self.data_format = data_format
+        byte_order = BYTE_ORDERS[self.byte_order.upper()[:4]]
+        return byte_order + BINARY_TYPES[data_format]
+
+    def read_data(self, request, complex_data=False, count=None):
+        """ Read data transferred as binary blocks.
+
+        Parameters
+        ----------
+        request : str
+            Query for the data.
+        complex_data : bool, optional
+            Whether the values are pairs of real and imaginary parts.
+        count : int, optional
+            Number of blocks in the answer (compound query). By default a
+            single block is expected.
+
+        Returns
+        -------
+        data : numpy.array or list(numpy.array)
+            Array(s) of the values.
+
         """
+        dtype = np.dtype(self.binary_type())
+        if complex_data:
+            dtype = np.dtype('{}c{}'.format(dtype.byteorder,
+                                            2*dtype.itemsize))
+        if count is None:
+            return self.ask_for_block(request, dtype)
+        return self.ask_for_blocks(request, dtype, count)
+
+    def read_channels_data(self, meas_numbers, formatted=False):
+        """ Read the data of measures of several channels in a single query.
+
+        If the PNA does not support multiple measures queries, the channels
+        are read one after the other. Any other failure of the query is raised.
+
+        Parameters
+        ----------
+        meas_numbers : dict(int, list(int))
+            Numbers of the measures to read for each channel.
+        formatted : bool, optional
+            Whether to read the formatted data or the raw (complex) data.
+
+        Returns
+        -------
+        data : dict(int, list(numpy.array))
+            Data of the measures of each channel, in the order of the numbers.
+
+        """
+        channels = sorted(meas_numbers)
+        if self.multiple_data_supported:
+            kind = 'MFData' if formatted else 'MSData'
+            request = ';:'.join('CALCulate{}:DATA:{}? "{}"'.format(
+                channel, kind, ','.join(str(n) for n in meas_numbers[channel]))
+                for channel in channels)
+            try:
+                blocks = self.read_data(request, not formatted, len(channels))
+            except self.secure_com_except:
+                if not self._query_undefined():
+                    raise
+                self.multiple_data_supported = False
+            else:
+                data = {}
+                for channel, block in zip(channels, blocks):
+                    count = len(meas_numbers[channel])
+                    if not block.size or block.size % count:
+                        raise InstrIOError(cleandoc('''Agilent PNA did not
+                            return the channel {} data'''.format(channel)))
+                    data[channel] = np.split(block, count)
+                return data
+
+        return {channel: self.get_channel(channel).read_multiple_data(
+                meas_numbers[channel], formatted) for channel in channels}
+
+    @secure_communication()
+    def average_channels(self, channels, stop=None):
+        """ Restart averaging on several channels and wait until all are over.
+
+        All the channels perform their averages as sweep groups without any
+        exchange with the computer in between and a single completion is
+        awaited.
+
+        Parameters
+        ----------
+        channels : iterable(int)
+            Numbers of the channels to average.
+        stop : Event, optional
+            Event interrupting the wait when set.
+
+        Returns
+        -------
+        completed : bool
+            False if the wait was interrupted.
+
+        """
+        channels = list(channels)
+        drivers = [self.get_channel(channel) for channel in channels]
+        self.trigger_source = 'Immediate'
+        for driver in drivers:
+            driver.sweep_mode = 'Hold'
+        self.clear_averaging()
+
+        expected = 0.
+        commands = []
+        for channel, driver in zip(channels, drivers):
+            count = int(driver.average_count)
+            driver.average_state = 1
+            expected += count*driver.sweep_time
+            self.write('SENSe{}:SWEep:GROups:COUNt {}'.format(channel, count))
+            commands.append('SENSe{}:SWEep:MODE GROups'.format(channel))
+
+        operation = self.start_operation(';:'.join(commands),
+                                         operation_timeout(expected), expected)
+        return operation.result(stop=stop)
+
+    @secure_communication()
+    def fire_trigger(self, channel=None, expected=0., timeout=None):
+        """ Trigger a sweep on one or all the channels.
+
+        Parameters
+        ----------
+        channel : int, optional
+            Channel to trigger, all channels are triggered by default.
+        expected : float, optional
+            Expected duration of the sweep in s.
+        timeout : float, optional
+            Time in s after which the sweep is considered as failed. By
+            default it is derived from the expected duration.
+
+        Returns
+        -------
+        future : OperationFuture
+            Future tracking the completion of the sweep.
+
         """
         if channel is None:
-            self.write('INITiate:IMMediate')
+            command = 'INITiate:IMMediate'
         else:
-            self.write('INITiate{}:IMMediate'.format(channel))
-        self.write('*OPC')
+            command = 'INITiate{}:IMMediate'.format(channel)
+        if timeout is None:
+            timeout = operation_timeout(expected)
+        return self.start_operation(command, timeout, expected)
 
-    @secure_communication()
     def check_operation_completion(self):
+        """ Check whether the last triggered sweep is over.
+
         """
-        """
-        bites = self.ask('*ESR?')
-        status_byte = ('{0:08b}'.format(int(bites)))[::-1]
-        return bool(int(status_byte[0]))
+        return self.operation_complete()
 
     @secure_communication()
     def set_all_chanel_to_hold(self):
@@ -896,10 +1115,53 @@ class AgilentPNA(VisaInstrument):
         """
         """
         self.write('FORMAT:DATA {}'.format(value))
-        result = self.ask('FORMAT:DATA?')
+        result = self.ask('FORMAT:DATA?').replace('+', '')
 
         if result.lower() != value.lower()[:len(result)]:
             raise InstrIOError(cleandoc('''PNA did not set correctly the
                 data format'''))
 
+    @instrument_property
+    @secure_communication()
+    def byte_order(self):
+        """Byte order of the binary transfers ('NORM' or 'SWAP').
+
+        """
+        byte_order = self.ask('FORMat:BORDer?').strip().upper()[:4]
+        if byte_order in BYTE_ORDERS:
+            return byte_order
+        else:
+            raise InstrIOError(cleandoc('''Agilent PNA did not return the
+                    byte order'''))
+
+    @byte_order.setter
+    @secure_communication()
+    def byte_order(self, value):
+        """
+        """
+        self.write('FORMat:BORDer {}'.format(value))
+        result = self.ask('FORMat:BORDer?').strip()
+
+        if result.upper()[:4] != value.upper()[:4]:
+            raise InstrIOError(cleandoc('''PNA did not set correctly the
+                byte order'''))
+
+    def _query_undefined(self):
+        """ Clear the connection after a failed query and check whether the
+        PNA failed because it does not know the query.
+
+        The error queue is emptied so that older errors are not mistaken for
+        the one caused by the query.
+
+        """
+        self.clear()
+        undefined = False
+        for i in range(MAX_ERRORS):
+            error = self.ask('SYSTem:ERRor?').strip()
+            if not error or error.lstrip('+').startswith('0'):
+                break
+            if error.startswith(UNDEFINED_HEADER):
+                undefined = True
+        return undefined
+
 DRIVERS = {'AgilentPNA' : AgilentPNA}
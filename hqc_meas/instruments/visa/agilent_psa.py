@@ -15,7 +15,7 @@ This module defines drivers for agilent PSA.
 from inspect import cleandoc
 import numpy as np
 from ..driver_tools import (InstrIOError, secure_communication,
-                            instrument_property)
+                            instrument_property, operation_timeout)
 from ..visa_tools import VisaInstrument
 
 
@@ -91,8 +91,21 @@ class AgilentPSA(VisaInstrument):
             raise '''PSA is not in Spectrum mode'''
 
     @secure_communication()
-    def read_data(self, trace):
-        """
+    def read_data(self, trace, stop=None):
+        """ Acquire and read a trace.
+
+        Parameters
+        ----------
+        trace : int
+            Number of the trace to read.
+        stop : Event, optional
+            Event interrupting the acquisition when set.
+
+        Returns
+        -------
+        data : np.recarray or None
+            Data of the trace, None if the acquisition was interrupted.
+
         """
         DATA_FORMAT = ['raw I/Q data', 'descriptor', '0', '(I,Q) vs time',
                        'log(mag) vs freq', '0', '0',
@@ -106,20 +119,14 @@ class AgilentPSA(VisaInstrument):
             self.write(":ABORT")
             # go to the "Single sweep" mode
             self.write(":INIT:CONT OFF")
-            # initiate measurement
-            self.write(":INIT")
-
-            #
-            self.ask_for_values("SWEEP:TIME?")
-
-            self.write("*WAI")  # SA waits until the averaging is done
-            # Loop to see when the averaging is done
-            while True:
-                try:
-                    self.ask_for_values("SWEEP:TIME?")
-                    break
-                except:
-                    pass
+            # initiate measurement and wait until the averaging is done
+            sweep_time = self.ask_for_values("SWEEP:TIME?")
+            expected = sweep_time[0] if sweep_time else 0.
+            operation = self.start_operation(":INIT",
+                                             operation_timeout(expected),
+                                             expected)
+            if not operation.result(stop=stop):
+                return None
 
             data = self.ask_for_values('trace? trace{}'.format(trace))
 
@@ -136,10 +143,9 @@ class AgilentPSA(VisaInstrument):
 
         elif self.mode == 'SPEC':
             self.get_spec_header()
-            self.write("INIT:IMM;*WAI")  # start the acquisition and wait until
-                                         # over
-            # Check how *OPC? works
-            self.ask("*OPC?")
+            # Start the acquisition and wait until it is over.
+            if not self._acquire(stop):
+                return None
             data = self.ask_for_values("FETCH:SPEC{}?".format(trace))
             if data:
                 if trace in (4, 7, 11, 12):
@@ -169,10 +175,9 @@ class AgilentPSA(VisaInstrument):
                     trace data'''))
         else:
             self.get_spec_header()
-            self.write("INIT:IMM;*WAI")  # start the acquisition and wait until
-                                         # over
-            #Check how *OPC? works
-            self.ask("*OPC?")
+            # Start the acquisition and wait until it is over.
+            if not self._acquire(stop):
+                return None
             data = self.ask_for_values("FETCH:WAV0?")  # this will get the
                                                 # (I,Q) as a function of freq
             if data:
@@ -184,6 +189,19 @@ class AgilentPSA(VisaInstrument):
                 raise InstrIOError(cleandoc('''Agilent PSA did not return the
                     trace data'''))
 
+    def _acquire(self, stop):
+        """ Start an acquisition in SPEC or WAV mode and wait until it is over.
+
+        The expected duration is taken from the spec header.
+
+        """
+        header = self.spec_header
+        expected = header.totaltime*header.averagenbr
+        operation = self.start_operation("INIT:IMM",
+                                         operation_timeout(expected),
+                                         expected)
+        return operation.result(stop=stop)
+
     @instrument_property
     @secure_communication()
     def mode(self):
@@ -16,6 +16,11 @@
 
 from threading import Lock
 from contextlib import contextmanager
+from hashlib import sha1
+import os
+import json
+import logging
+import tempfile
 from ..driver_tools import (BaseInstrument, InstrIOError, secure_communication,
                             instrument_property)
 from ..visa_tools import VisaInstrument, VisaIOError
@@ -26,6 +31,30 @@ import re
 import time
 
 
+#: Registries of the waveforms known to be present in the WLIST of each AWG.
+#: The keys are the connection strings and the values dict holding the size
+#: of the WLIST ('size'), a dict mapping the content hash of a waveform to
+#: its name ('names') and the hashes from the least to the most recently used
+#: ('order').
+WAVEFORM_REGISTRIES = {}
+
+#: Folder in which the registries are saved so that other processes do not
+#: need to scan the WLIST again.
+REGISTRY_FOLDER = tempfile.gettempdir()
+
+#: Number of hexadecimal digits of the content hash appended to the name of
+#: the waveforms sent through AWG.send_waveform.
+HASH_LENGTH = 16
+
+#: Pattern matching the names of the waveforms sent through send_waveform.
+HASHED_NAME = re.compile('_([0-9a-f]{%d})$' % HASH_LENGTH)
+
+#: Maximal number of waveforms sent through send_waveform kept in the WLIST.
+#: Beyond it the least recently used waveforms which are not part of the
+#: current sequence are deleted.
+MAX_HASHED_WAVEFORMS = 1000
+
+
 class AWGChannel(BaseInstrument):
 
     def __init__(self, AWG, channel_num, caching_allowed=True,
@@ -404,6 +433,8 @@ class AWG(VisaInstrument):
                                   caching_permissions, auto_open)
         self.channels = {}
         self.lock = Lock()
+        # Hashes of the waveforms used by the sequence since it was cleared.
+        self._sequence_digests = set()
         
     def reopen_connection(self):
         """Clear buffer on connection reseting.
@@ -448,12 +479,160 @@ class AWG(VisaInstrument):
                                                         numbyte)
         self.write('{}{}'.format(header, waveform))
         self.write('*WAI')
-        
+
+        # Whatever was stored under this name has been overwritten.
+        registry = WAVEFORM_REGISTRIES.get(self.connection_str)
+        if registry is not None:
+            names = registry['names']
+            overwritten = [digest for digest, w_name in names.iteritems()
+                           if w_name == name]
+            for digest in overwritten:
+                del names[digest]
+                registry['order'].remove(digest)
+            if overwritten:
+                self._save_registry(registry)
+
         return initialized
 
+    def send_waveform(self, prefix, waveform):
+        """Send a waveform unless the same waveform is already in the WLIST.
+
+        The waveform is stored under a name built from the prefix and the
+        hash of its content, so that this name always refers to the same
+        data, even across measurements. The waveform is considered as part of
+        the current sequence until clear_sequence is called. To keep the
+        WLIST bounded, the least recently used waveforms which are not part
+        of the current sequence are deleted once MAX_HASHED_WAVEFORMS is
+        reached.
+
+        Parameters
+        ----------
+        prefix : str
+            Prefix of the name under which to store the waveform.
+
+        waveform : bytearray
+            Data of the waveform as returned by the AWGContext.
+
+        Returns
+        -------
+        name : str
+            Name under which the waveform is stored in the WLIST.
+
+        """
+        digest = sha1(waveform).hexdigest()[:HASH_LENGTH]
+        self._sequence_digests.add(digest)
+        registry = self._waveform_registry()
+        if digest in registry['names']:
+            registry['order'].remove(digest)
+            registry['order'].append(digest)
+            return registry['names'][digest]
+
+        self._prune_waveforms(registry, MAX_HASHED_WAVEFORMS - 1)
+        name = '{}_{}'.format(prefix, digest)
+        self.to_send(name, waveform, False)
+        registry['names'][digest] = name
+        registry['order'].append(digest)
+        registry['size'] = int(self.ask('WLISt:SIZE?'))
+        self._save_registry(registry)
+        return name
+
+    def clear_waveform_registry(self):
+        """Forget about the waveforms sent through send_waveform.
+
+        This should be called if the WLIST was modified by other means without
+        changing its size.
+
+        """
+        WAVEFORM_REGISTRIES.pop(self.connection_str, None)
+        try:
+            os.remove(self._registry_path())
+        except OSError:
+            pass
+
+    @secure_communication()
+    def _prune_waveforms(self, registry, max_count):
+        """Delete the least recently used waveforms until at most max_count
+        waveforms sent through send_waveform remain.
+
+        The waveforms used by the current sequence are never deleted.
+
+        """
+        names = registry['names']
+        order = registry['order']
+        for digest in list(order):
+            if len(names) <= max_count:
+                break
+            if digest in self._sequence_digests:
+                continue
+            self.write("WLIST:WAVEFORM:DELETE '{}'".format(names.pop(digest)))
+            order.remove(digest)
+
+    @secure_communication()
+    def _waveform_registry(self):
+        """Access the registry of the waveforms present in the WLIST.
+
+        The registry is considered valid as long as the size of the WLIST is
+        the one recorded in it, which is checked on each access. A reset of
+        the instrument or the deletion of waveforms by other means hence
+        leads to a new scan of the WLIST. A registry saved by another process
+        is reused if it is valid.
+
+        """
+        size = int(self.ask('WLISt:SIZE?'))
+        registry = WAVEFORM_REGISTRIES.get(self.connection_str)
+        if registry is None or registry['size'] != size:
+            registry = self._load_registry()
+        if registry is None or registry['size'] != size:
+            names = {}
+            for i in range(size):
+                name = self.ask('WLISt:NAME? {}'.format(i)).strip('"')
+                match = HASHED_NAME.search(name)
+                if match:
+                    names[match.group(1)] = name
+            registry = {'size': size, 'names': names, 'order': list(names)}
+            self._save_registry(registry)
+
+        WAVEFORM_REGISTRIES[self.connection_str] = registry
+        return registry
+
+    def _registry_path(self):
+        """Path of the file in which the registry of the AWG is saved.
+
+        """
+        key = sha1(self.connection_str).hexdigest()[:HASH_LENGTH]
+        return os.path.join(REGISTRY_FOLDER, 'awg_wlist_{}.json'.format(key))
+
+    def _load_registry(self):
+        """Load the registry saved by another process, if any.
+
+        """
+        try:
+            with open(self._registry_path()) as f:
+                registry = json.load(f)
+            names = dict(registry['names'])
+            order = [d for d in registry.get('order', []) if d in names]
+            order = [d for d in names if d not in order] + order
+            return {'size': int(registry['size']), 'names': names,
+                    'order': order}
+        except (IOError, ValueError, KeyError, TypeError):
+            return None
+
+    def _save_registry(self, registry):
+        """Save the registry for the other processes.
+
+        """
+        try:
+            with open(self._registry_path(), 'w') as f:
+                json.dump(registry, f)
+        except (IOError, OSError):
+            logger = logging.getLogger(__name__)
+            logger.warn('Failed to save the AWG waveform registry',
+                        exc_info=True)
+
     @secure_communication()    
     def clear_sequence(self):
         self.write("SEQuence:LENGth 0")
+        self._sequence_digests.clear()
       
     @secure_communication()
     def set_sequence_pos(self, name, channel, position):
@@ -7,7 +7,10 @@ except Exception:
     from pyvisa.legacy.visa import Instrument, VisaIOError
     from pyvisa.errors import VisaTypeError
 
-from .driver_tools import BaseInstrument, InstrIOError
+import numpy as np
+
+from .driver_tools import (BaseInstrument, InstrIOError, OperationFuture,
+                           secure_communication)
 
 
 class VisaInstrument(BaseInstrument):
@@ -59,6 +62,10 @@ class VisaInstrument(BaseInstrument):
         previously
     check_connection() : virtual
         Check whether or not the cache is likely to have been corrupted
+    start_operation(command) :
+        Send a command and return a future tracking its completion
+    operation_complete() :
+        Check whether the operation started last is over
 
     The following method simply call the PyVisa method of the driver
     write(mess)
@@ -66,6 +73,8 @@ class VisaInstrument(BaseInstrument):
     read_values()
     ask(mess)
     ask_for_values()
+    ask_for_block()
+    ask_for_blocks()
     clear()
     trigger()
     read_raw()
@@ -73,6 +82,10 @@ class VisaInstrument(BaseInstrument):
     """
     secure_com_except = (InstrIOError, VisaIOError)
 
+    #: Whether the operation completion can be detected by reading the status
+    #: byte (serial poll). Set to False if the interface does not support it.
+    stb_polling = True
+
     def __init__(self, connection_info, caching_allowed=True,
                  caching_permissions={}, auto_open=True):
         super(VisaInstrument, self).__init__(connection_info, caching_allowed,
@@ -127,6 +140,55 @@ class VisaInstrument(BaseInstrument):
         """
         return bool(self._driver)
 
+    def start_operation(self, command=None, timeout=None, expected=0.):
+        """Send a command and return a future tracking its completion.
+
+        The event status register is cleared and its operation complete bit
+        reported in the status byte, then the command is sent followed by
+        *OPC. Contrary to *OPC? no request is pending on the bus while the
+        instrument is busy, so the connection can be used meanwhile and the
+        completion of several operations can be awaited concurrently (see
+        `wait_operations`).
+
+        Parameters
+        ----------
+        command : str, optionnal
+            Command starting the operation. If None, the future tracks the
+            operations already started.
+        timeout : float, optionnal
+            Time in s after which the operation is considered as failed.
+        expected : float, optionnal
+            Expected duration of the operation in s.
+
+        Returns
+        -------
+        future : OperationFuture
+            Future whose result method blocks until the operation is over.
+
+        """
+        self.ask('*ESR?')
+        self.write('*ESE 1')
+        if command:
+            self.write(command)
+        self.write('*OPC')
+        return OperationFuture(self.operation_complete, timeout, expected)
+
+    @secure_communication()
+    def operation_complete(self):
+        """Check whether the operation started by `start_operation` is over.
+
+        The status byte is read by serial poll (the event status summary bit
+        is set once the operation is over), if the interface does not support
+        it the event status register is queried.
+
+        """
+        if self.stb_polling:
+            try:
+                return bool(self._driver.stb & 32)
+            except (AttributeError, VisaIOError, VisaTypeError):
+                self.stb_polling = False
+        return bool(int(self.ask('*ESR?')) & 1)
+
     def write(self, message):
         """Send the specified message to the instrument.
 
@@ -168,6 +230,78 @@ class VisaInstrument(BaseInstrument):
         """
         return self._driver.ask_for_values(message, format)
 
+    def ask_for_block(self, message, dtype):
+        """Send the specified message to the instrument and decode its answer,
+        an IEEE 488.2 binary block, into an array.
+
+        The received bytes are directly interpreted as an array, without
+        building any intermediate list.
+
+        Parameters
+        ----------
+        message : str
+            Query to send to the instrument.
+        dtype : numpy.dtype or str
+            Type (including the byte order) of the values in the block.
+
+        Returns
+        -------
+        data : numpy.ndarray
+            Array of the values of the block.
+
+        """
+        return self.ask_for_blocks(message, dtype, 1)[0]
+
+    def ask_for_blocks(self, message, dtype, count):
+        """Send the specified message to the instrument and decode its answer,
+        made of several IEEE 488.2 binary blocks (compound query), into arrays.
+
+        Parameters
+        ----------
+        message : str
+            Query to send to the instrument.
+        dtype : numpy.dtype or str
+            Type (including the byte order) of the values in the blocks.
+        count : int
+            Number of blocks in the answer.
+
+        Returns
+        -------
+        data : list(numpy.ndarray)
+            Arrays of the values of each block.
+
+        """
+        self._driver.write(message)
+        raw = self._driver.read_raw()
+        blocks = []
+        pos = 0
+        for i in range(count):
+            start = raw.find('#', pos)
+            if start < 0 or len(raw) < start + 2:
+                mes = 'Invalid binary block : {!r}'.format(raw[pos:pos+20])
+                raise InstrIOError(mes)
+
+            digits = int(raw[start + 1])
+            if digits == 0:
+                # Indefinite length block terminated by the end of the message.
+                if i != count - 1:
+                    raise InstrIOError('Indefinite length block not last')
+                end = -1 if raw.endswith('\n') else len(raw)
+                data = raw[start + 2:end]
+            else:
+                header = start + 2 + digits
+                length = int(raw[start + 2:header])
+                while len(raw) < header + length:
+                    raw += self._driver.read_raw()
+                data = raw[header:header + length]
+                pos = header + length
+
+            # Decode from a bytearray so that the arrays are writeable like
+            # the ones built from ASCII answers.
+            blocks.append(np.frombuffer(bytearray(data), dtype))
+
+        return blocks
+
     def clear(self):
         """Resets the device (highly bus dependent).
 
@@ -51,7 +51,9 @@ class BaseEngine(Atom):
 
         monitored_entries : iterable
             The database entries to observe. Any change of one of these entries
-            will be notified by the news event.
+            will be notified by the news event. If a dict is given, its values
+            are reducers (or None) to apply to the values of the entries before
+            notifying them.
 
         build_deps : dict
             Dict holding the build dependencies of the task.
@@ -60,6 +62,50 @@ class BaseEngine(Atom):
         mes = cleandoc('''''')
         raise NotImplementedError(mes)
 
+    def prepare_next(self, name, root, monitored_entries, build_deps,
+                     profiles=()):
+        """ Let the engine get ready for the measure following the current one.
+
+        This method is called once the current measure is running. Engines
+        are free to ignore it, and prepare_to_run will be called as usual
+        before the next measure is run.
+
+        Parameters
+        ----------
+        name : str
+            Name of the measure.
+
+        root : RootTask
+            The root task representing the measure to perform.
+
+        monitored_entries : iterable
+            The database entries to observe.
+
+        build_deps : dict
+            Dict holding the build dependencies of the task.
+
+        profiles : iterable, optional
+            Names of the instrument profiles used by the measure.
+
+        """
+        pass
+
+    def release_instruments(self, profiles):
+        """ Close the connections to some instrument profiles.
+
+        This method is called once the profiles used by a measure have been
+        released and are not granted to the next measure. Engines keeping the
+        connections to the instruments open between measures must close the
+        ones to these profiles, the others can ignore it.
+
+        Parameters
+        ----------
+        profiles : list
+            Names of the released profiles.
+
+        """
+        pass
+
     def run(self):
         """ Start the execution of the measure by the engine.
 
@@ -4,7 +4,7 @@
 # author : Matthieu Dartiailh
 # license : MIT license
 # =============================================================================
-from atom.api import Typed, Value, Tuple, Bool
+from atom.api import Typed, Value, Tuple, Bool, List, Str
 from enaml.workbench.api import Workbench
 from enaml.application import deferred_call
 from multiprocessing import Pipe
@@ -13,11 +13,13 @@ from multiprocessing.synchronize import Event
 from threading import Thread
 from threading import Event as tEvent
 import logging
+import shutil
 
 from hqc_meas.utils.log.tools import QueueLoggerThread
+from hqc_meas.tasks.manager.building import build_config_snapshot
 
 from ..base_engine import BaseEngine
-from ..tools import ThreadMeasureMonitor
+from ..tools import ThreadMeasureMonitor, make_shared_dir
 from .subprocess import TaskProcess
 
 
@@ -31,17 +33,50 @@ class ProcessEngine(BaseEngine):
     #: Reference to the workbench got at __init__
     workbench = Typed(Workbench)
 
+    #: Whether to start a second process ready to take over, in which the
+    #: next measure is rebuilt while the current one runs. This is only done
+    #: when the next measure does not use the instruments to which the
+    #: current process keeps connections open.
+    use_standby = Bool(True)
+
     def prepare_to_run(self, name, root, monitored_entries, build_deps):
 
         runtime_deps = root.run_time
 
-        # Get ConfigObj describing measure.
-        root.update_preferences_from_members()
-        config = root.task_preferences
+        # Get a compact description of the measure which can be quickly
+        # pickled and rebuilt in the subprocess.
+        config = build_config_snapshot(root)
+
+        # Modules to import in the processes started from now on.
+        self._preload = sorted(_collect_modules(build_deps) |
+                               _collect_modules(runtime_deps))
+
+        # If the standby process already built this measure, it takes over
+        # and the current process becomes the standby, closing its
+        # connections to the instruments. A process keeping a connection
+        # open to one of the profiles of the measure is not swapped so that
+        # two processes never connect to the same instrument.
+        profiles = set(runtime_deps.get('profiles', ()))
+        if (self._standby_ready_for(name, config) and
+                not profiles & self._pooled_profiles):
+            self._process, self._standby = self._standby, self._process
+            self._pipe, self._standby_pipe = self._standby_pipe, self._pipe
+            self._standby_ready = True
+            self._standby_pipe.send(('RELEASE', None))
+            config = None
+        self._prepared = ('', None)
+        self._pooled_profiles = profiles
+
+        # The directory in which the large monitored arrays are written is
+        # owned by the engine so that it does not outlive the measure even if
+        # the process dies before closing its spy.
+        self._remove_shared_dir()
+        if monitored_entries:
+            self._shared_dir = make_shared_dir()
 
         # Make infos tuple to send to the subprocess.
         self._temp = (name, config, build_deps, runtime_deps,
-                      monitored_entries)
+                      monitored_entries, self._shared_dir)
 
         # Clear all the flags.
         self._meas_pause.clear()
@@ -53,6 +88,7 @@ class ProcessEngine(BaseEngine):
 
         # If the process does not exist or is dead create a new one.
         if not self._process or not self._process.is_alive():
+            self._stop_standby()
             self._pipe, process_pipe = Pipe()
             self._process = TaskProcess(process_pipe,
                                         self._log_queue,
@@ -60,7 +96,8 @@ class ProcessEngine(BaseEngine):
                                         self._meas_pause,
                                         self._meas_paused,
                                         self._meas_stop,
-                                        self._stop)
+                                        self._stop,
+                                        self._preload)
             self._process.daemon = True
 
             self._log_thread = QueueLoggerThread(self._log_queue)
@@ -93,6 +130,49 @@ class ProcessEngine(BaseEngine):
 
         self.measure_status = ('RUNNING', 'Measure running.')
 
+    def release_instruments(self, profiles):
+        """ Close the connections kept open by the process to some profiles.
+
+        The standby process never keeps any connection open.
+
+        """
+        self._pooled_profiles -= set(profiles)
+        if self._process and self._process.is_alive():
+            self._pipe.send(('RELEASE', list(profiles)))
+
+    def prepare_next(self, name, root, monitored_entries, build_deps,
+                     profiles=()):
+        """ Rebuild the next measure in the standby process.
+
+        The standby process is started only if the next measure does not use
+        any of the profiles to which the current process keeps connections
+        open, as it could not take over in this case. An idle standby process
+        is then stopped.
+
+        """
+        if not self.use_standby or set(profiles) & self._pooled_profiles:
+            self._stop_standby()
+            return
+
+        # Warm up a standby process while the measure runs.
+        if not self._standby or not self._standby.is_alive():
+            self._standby_pipe, process_pipe = Pipe()
+            self._standby = TaskProcess(process_pipe,
+                                        self._log_queue,
+                                        self._monitor_queue,
+                                        self._meas_pause,
+                                        self._meas_paused,
+                                        self._meas_stop,
+                                        self._stop,
+                                        self._preload)
+            self._standby.daemon = True
+            self._standby.start()
+            self._standby_ready = False
+
+        config = build_config_snapshot(root)
+        self._standby_pipe.send(('PREPARE', name, config, build_deps))
+        self._prepared = (name, config)
+
     def pause(self):
         self.measure_status = ('PAUSING', 'Waiting for measure to pause.')
         self._meas_pause.set()
@@ -127,9 +207,11 @@ class ProcessEngine(BaseEngine):
 
         # Terminate the process and make sure all threads stopped properly.
         self._process.terminate()
+        self._stop_standby()
         self._log_thread.join()
         self._monitor_thread.join()
         self._com_thread.join()
+        self._remove_shared_dir()
         self.active = False
         if self._processing.is_set():
             self.done = ('INTERRUPTED', 'The user forced the system to stop')
@@ -176,6 +258,28 @@ class ProcessEngine(BaseEngine):
     #: Current subprocess.
     _process = Typed(TaskProcess)
 
+    #: Subprocess kept ready to perform the next measure.
+    _standby = Typed(TaskProcess)
+
+    #: Connection used to communicate with the standby process.
+    _standby_pipe = Value()
+
+    #: Whether the 'READY' message of the standby process has been received.
+    _standby_ready = Bool()
+
+    #: Profiles to which the current process may keep connections open.
+    _pooled_profiles = Typed(set, ())
+
+    #: Name and config of the measure sent to the standby process.
+    _prepared = Tuple(default=('', None))
+
+    #: Directory in which the spy of the current measure writes the large
+    #: arrays.
+    _shared_dir = Str()
+
+    #: Modules the subprocesses should import when starting.
+    _preload = List(Str())
+
     #: Connection used to send and receive messages about execution (type
     #: ambiguous when the OS is not known)
     _pipe = Value()
@@ -215,8 +319,6 @@ class ProcessEngine(BaseEngine):
             if not self._process.is_alive():
                 logger.critical('Subprocess was found dead unexpectedly')
                 self._stop.set()
-                self._log_queue.put(None)
-                self._monitor_queue.put((None, None))
                 self._cleanup(process=False)
                 self.done = ('FAILED', 'Subprocess failed to start')
                 return
@@ -290,6 +392,13 @@ class ProcessEngine(BaseEngine):
         if process:
             self._process.join()
             logger.debug('Subprocess joined')
+        self._stop_standby(timeout=5)
+
+        # Signal the threads that no more messages will come.
+        if self._log_thread.is_alive():
+            self._log_queue.put(None)
+        if self._monitor_thread.is_alive():
+            self._monitor_queue.put((None, None))
         self._log_thread.join()
         logger.debug('Log thread joined')
         self._monitor_thread.join()
@@ -297,6 +406,7 @@ class ProcessEngine(BaseEngine):
         if self._pause_thread:
             self._pause_thread.join()
             logger.debug('Pause thread joined')
+        self._remove_shared_dir()
         self.active = False
 
     def _wait_for_pause(self):
@@ -311,3 +421,75 @@ class ProcessEngine(BaseEngine):
                 status = ('PAUSED', 'Measure execution is paused')
                 deferred_call(setattr, self, 'measure_status', status)
                 break
+
+    def _standby_ready_for(self, name, config):
+        """ Check whether the standby process can perform a measure.
+
+        The standby process must have rebuilt the same measure and be done
+        starting. The current process must be idle.
+
+        This is called from the main thread so the pipe is polled without
+        blocking : if the standby process is not done starting the measure
+        is simply performed by the current process.
+
+        """
+        prepared_name, prepared_config = self._prepared
+        if (prepared_name != name or prepared_config != config or
+                not self._process or not self._process.is_alive() or
+                not self._standby or not self._standby.is_alive()):
+            return False
+
+        if not self._standby_ready:
+            if not self._standby_pipe.poll():
+                return False
+            if self._standby_pipe.recv() != 'READY':
+                return False
+            self._standby_ready = True
+
+        return True
+
+    def _remove_shared_dir(self):
+        """ Remove the directory used by the spy of the last measure.
+
+        The monitor thread normally removes it when the spy is closed, this
+        takes care of the measures whose process was terminated or crashed.
+
+        """
+        shared_dir, self._shared_dir = self._shared_dir, ''
+        if shared_dir:
+            shutil.rmtree(shared_dir, ignore_errors=True)
+
+    def _stop_standby(self, timeout=None):
+        """ Stop the standby process.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Time to wait for the process to notice the stop event before
+            terminating it. By default the process is terminated right away.
+
+        """
+        standby, self._standby = self._standby, None
+        pipe, self._standby_pipe = self._standby_pipe, None
+        if standby:
+            if timeout is not None:
+                standby.join(timeout)
+            if standby.is_alive():
+                standby.terminate()
+            standby.join()
+            pipe.close()
+        self._prepared = ('', None)
+
+
+def _collect_modules(dependencies):
+    """ Collect the modules in which the classes of the dependencies live.
+
+    """
+    modules = set()
+    for value in dependencies.itervalues():
+        if isinstance(value, dict):
+            modules |= _collect_modules(value)
+        elif isinstance(value, type):
+            modules.add(value.__module__)
+
+    return modules
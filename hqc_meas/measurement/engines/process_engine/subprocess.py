@@ -9,12 +9,14 @@ import logging
 import logging.config
 import warnings
 import sys
+from importlib import import_module
 # TODO write my own rotating file handler to work under windows
 from logging.handlers import RotatingFileHandler
 from multiprocessing import Process
 
 from hqc_meas.utils.log.tools import (StreamToLogRedirector)
 from hqc_meas.tasks.manager.building import build_task_from_config
+from hqc_meas.tasks.tools.instr_pool import InstrumentPool
 from ..tools import MeasureSpy
 
 
@@ -24,13 +26,24 @@ class TaskProcess(Process):
     When started this process sets up a logger redirecting all records to a
     queue. It then redirects stdout and stderr to the logging system. Then as
     long as it is not stopped it waits for the main process to send a
-    measures through the pipe. Upon reception of the `ConfigObj` object
-    describing the measure it rebuilds it, set up a logger for that specific
-    measure and if necessary starts a spy transmitting the value of all
-    monitored entries to the main process. It finally run the checks of the
-    measure and run it. It can be interrupted by setting an event and upon
-    exit close the communication pipe and signal all listeners that it is
-    closing.
+    measures through the pipe. Upon reception of the snapshot of the config
+    describing the measure (see `build_config_snapshot`) it rebuilds it, set
+    up a logger for that specific measure and if necessary starts a spy
+    transmitting the value of all monitored entries to the main process. It
+    finally run the checks of the measure and run it. It can be interrupted
+    by setting an event and upon exit close the communication pipe and signal
+    all listeners that it is closing.
+
+    A measure can also be sent ahead of time with a 'PREPARE' message, in
+    which case it is rebuilt immediately and kept until the main process asks
+    for it to be performed (by sending None instead of the config). This
+    allows to use a second process to get the next measure ready while the
+    current one is running.
+
+    The connections to the instruments are kept open between measures. The
+    main process sends a 'RELEASE' message with the profiles (or None for all
+    of them) whose connections should be closed because they are not granted
+    to the next measure.
 
     Parameters
     ----------
@@ -51,11 +64,16 @@ class TaskProcess(Process):
         Event set when the user asked the running measurement to stop.
     process_stop : multiprocessing event
         Event set when the user asked the process to stop.
+    preload : iterable, optional
+        Names of the modules to import when the process starts so that they
+        are ready when the first measure is received.
 
     Attributes
     ----------
     meas_log_handler : log handler
         Log handler used to save the running measurement specific records.
+    prepared : tuple
+        Name and root task of the measure sent ahead of time.
     see `Parameters`
 
     Methods
@@ -66,7 +84,7 @@ class TaskProcess(Process):
     """
 
     def __init__(self, pipe, log_queue, monitor_queue, task_pause, task_paused,
-                 task_stop, process_stop):
+                 task_stop, process_stop, preload=()):
         super(TaskProcess, self).__init__(name='MeasureProcess')
         self.daemon = True
         self.task_pause = task_pause
@@ -77,6 +95,8 @@ class TaskProcess(Process):
         self.log_queue = log_queue
         self.monitor_queue = monitor_queue
         self.meas_log_handler = None
+        self.preload = tuple(preload)
+        self.prepared = None
 
     def run(self):
         """Method called when the new process starts.
@@ -97,8 +117,19 @@ class TaskProcess(Process):
         sys.stderr = redir_stderr
         logger.info('Logger parametrised')
 
+        # Import the modules which will be needed to rebuild the measures.
+        for module in self.preload:
+            try:
+                import_module(module)
+            except Exception:
+                logger.debug('Failed to preload {}'.format(module))
+
+        # Connections to the instruments kept open between measures.
+        pool = InstrumentPool()
+
         logger.info('Process running')
         self.pipe.send('READY')
+        spy = None
         while not self.process_stop.is_set():
 
             # Prevent us from crash if the pipe is closed at the wrong moment.
@@ -108,18 +139,51 @@ class TaskProcess(Process):
                 while not self.pipe.poll(2):
                     if self.process_stop.is_set():
                         break
+                    pool.evict_idle()
 
                 if self.process_stop.is_set():
                     break
 
                 # Get the measure.
-                name, config, build, runtime, mon_entries = self.pipe.recv()
-
-                # Build it by using the given build dependencies.
-                root = build_task_from_config(config, build, True)
+                message = self.pipe.recv()
+
+                # Rebuild a measure sent ahead of time and wait for the main
+                # process to ask for it to be performed.
+                if message[0] == 'PREPARE':
+                    _, name, config, build = message
+                    root = build_task_from_config(config, build, True)
+                    self.prepared = (name, root)
+                    logger.info('Measure {} prepared'.format(name))
+                    continue
+
+                # Close the connections to the instruments which are not
+                # granted to the measures anymore.
+                if message[0] == 'RELEASE':
+                    if message[1] is None:
+                        pool.close_all()
+                    else:
+                        pool.discard(message[1])
+                    continue
+
+                name, config, build, runtime, mon_entries, shared = message
+
+                # Use the prepared measure if asked to, otherwise build it by
+                # using the given build dependencies.
+                if config is None:
+                    prepared_name, root = self.prepared
+                    if prepared_name != name:
+                        raise ValueError('Measure {} was not prepared, '
+                                         'got {}'.format(name, prepared_name))
+                else:
+                    root = build_task_from_config(config, build, True)
+                self.prepared = None
 
-                # Give all runtime dependencies to the root task.
+                # Give all runtime dependencies to the root task. Only the
+                # connections to the profiles granted to this measure can be
+                # reused.
                 root.run_time = runtime
+                pool.retain(runtime.get('profiles', {}))
+                root.instr_pool = pool
 
                 logger.info('Task built')
 
@@ -128,7 +192,7 @@ class TaskProcess(Process):
                 if mon_entries:
                     spy = MeasureSpy(
                         self.monitor_queue, mon_entries,
-                        root.task_database)
+                        root.task_database, shared)
 
                 # Set up the logger for this specific measurement.
                 if self.meas_log_handler is not None:
@@ -190,11 +254,6 @@ class TaskProcess(Process):
                                         for path, mes in fails)
                     logger.critical(message)
 
-                # If a spy was started kill it
-                if mon_entries:
-                    spy.close()
-                    del spy
-
             except IOError:
                 pass
 
@@ -202,12 +261,22 @@ class TaskProcess(Process):
                 logger.exception('Error occured during processing')
                 break
 
+            # If a spy was started kill it, even if the measure failed.
+            finally:
+                if spy:
+                    spy.close()
+                    spy = None
+
         # Clean up before closing.
         logger.info('Process shuting down')
+        pool.close_all()
         if self.meas_log_handler:
             self.meas_log_handler.close()
-        self.log_queue.put_nowait(None)
-        self.monitor_queue.put_nowait((None, None))
+        # Send the records still waiting in the queue handler.
+        for handler in logger.handlers:
+            handler.flush()
+        # The engine is in charge of stopping the threads reading the queues
+        # as several processes may share them.
         self.pipe.close()
 
     def _config_log(self):
@@ -223,6 +292,7 @@ class TaskProcess(Process):
                 'queue': {
                     'class': 'hqc_meas.utils.log.tools.QueueHandler',
                     'queue': self.log_queue,
+                    'capacity': 100,
                 },
             },
             'root': {
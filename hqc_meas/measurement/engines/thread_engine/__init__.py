@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+#==============================================================================
+# module : __init__.py
+# author : Matthieu Dartiailh
+# license : MIT license
+#==============================================================================
+
+import enaml
+with enaml.imports():
+    from .thread_engine_manifest import ThreadEngineManifest
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# module : thread_engine/engine.py
+# author : Matthieu Dartiailh
+# license : MIT license
+# =============================================================================
+from atom.api import Typed, Value, Bool, Int, Coerced, Dict
+from enaml.workbench.api import Workbench
+from enaml.application import deferred_call
+from multiprocessing import Event
+from threading import Thread, current_thread
+from copy import deepcopy
+import logging
+import os
+
+from hqc_meas.tasks.api import RootTask
+from hqc_meas.tasks.manager.building import (build_task_from_config,
+                                             build_config_snapshot)
+
+from ..base_engine import BaseEngine
+from ..tools import reduce_value
+
+
+class ThreadEngine(BaseEngine):
+    """ An engine executing the measurement in a thread of the main process.
+
+    The measure is rebuilt so that the enqueued measure is left untouched,
+    but no process boundary has to be crossed : the monitors are notified
+    directly when the database is modified. This makes this engine well
+    suited for short measurements.
+
+    """
+
+    # --- Public API ----------------------------------------------------------
+
+    #: Reference to the workbench got at __init__
+    workbench = Typed(Workbench)
+
+    def prepare_to_run(self, name, root, monitored_entries, build_deps):
+
+        # Rebuild the measure so that it can run independently from the
+        # measure object. The snapshot shares the mutable values of the tasks.
+        config = deepcopy(build_config_snapshot(root))
+        self._root = build_task_from_config(config, build_deps, True)
+        self._root.run_time = root.run_time
+        self._name = name
+        self._monitored_entries = monitored_entries
+        if isinstance(monitored_entries, dict):
+            self._reducers = {e: r for e, r in monitored_entries.iteritems()
+                              if r is not None}
+        else:
+            self._reducers = {}
+
+        # Clear all the flags.
+        self._meas_pause.clear()
+        self._meas_paused.clear()
+        self._meas_stop.clear()
+        self._stop_requested = False
+
+        self.measure_status = ('PREPARED', 'Engine ready to process.')
+
+    def run(self):
+        self._run_id += 1
+        self._thread = Thread(target=self._perform_measure,
+                              args=(self._root, self._run_id),
+                              name='MeasureThread-{}'.format(self._run_id))
+        self._thread.daemon = True
+        self.active = True
+        self._thread.start()
+
+        self.measure_status = ('RUNNING', 'Measure running.')
+
+    def pause(self):
+        self.measure_status = ('PAUSING', 'Waiting for measure to pause.')
+        self._meas_pause.set()
+
+        self._pause_thread = Thread(target=self._wait_for_pause,
+                                    args=(self._run_id,))
+        self._pause_thread.daemon = True
+        self._pause_thread.start()
+
+    def resume(self):
+        self._meas_pause.clear()
+        self.measure_status = ('RUNNING', 'Measure have been resumed.')
+
+    def stop(self):
+        self._stop_requested = True
+        self._meas_stop.set()
+
+    def exit(self):
+        # The engine holds no resources between two measures.
+        self.stop()
+
+    def force_stop(self):
+        """ Stop the measure without waiting for the thread to exit.
+
+        A thread cannot be killed, it is simply asked to stop and ignored from
+        now on. The connections to the instruments it uses are closed so that
+        it cannot keep driving them once their profiles are released.
+
+        """
+        self._stop_requested = True
+        self._meas_stop.set()
+        self._meas_pause.clear()
+
+        if self.active:
+            instrs = self._root.instrs
+            for profile in list(instrs):
+                try:
+                    instrs[profile].close_connection()
+                except Exception:
+                    logger = logging.getLogger(__name__)
+                    mes = 'Failed to close connection to instr:'
+                    logger.exception(mes)
+
+            self._run_id += 1
+            self._meas_pause = Event()
+            self._meas_paused = Event()
+            self._meas_stop = Event()
+            self.active = False
+            self.done = ('INTERRUPTED', 'The user forced the system to stop')
+
+    def force_exit(self):
+        self.force_stop()
+
+    # --- Private API ---------------------------------------------------------
+
+    #: Flag indicating that the user requested the measure to stop.
+    _stop_requested = Bool()
+
+    #: Event used to pause the current measure.
+    _meas_pause = Value(factory=Event)
+
+    #: Event signaling the current measure is paused.
+    _meas_paused = Value(factory=Event)
+
+    #: Event used to stop the current measure.
+    _meas_stop = Value(factory=Event)
+
+    #: Name of the measure to run.
+    _name = Value()
+
+    #: Root task of the measure to run.
+    _root = Typed(RootTask)
+
+    #: Database entries whose changes should be notified through news.
+    _monitored_entries = Coerced(set)
+
+    #: Reducers to apply to the values of some monitored entries.
+    _reducers = Dict()
+
+    #: Counter identifying the measure being run. Used to ignore a thread
+    #: whose measure has been forcibly stopped.
+    _run_id = Int()
+
+    #: Thread performing the measure.
+    _thread = Typed(Thread)
+
+    #: Thread in charge to notify the engine that the measure did pause after
+    #: being asked to do so.
+    _pause_thread = Typed(Thread)
+
+    def _perform_measure(self, root, run_id):
+        """ Check and perform the measure.
+
+        Executed by the _thread.
+
+        """
+        logger = logging.getLogger(__name__)
+        name = self._name
+        entries = self._monitored_entries
+        reducers = self._reducers
+        database = root.task_database
+
+        def notify(change):
+            news = change['value']
+            if news[0] in entries:
+                if news[0] in reducers:
+                    news = (news[0], reduce_value(reducers[news[0]], news[1]))
+                self.news(news)
+
+        handler = None
+        try:
+            # Log the records emitted during the measure in a file.
+            log_path = os.path.join(root.default_path, name + '.log')
+            handler = logging.FileHandler(log_path, mode='w')
+            aux = '%(asctime)s | %(levelname)s | %(message)s'
+            handler.setFormatter(logging.Formatter(aux))
+            handler.addFilter(_ThreadFilter())
+            logging.getLogger().addHandler(handler)
+
+            root.should_pause = self._meas_pause
+            root.paused = self._meas_paused
+            root.should_stop = self._meas_stop
+            database.prepare_for_running()
+            if entries:
+                database.observe('notifier', notify)
+
+            check, errors = root.check(test_instr=True)
+            if check:
+                logger.info('Check successful')
+                root.perform_(root)
+                if root.should_stop.is_set():
+                    if self._stop_requested:
+                        result = ('INTERRUPTED',
+                                  'Measure {} was stopped'.format(name))
+                    else:
+                        result = ('FAILED', 'Measure {} failed'.format(name))
+                else:
+                    result = ('COMPLETED',
+                              'Measure {} succeeded'.format(name))
+
+            else:
+                message = '\n'.join('{} : {}'.format(path, mes)
+                                    for path, mes in errors.iteritems())
+                logger.critical(message)
+                result = ('FAILED', 'Tests failed, see log for full records.')
+
+        except Exception:
+            logger.exception('Error occured during processing')
+            result = ('FAILED', 'Measure {} crashed'.format(name))
+
+        finally:
+            if entries:
+                database.unobserve('notifier', notify)
+            if handler:
+                logging.getLogger().removeHandler(handler)
+                handler.close()
+
+        # The measure may have been forcibly stopped in the meantime.
+        if run_id == self._run_id:
+            deferred_call(self._measure_done, run_id, result)
+
+    def _measure_done(self, run_id, result):
+        """ Signal that the measure is done from the main thread.
+
+        """
+        if run_id == self._run_id:
+            self.active = False
+            self.done = result
+
+    def _wait_for_pause(self, run_id):
+        """ Wait for the task paused event to be set.
+
+        """
+        paused_sig = self._meas_paused
+        while self.active and run_id == self._run_id:
+            if paused_sig.wait(0.1):
+                status = ('PAUSED', 'Measure execution is paused')
+                deferred_call(setattr, self, 'measure_status', status)
+                break
+
+
+class _ThreadFilter(object):
+    """ Filter keeping only the records emitted by the thread creating it or
+    by the threads it started to run tasks in parallel.
+
+    """
+    def __init__(self):
+        self.name = current_thread().name
+        self.prefix = self.name + ':'
+
+    def filter(self, record):
+        name = record.threadName
+        return name == self.name or name.startswith(self.prefix)
@@ -5,38 +5,207 @@
 # license : MIT license
 #==============================================================================
 import logging
+import os
+import shutil
+import tempfile
+from collections import namedtuple
 from threading import Thread
 from Queue import Empty
 from multiprocessing.queues import Queue
-from atom.api import Atom, Coerced, Typed
+import numpy as np
+from atom.api import Atom, Coerced, Typed, Str, Dict, Int
 from hqc_meas.tasks.tools.task_database import TaskDatabase
 
 
+#: Size in bytes above which arrays are not pickled but written in memory
+#: mapped files, only a SharedArray describing them being sent.
+SHARED_ARRAY_THRESHOLD = 2**16
+
+#: Number of files used in turn for each entry. A value can be read as long
+#: as this number of new values has not been sent for the same entry.
+SHARED_ARRAY_SLOTS = 4
+
+#: Size in bytes of the header of the memory mapped files, holding the
+#: generation of the value written in the file.
+SHARED_ARRAY_HEADER = 8
+
+#: Description of an array written in a memory mapped file. The generation
+#: identifies the value, it is written in the header of the file and set to
+#: its opposite while the file is being written.
+SharedArray = namedtuple('SharedArray', ['path', 'dtype', 'shape',
+                                         'generation'])
+
+
+def make_shared_dir():
+    """ Create a directory in which a spy can write the large arrays.
+
+    The directory is created in /dev/shm if it exists. The caller is in
+    charge of removing it.
+
+    """
+    shm = '/dev/shm'
+    return tempfile.mkdtemp(prefix='hqc_meas_',
+                            dir=shm if os.path.isdir(shm) else None)
+
+
+def load_shared_array(shared):
+    """ Get a copy of an array written in a memory mapped file.
+
+    The generation written in the file is checked before and after copying
+    the array so that a value overwritten by a newer one (because the reader
+    lags behind) is never returned.
+
+    Parameters
+    ----------
+    shared : SharedArray
+        Description of the array.
+
+    Returns
+    -------
+    array : np.ndarray or None
+        Copy of the array or None if the file does not exist anymore or
+        if the value was overwritten.
+
+    """
+    logger = logging.getLogger(__name__)
+    dtype = np.dtype(shared.dtype)
+    nbytes = dtype.itemsize*int(np.prod(shared.shape))
+    try:
+        mapped = np.memmap(shared.path, dtype=np.uint8, mode='r')
+    except (IOError, OSError, ValueError):
+        logger.debug('Failed to access shared array {}'.format(shared.path))
+        return None
+
+    try:
+        if mapped.size != SHARED_ARRAY_HEADER + nbytes:
+            return None
+        header = mapped[:SHARED_ARRAY_HEADER].view(np.int64)
+        if header[0] != shared.generation:
+            return None
+        data = mapped[SHARED_ARRAY_HEADER:].view(dtype)
+        array = np.array(data.reshape(shared.shape))
+        if header[0] != shared.generation:
+            return None
+    finally:
+        del mapped
+
+    return array
+
+
+def reduce_value(reducer, value):
+    """ Apply a reducer to the value of an entry before notifying it.
+
+    If the reducer fails the error is logged and the value returned
+    unchanged.
+
+    """
+    try:
+        return reducer(value)
+    except Exception:
+        logger = logging.getLogger(__name__)
+        logger.exception('Failed to reduce value using {}'.format(reducer))
+        return value
+
+
 class MeasureSpy(Atom):
     """ Spy observing a task database and sending values update into a queue.
 
+    Large arrays are written in memory mapped files (in /dev/shm if it
+    exists) and only their description is sent. If observed_entries is a dict
+    its values are the reducers (or None) applied to the values before they
+    are sent. The directory holding the files can be provided by the owner of
+    the spy so that it can be removed even if the spy is never closed.
+
     """
     observed_entries = Coerced(set)
+
+    #: Reducers to apply to the values of some observed entries.
+    reducers = Dict()
     observed_database = Typed(TaskDatabase)
     queue = Typed(Queue)
 
-    def __init__(self, queue, observed_entries, observed_database):
+    #: Directory in which the large arrays are written, created on first use
+    #: if none is provided.
+    shared_dir = Str()
+
+    def __init__(self, queue, observed_entries, observed_database,
+                 shared_dir=''):
         super(MeasureSpy, self).__init__()
         self.queue = queue
+        self.shared_dir = shared_dir
         self.observed_entries = set(observed_entries)
+        if isinstance(observed_entries, dict):
+            self.reducers = {e: r for e, r in observed_entries.iteritems()
+                             if r is not None}
         self.observed_database = observed_database
         self.observed_database.observe('notifier', self.enqueue_update)
 
     def enqueue_update(self, change):
         new = change['value']
         if new[0] in self.observed_entries:
+            value = new[1]
+            if new[0] in self.reducers:
+                value = reduce_value(self.reducers[new[0]], value)
+                new = (new[0], value)
+            if (isinstance(value, np.ndarray) and not value.dtype.hasobject
+                    and value.nbytes >= SHARED_ARRAY_THRESHOLD):
+                new = (new[0], self._share_array(new[0], value))
             self.queue.put_nowait(new)
 
     def close(self):
         # Simply signal the queue the working thread that the spy won't send
         # any more informations. But don't request the thread to exit this
-        # is the responsability of the engine.
-        self.queue.put(('', ''))
+        # is the responsability of the engine. The thread takes care of
+        # removing the shared files once it has processed all the updates.
+        self.queue.put(('', self.shared_dir))
+
+    # --- Private API ---------------------------------------------------------
+
+    #: Index identifying each entry in the name of the shared files and next
+    #: slot to use for this entry.
+    _slots = Dict()
+
+    #: Generation of the last array written in a shared file.
+    _generation = Int()
+
+    def _share_array(self, entry, array):
+        """ Write an array in the next memory mapped file of an entry.
+
+        """
+        if not self.shared_dir:
+            self.shared_dir = make_shared_dir()
+
+        index, slot = self._slots.get(entry, (len(self._slots), 0))
+        self._slots[entry] = (index, (slot + 1) % SHARED_ARRAY_SLOTS)
+        path = os.path.join(self.shared_dir, '{}_{}.dat'.format(index, slot))
+
+        # The files are reused as long as the size of the array does not
+        # change.
+        mode = 'w+'
+        if os.path.isfile(path):
+            if os.path.getsize(path) == SHARED_ARRAY_HEADER + array.nbytes:
+                mode = 'r+'
+            else:
+                try:
+                    os.remove(path)
+                except OSError:
+                    # On Windows a file mapped by the reader cannot be
+                    # removed, use another one for this value.
+                    path = os.path.join(self.shared_dir, '{}_{}_{}.dat'.format(
+                        index, slot, self._generation + 1))
+
+        self._generation += 1
+        generation = self._generation
+        mapped = np.memmap(path, dtype=np.uint8, mode=mode,
+                           shape=(SHARED_ARRAY_HEADER + array.nbytes,))
+        header = mapped[:SHARED_ARRAY_HEADER].view(np.int64)
+        header[0] = -generation
+        data = mapped[SHARED_ARRAY_HEADER:].view(array.dtype)
+        data[...] = array.ravel()
+        header[0] = generation
+        del header, data, mapped
+
+        return SharedArray(path, array.dtype, array.shape, generation)
 
 
 class ThreadMeasureMonitor(Thread):
@@ -53,13 +222,20 @@ class ThreadMeasureMonitor(Thread):
         while True:
             try:
                 news = self.queue.get()
-                if news not in [(None, None), ('', '')]:
-                    # Here news is a Signal not Event hence the syntax.
-                    self.engine.news(news)
-                elif news == ('', ''):
+                if news == (None, None):
+                    break
+                elif news[0] == '':
                     logger = logging.getLogger(__name__)
                     logger.debug('Spy closed')
+                    if news[1]:
+                        shutil.rmtree(news[1], ignore_errors=True)
                 else:
-                    break
+                    if isinstance(news[1], SharedArray):
+                        value = load_shared_array(news[1])
+                        if value is None:
+                            continue
+                        news = (news[0], value)
+                    # Here news is a Signal not Event hence the syntax.
+                    self.engine.news(news)
             except Empty:
                 continue
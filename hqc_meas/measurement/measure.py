@@ -6,9 +6,14 @@
 # =============================================================================
 from atom.api import (Atom, Instance, Dict, Unicode, ForwardTyped, Str)
 from configobj import ConfigObj
+from copy import deepcopy
+from hashlib import sha1
+from threading import Thread, Lock
 import logging
 
 from hqc_meas.tasks.api import RootTask
+from hqc_meas.tasks.manager.building import (build_config_snapshot,
+                                             build_task_from_config)
 from hqc_meas.utils.configobj_ops import include_configobj
 
 
@@ -53,7 +58,7 @@ class Measure(Atom):
     #: Dict to store useful runtime infos
     store = Dict(Str())
 
-    def save_measure(self, path):
+    def save_measure(self, path, blocking=True):
         """ Save the measure as a ConfigObj object.
 
         Parameters
@@ -61,6 +66,15 @@ class Measure(Atom):
         path : unicode
             Path of the file to which save the measure.
 
+        blocking : bool, optional
+            When False the config is assembled but the file is written by a
+            background thread.
+
+        Returns
+        -------
+        thread : Thread or None
+            Thread writing the file when not blocking.
+
         """
         config = ConfigObj(indent_type='    ')
         core = self.plugin.workbench.get_plugin(u'enaml.workbench.core')
@@ -82,10 +96,16 @@ class Measure(Atom):
         config['headers'] = repr(self.headers.keys())
         config['name'] = self.name
 
-        with open(path, 'w') as f:
-            config.write(f)
-
         self.path = path
+        if blocking:
+            _write_config(config, path)
+        else:
+            thread = Thread(target=_write_config_in_background,
+                            args=(config, path),
+                            name='MeasureSaver')
+            thread.daemon = True
+            thread.start()
+            return thread
 
     @classmethod
     def load_measure(cls, measure_plugin, path, build_dep=None):
@@ -157,11 +177,61 @@ class Measure(Atom):
 
         return measure
 
+    def copy_measure(self, build_dep):
+        """ Build an independent copy of the measure in memory.
+
+        The task hierarchy is rebuilt from a deep copy of a snapshot of its
+        config (see build_config_snapshot), so that no mutable value is
+        shared with the original, and the monitors from their state, which
+        avoids going through a file as load_measure does.
+
+        Parameters
+        ----------
+        build_dep : dict
+            Build dependencies of the task hierarchy.
+
+        Returns
+        -------
+        measure : Measure
+            Copy of the measure. The store is not copied.
+
+        """
+        logger = logging.getLogger(__name__)
+        measure = type(self)()
+        measure.name = self.name
+        measure.plugin = self.plugin
+        measure.path = self.path
+
+        config = deepcopy(build_config_snapshot(self.root_task))
+        measure.root_task = build_task_from_config(config, build_dep, True)
+        database = measure.root_task.task_database
+        entries = database.list_all_entries(values=True)
+
+        workbench = self.plugin.workbench
+        for id, monitor in self.monitors.iteritems():
+            try:
+                monitor_decl = self.plugin.monitors[id]
+                copy = monitor_decl.factory(monitor_decl, workbench, raw=True)
+                copy.set_state(monitor.get_state(), entries)
+                measure.add_monitor(id, copy, False)
+
+            except Exception:
+                mess = 'Failed to copy monitor : {}'.format(id)
+                logger.warn(mess, exc_info=True)
+
+        measure.checks = dict(self.checks)
+        measure.headers = dict(self.headers)
+
+        return measure
+
     def run_checks(self, workbench, test_instr=False, internal_only=False):
         """ Run the checks to see if everything is ok.
 
         First the task specific checks are run, and then the ones contributed
-        by plugins.
+        by plugins. The task specific checks are skipped if they already
+        passed for the same hierarchy and runtime dependencies (see
+        checks_digest), the outcome of the last successful run being kept in
+        the store under 'checks'.
 
         Returns
         -------
@@ -175,7 +245,7 @@ class Measure(Atom):
         """
         result = True
         full_report = {}
-        check, errors = self.root_task.check(test_instr=test_instr)
+        check, errors = self._run_task_checks(test_instr)
         if errors:
             full_report[u'internal'] = errors
         result = result and check
@@ -190,6 +260,20 @@ class Measure(Atom):
 
         return result, full_report
 
+    def checks_digest(self):
+        """ Compute a digest of the task hierarchy and its runtime
+        dependencies.
+
+        Two measures with the same digest will yield the same checks results
+        (save for the connection to the instruments).
+
+        """
+        root = self.root_task
+        run_time = dict((k, v) for k, v in root.run_time.iteritems()
+                        if k != 'probed_instrs')
+        frozen = (_freeze(build_config_snapshot(root)), _freeze(run_time))
+        return sha1(repr(frozen)).hexdigest()
+
     def enter_edition_state(self):
         """ Make the the measure ready to be edited
 
@@ -285,8 +369,66 @@ class Measure(Atom):
 
         return list(set(entries))
 
+    def collect_entries_reducers(self):
+        """ Get the reducers the monitors ask to apply to some entries.
+
+        A reducer is kept only if all the monitors observing the entry and
+        asking for a reducer ask for the same one, and if the other monitors
+        observing the entry accept reduced values (see
+        BaseMonitor.accepts_reduced). Otherwise the value is sent unchanged.
+
+        Returns
+        -------
+        reducers : dict
+            Dict {entry: reducer} of the reducers to apply before sending the
+            values of the entries.
+
+        """
+        reducers = {}
+        for entry in self.collect_entries_to_observe():
+            observers = [m for m in self.monitors.values()
+                         if entry in m.database_entries]
+            asked = [m.database_reducers.get(entry) for m in observers]
+            reducer = next((r for r in asked if r is not None), None)
+            if reducer is None:
+                continue
+            if all(r == reducer if r is not None else m.accepts_reduced
+                   for m, r in zip(observers, asked)):
+                reducers[entry] = reducer
+
+        return reducers
+
     # --- Private API ---------------------------------------------------------
 
+    def _run_task_checks(self, test_instr):
+        """ Run the checks of the task hierarchy if they did not pass already.
+
+        When the cached checks are reused, the instruments probed at the time
+        are recorded back into the runtime dependencies so that the engines
+        do not probe them again.
+
+        """
+        run_time = self.root_task.run_time
+        digest = self.checks_digest()
+        cached = self.store.get('checks')
+        if (cached and cached['digest'] == digest and
+                (cached['test_instr'] or not test_instr)):
+            probed = run_time.setdefault('probed_instrs', set())
+            probed.update(cached['probed_instrs'])
+            return cached['result']
+
+        result = self.root_task.check(test_instr=test_instr)
+        if result[0]:
+            probed = run_time.get('probed_instrs', ())
+            self.store['checks'] = {'digest': digest,
+                                    'test_instr': test_instr,
+                                    'probed_instrs': set(probed),
+                                    'result': result}
+        else:
+            self.store.pop('checks', None)
+
+        return result
+
     def _observe_root_task(self, change):
         """ Observer ensuring that the monitors observe the right database.
 
@@ -323,3 +465,45 @@ class Measure(Atom):
         name = change['value']
         for monitor in self.monitors.values():
                 monitor.measure_name = name
+
+
+#: Lock preventing two threads from writing a measure file simultaneously.
+_WRITE_LOCK = Lock()
+
+
+def _write_config(config, path):
+    """ Write a measure config to a file.
+
+    """
+    with _WRITE_LOCK:
+        with open(path, 'w') as f:
+            config.write(f)
+
+
+def _write_config_in_background(config, path):
+    """ Write a measure config to a file from a background thread, logging
+    any failure which would otherwise be lost.
+
+    """
+    try:
+        _write_config(config, path)
+    except Exception:
+        logger = logging.getLogger(__name__)
+        logger.exception('Failed to save measure to {}'.format(path))
+
+
+def _freeze(obj):
+    """ Convert an object into a representation stable from one call to
+    another, suitable for hashing.
+
+    """
+    if isinstance(obj, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in obj.iteritems()))
+    elif isinstance(obj, (list, tuple)):
+        return tuple(_freeze(v) for v in obj)
+    elif isinstance(obj, (set, frozenset)):
+        return tuple(sorted(_freeze(v) for v in obj))
+    elif isinstance(obj, type):
+        return obj.__module__ + '.' + obj.__name__
+    else:
+        return repr(obj)
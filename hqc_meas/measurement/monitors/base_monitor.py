@@ -5,7 +5,7 @@
 # license : MIT license
 # =============================================================================
 
-from atom.api import Callable, List, Str, Bool, Unicode, ForwardTyped
+from atom.api import Callable, List, Str, Bool, Unicode, ForwardTyped, Dict
 from enaml.core.declarative import Declarative, d_
 from inspect import cleandoc
 
@@ -28,6 +28,16 @@ class BaseMonitor(HasPrefAtom):
     # List of database which should be observed
     database_entries = List(Str())
 
+    # Reducers to apply to the values of some of the observed entries before
+    # sending them to the monitor (see decimation.Decimator). They are applied
+    # in the process performing the measure and hence must be picklable.
+    database_reducers = Dict(Str())
+
+    # Whether or not the monitor can work with the values reduced for another
+    # monitor instead of the raw values of the entries it did not ask a
+    # reducer for.
+    accepts_reduced = Bool(False)
+
     # Whether or not to show the monitor on start-up
     auto_show = Bool(True).tag(pref=True)
 
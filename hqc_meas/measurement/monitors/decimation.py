@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# module : decimation.py
+# author : Matthieu Dartiailh
+# license : MIT license
+# =============================================================================
+""" Reduction of large arrays to the number of points which can be displayed.
+
+Monitors can ask the engines to apply a Decimator to the value of a database
+entry before sending it, so that only the decimated array crosses the process
+boundary.
+
+"""
+from collections import namedtuple
+
+import numpy as np
+
+
+class Decimated(namedtuple('Decimated', ['positions', 'values', 'shape'])):
+    """ Result of a decimation.
+
+    For 1D arrays positions holds the indexes in the original array of the
+    values, for 2D arrays it is a tuple (rows, columns) of the indexes of the
+    first element of each block. shape is the shape of the original array.
+
+    """
+    __slots__ = ()
+
+    def __str__(self):
+        return '{} (decimated from shape {})'.format(self.values, self.shape)
+
+
+def _bucket_starts(size, buckets):
+    """ Indexes of the first element of each bucket.
+
+    """
+    return np.linspace(0, size, buckets + 1).astype(np.intp)[:-1]
+
+
+def decimate_minmax(array, buckets):
+    """ Keep the minimum and maximum of each bucket of a 1D array.
+
+    The envelope of the data is preserved, which makes this suitable to plot
+    traces : at most 2*buckets points are kept. Complex arrays are decimated
+    using their modulus and NaN are ignored.
+
+    Parameters
+    ----------
+    array : np.ndarray
+        1D array to decimate.
+
+    buckets : int
+        Number of buckets, typically the width in pixels of the plot.
+
+    Returns
+    -------
+    decimated : Decimated
+        Decimated array.
+
+    """
+    array = np.asarray(array)
+    if np.iscomplexobj(array):
+        array = np.abs(array)
+    size = len(array)
+    if size <= 2*buckets:
+        return Decimated(np.arange(size), np.array(array), (size,))
+
+    starts = _bucket_starts(size, buckets)
+    ends = np.empty_like(starts)
+    ends[:-1] = starts[1:] - 1
+    ends[-1] = size - 1
+
+    positions = np.empty(2*buckets, dtype=np.intp)
+    positions[0::2] = starts
+    positions[1::2] = ends
+    values = np.empty(2*buckets, dtype=array.dtype)
+    values[0::2] = np.fmin.reduceat(array, starts)
+    values[1::2] = np.fmax.reduceat(array, starts)
+    return Decimated(positions, values, (size,))
+
+
+def decimate_mean(array, buckets):
+    """ Average the values of each bucket of a 1D or 2D array.
+
+    This is suitable for maps in which each pixel has a single value. For 2D
+    arrays, buckets is used along both axes.
+
+    Parameters
+    ----------
+    array : np.ndarray
+        1D or 2D array to decimate.
+
+    buckets : int
+        Number of buckets (along each axis).
+
+    Returns
+    -------
+    decimated : Decimated
+        Decimated array.
+
+    """
+    array = np.asarray(array)
+    if np.iscomplexobj(array):
+        array = np.abs(array)
+    positions = []
+    values = array
+    for axis, size in enumerate(array.shape):
+        if size <= buckets:
+            positions.append(np.arange(size))
+            continue
+        starts = _bucket_starts(size, buckets)
+        counts = np.diff(np.append(starts, size))
+        # Sum integers and booleans as floats so that the means are exact
+        # (reduceat on booleans is a logical or).
+        if not np.issubdtype(values.dtype, np.inexact):
+            values = values.astype(np.float64)
+        values = np.add.reduceat(values, starts, axis=axis)
+        shape = [1]*values.ndim
+        shape[axis] = -1
+        values = np.true_divide(values, counts.reshape(shape))
+        positions.append(starts)
+
+    if array.ndim == 1:
+        positions = positions[0]
+    else:
+        positions = tuple(positions)
+    return Decimated(positions, np.array(values, copy=values is array),
+                     array.shape)
+
+
+class Decimator(object):
+    """ Picklable callable decimating the arrays it is given.
+
+    Other values are returned unchanged.
+
+    Parameters
+    ----------
+    points : int
+        Number of points to keep (along each axis for 2D arrays).
+
+    mode : {'minmax', 'mean'}
+        Decimation to use for 1D arrays. 2D arrays are always averaged.
+
+    """
+
+    def __init__(self, points, mode='minmax'):
+        self.points = points
+        self.mode = mode
+
+    def __call__(self, value):
+        if not isinstance(value, np.ndarray) or value.dtype.hasobject:
+            return value
+        if value.ndim == 1 and self.mode == 'minmax':
+            return decimate_minmax(value, max(self.points//2, 1))
+        if value.ndim in (1, 2):
+            return decimate_mean(value, self.points)
+        return value
+
+    def __eq__(self, other):
+        return (isinstance(other, Decimator) and
+                (self.points, self.mode) == (other.points, other.mode))
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.points, self.mode))
+
+    def __repr__(self):
+        return 'Decimator({!r}, {!r})'.format(self.points, self.mode)
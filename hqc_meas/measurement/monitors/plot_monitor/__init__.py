@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+
+import enaml
+with enaml.imports():
+    from .plot_monitor_manifest import PlotMonitorManifest
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# module : monitor.py
+# author : Matthieu Dartiailh
+# license : MIT license
+# =============================================================================
+""" Monitor plotting arrays and maps during a measure.
+
+"""
+from threading import Lock
+import logging
+
+from atom.api import (Instance, Value, Str, List, Dict, Float, ContainerList,
+                      Typed)
+import enaml
+
+from hqc_meas.utils.throttling import ThrottledCall
+from ..base_monitor import BaseMonitor
+from .plots import BasePlot, PLOTS
+
+
+class PlotMonitor(BaseMonitor):
+    """ Monitor plotting 1D arrays and 2D maps built during a measure.
+
+    The news are processed in the thread delivering them, each plot updating
+    its data in place, and the display is refreshed at most once per
+    refresh_interval from the main thread. The arrays are decimated by the
+    engine before being sent (see Decimator).
+
+    """
+    # --- Public API ----------------------------------------------------------
+
+    #: Plots to display.
+    plots = ContainerList(Instance(BasePlot))
+
+    #: Database entries known when editing the measure.
+    known_entries = List(Str())
+
+    #: Minimal time in seconds between two refreshes of the plots.
+    refresh_interval = Float(0.1)
+
+    def start(self, parent_ui):
+        for plot in self.plots:
+            plot.clear()
+        if self.auto_show:
+            self.show_monitor(parent_ui)
+
+    def stop(self):
+        # Avoid raising errors if the view has already been destroyed.
+        if getattr(self._view, 'proxy_is_active', None):
+            self._view.close()
+        self._view = None
+
+    def process_news(self, news):
+        """ Update the plots depending on the entry, the display is refreshed
+        later.
+
+        This method can be called from any thread.
+
+        """
+        with self._news_lock:
+            for plot in self._plots_by_entry.get(news[0], ()):
+                if plot.process(*news):
+                    self._modified_plots.add(plot)
+            if not self._modified_plots:
+                return
+
+        self._refresher.request()
+
+    def refresh_monitored_entries(self, entries={}):
+        if entries:
+            self.known_entries = sorted(entries)
+
+    def database_modified(self, change):
+        entry = change['value']
+        known = set(self.known_entries)
+        if len(entry) > 1:
+            known.add(entry[0])
+        else:
+            known.discard(entry[0])
+        self.known_entries = sorted(known)
+
+    def clear_state(self):
+        self.plots = []
+        self.known_entries = []
+
+    def get_state(self):
+        prefs = self.preferences_from_members()
+        for i, plot in enumerate(self.plots):
+            prefs['plot_{}'.format(i)] = plot.preferences_from_members()
+
+        return prefs
+
+    def set_state(self, config, entries):
+        plots = []
+        plot_names = sorted((name for name in config
+                             if name.startswith('plot_')),
+                            key=lambda name: int(name[5:]))
+        for name in plot_names:
+            plot_config = dict(config[name])
+            plot_class = PLOTS.get(plot_config.pop('class_name', ''))
+            if plot_class is None:
+                logger = logging.getLogger(__name__)
+                logger.warn('Unknown plot class for {}'.format(name))
+                continue
+            plot = plot_class()
+            plot.update_members_from_preferences(**plot_config)
+            plots.append(plot)
+
+        self.plots = plots
+        self.refresh_monitored_entries(entries)
+        self.update_members_from_preferences(**config)
+
+    def get_editor_page(self):
+        with enaml.imports():
+            from .monitor_views import PlotMonitorPage
+        return PlotMonitorPage(monitor=self)
+
+    def show_monitor(self, parent_ui):
+        if self._view and self._view.proxy_is_active:
+            self._view.restore()
+            self._view.send_to_front()
+            return
+
+        # The plotting backend is an optional dependency.
+        try:
+            with enaml.imports():
+                from .plot_views import PlotMonitorView
+        except ImportError:
+            logger = logging.getLogger(__name__)
+            logger.error('Plot monitor cannot be displayed (matplotlib is '
+                         'required)', exc_info=True)
+            return
+
+        view = PlotMonitorView(monitor=self)
+        view.show()
+        self._view = view
+
+    # --- Private API ---------------------------------------------------------
+
+    #: Mapping between database entries and the plots depending on them.
+    _plots_by_entry = Dict()
+
+    #: Plots whose data changed since the last refresh.
+    _modified_plots = Typed(set, ())
+
+    #: Throttle calling _refresh_plots at most once every refresh_interval.
+    _refresher = Typed(ThrottledCall)
+
+    #: Lock protecting the plots data updates.
+    _news_lock = Value(factory=Lock)
+
+    #: Reference to the current display.
+    _view = Value()
+
+    #: Plots whose members are observed.
+    _observed_plots = List()
+
+    def _default__refresher(self):
+        return ThrottledCall(self._refresh_plots, self.refresh_interval)
+
+    def _observe_refresh_interval(self, change):
+        """ Keep the interval of the refresher in sync.
+
+        """
+        self._refresher.interval = change['value']
+
+    def _refresh_plots(self):
+        """ Notify the plots modified since the last refresh.
+
+        """
+        with self._news_lock:
+            plots = self._modified_plots
+            self._modified_plots = set()
+
+        for plot in plots:
+            plot.updated = True
+
+    def _observe_plots(self, change):
+        """ Observe the members of the plots affecting the monitored entries.
+
+        """
+        for plot in self._observed_plots:
+            for member in _PLOT_MEMBERS:
+                if plot.get_member(member) is not None:
+                    plot.unobserve(member, self._update_entries)
+
+        self._observed_plots = list(self.plots)
+        for plot in self._observed_plots:
+            for member in _PLOT_MEMBERS:
+                if plot.get_member(member) is not None:
+                    plot.observe(member, self._update_entries)
+
+        self._update_entries()
+
+    def _update_entries(self, change=None):
+        """ Update the monitored entries and their reducers.
+
+        """
+        by_entry = {}
+        reducers = {}
+        conflicts = set()
+        for plot in self.plots:
+            for entry in plot.depend_on:
+                by_entry.setdefault(entry, []).append(plot)
+            for entry, reducer in plot.reducers().iteritems():
+                if entry in reducers and reducers[entry] != reducer:
+                    conflicts.add(entry)
+                reducers[entry] = reducer
+
+        # When the plots need different reductions of the same entry, or no
+        # reduction at all, the entry is sent as is.
+        for entry, plots in by_entry.iteritems():
+            if any(entry not in p.reducers() for p in plots):
+                conflicts.add(entry)
+
+        with self._news_lock:
+            self._plots_by_entry = by_entry
+        self.database_entries = sorted(by_entry)
+        self.database_reducers = {e: r for e, r in reducers.iteritems()
+                                  if e not in conflicts}
+
+
+#: Members of the plots whose change affects the monitored entries.
+_PLOT_MEMBERS = ('depend_on', 'points', 'columns', 'column_index')
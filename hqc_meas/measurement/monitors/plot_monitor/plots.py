@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# module : plots.py
+# author : Matthieu Dartiailh
+# license : MIT license
+# =============================================================================
+""" Plots displayed by the PlotMonitor.
+
+The data of the plots are updated from the thread delivering the news and
+read from the main thread to be displayed, all the accesses are hence
+protected by a lock.
+
+"""
+from threading import RLock
+
+import numpy as np
+from atom.api import Str, Int, List, Value, Event
+
+from hqc_meas.utils.atom_util import HasPrefAtom
+from ..decimation import Decimator, Decimated
+
+
+class BasePlot(HasPrefAtom):
+    """ Base class for the plots of the PlotMonitor.
+
+    """
+    #: Name of the plot.
+    name = Str().tag(pref=True)
+
+    #: Name of the class used for persistence.
+    class_name = Str().tag(pref=True)
+
+    #: Database entries the plot depends on.
+    depend_on = List(Str())
+
+    #: Event fired, in the main thread, when the data of the plot changed.
+    updated = Event()
+
+    def process(self, entry, value):
+        """ Update the data of the plot.
+
+        Parameters
+        ----------
+        entry : str
+            Path of the modified database entry.
+
+        value :
+            New value of the entry, possibly decimated.
+
+        Returns
+        -------
+        modified : bool
+            Whether or not the displayed data changed.
+
+        """
+        raise NotImplementedError()
+
+    def reducers(self):
+        """ Reducers to apply to the entries values before sending them.
+
+        Returns
+        -------
+        reducers : dict
+            Dict {entry: reducer} where reducers are picklable callables.
+
+        """
+        return {}
+
+    def clear(self):
+        """ Forget the data of the plot.
+
+        """
+        pass
+
+    # --- Private API ---------------------------------------------------------
+
+    #: Lock protecting the data of the plot.
+    _lock = Value(factory=RLock)
+
+    def _default_class_name(self):
+        """ Default factory for the class_name attribute
+
+        """
+        return type(self).__name__
+
+
+class TracePlot(BasePlot):
+    """ Plot of the last value of a 1D array.
+
+    """
+    #: Database entry holding the array to plot.
+    entry = Str().tag(pref=True)
+
+    #: Number of points to display.
+    points = Int(2000).tag(pref=True)
+
+    def process(self, entry, value):
+        if entry != self.entry:
+            return False
+        if not isinstance(value, Decimated):
+            value = Decimator(self.points)(np.asarray(value))
+        with self._lock:
+            self._data = value
+        return True
+
+    def reducers(self):
+        return {self.entry: Decimator(self.points)} if self.entry else {}
+
+    def clear(self):
+        with self._lock:
+            self._data = None
+
+    def get_data(self):
+        """ Get the positions and values to plot, None if no data was received.
+
+        """
+        with self._lock:
+            data = self._data
+        if data is None:
+            return None
+        return data.positions, data.values
+
+    # --- Private API ---------------------------------------------------------
+
+    #: Last received (decimated) value.
+    _data = Value()
+
+    def _observe_entry(self, change):
+        self.depend_on = [change['value']] if change['value'] else []
+
+
+class MapPlot(BasePlot):
+    """ 2D map built point by point or row by row during a measure.
+
+    The position at which each value is written is given by the indexes of
+    loops (1 based as written by LoopTask). When no column index is given,
+    the values should be 1D arrays and each one fills a row. Only the new
+    values are written, the map is never rebuilt.
+
+    """
+    #: Database entry holding the values to plot.
+    entry = Str().tag(pref=True)
+
+    #: Database entry holding the row index.
+    row_index = Str().tag(pref=True)
+
+    #: Database entry holding the column index.
+    column_index = Str().tag(pref=True)
+
+    #: Initial number of rows of the map. The map grows as needed.
+    rows = Int(100).tag(pref=True)
+
+    #: Number of columns of the map. When filled with arrays, the arrays are
+    #: decimated to this number of points.
+    columns = Int(100).tag(pref=True)
+
+    def process(self, entry, value):
+        with self._lock:
+            if entry == self.row_index:
+                self._row = int(value) - 1
+                return False
+            if entry == self.column_index:
+                self._column = int(value) - 1
+                return False
+            if entry != self.entry:
+                return False
+
+            if self.column_index:
+                self._ensure_size(self._row + 1, self._column + 1)
+                self._map[self._row, self._column] = value
+            else:
+                if not isinstance(value, Decimated):
+                    value = Decimator(self.columns, 'mean')(np.asarray(value))
+                row = np.ravel(value.values)
+                self._ensure_size(self._row + 1, len(row))
+                self._map[self._row, :len(row)] = row
+            self._filled_rows = max(self._filled_rows, self._row + 1)
+
+        return True
+
+    def reducers(self):
+        if self.entry and not self.column_index:
+            return {self.entry: Decimator(self.columns, 'mean')}
+        return {}
+
+    def clear(self):
+        with self._lock:
+            self._map = None
+            self._row = 0
+            self._column = 0
+            self._filled_rows = 0
+
+    def get_data(self):
+        """ Get a copy of the filled part of the map, None if it is empty.
+
+        """
+        with self._lock:
+            if self._map is None:
+                return None
+            return self._map[:self._filled_rows].copy()
+
+    # --- Private API ---------------------------------------------------------
+
+    #: Array holding the map (NaN where no value was received).
+    _map = Value()
+
+    #: Current row index.
+    _row = Int()
+
+    #: Current column index.
+    _column = Int()
+
+    #: Number of rows in which values were written.
+    _filled_rows = Int()
+
+    def _ensure_size(self, rows, columns):
+        """ Grow the map so that it holds at least the given number of rows and
+        columns.
+
+        """
+        current = self._map
+        if current is not None and (rows <= current.shape[0] and
+                                    columns <= current.shape[1]):
+            return
+
+        shape = (max(rows, self.rows), max(columns, self.columns))
+        if current is not None:
+            # Double the number of rows to amortize the copies.
+            shape = (max(shape[0], 2*current.shape[0]
+                         if rows > current.shape[0] else current.shape[0]),
+                     max(shape[1], current.shape[1]))
+        new = np.empty(shape)
+        new.fill(np.nan)
+        if current is not None:
+            new[:current.shape[0], :current.shape[1]] = current
+        self._map = new
+
+    def _observe_entry(self, change):
+        self._update_depend_on()
+
+    def _observe_row_index(self, change):
+        self._update_depend_on()
+
+    def _observe_column_index(self, change):
+        self._update_depend_on()
+
+    def _update_depend_on(self):
+        self.depend_on = [e for e in (self.entry, self.row_index,
+                                      self.column_index) if e]
+
+
+#: Plots classes usable in a PlotMonitor indexed by name.
+PLOTS = {'TracePlot': TracePlot, 'MapPlot': MapPlot}
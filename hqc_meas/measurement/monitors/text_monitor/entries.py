@@ -5,7 +5,6 @@
 # license : MIT license
 # =============================================================================
 from atom.api import (Str, List)
-from enaml.application import deferred_call
 from hqc_meas.utils.atom_util import HasPrefAtom
 
 
@@ -32,8 +31,9 @@ class MonitoredEntry(HasPrefAtom):
         """ Method updating the value of the entry given the current state of
         the database.
 
+        This method should be called from the main thread.
+
         """
         # TODO handle evaluation delimited by $
         vals = {d: database_vals[d] for d in self.depend_on}
-        new_val = self.formatting.format(**vals)
-        deferred_call(setattr, self, 'value', new_val)
+        self.value = self.formatting.format(**vals)
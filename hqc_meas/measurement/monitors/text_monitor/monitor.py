@@ -7,14 +7,16 @@
 """
 """
 from atom.api import (Instance, Value, Str, List, Dict, ForwardTyped,
-                      Callable, ContainerList, Typed)
+                      Callable, ContainerList, Typed, Float, Int, set_default)
 import enaml
 with enaml.imports():
     from enaml.stdlib.message_box import information
 
 from inspect import cleandoc
 from textwrap import fill
+from threading import Lock
 
+from hqc_meas.utils.throttling import ThrottledCall
 from ..base_monitor import BaseMonitor
 from .entries import MonitoredEntry
 from .rules import AbstractMonitorRule
@@ -58,6 +60,18 @@ class TextMonitor(BaseMonitor):
     #: List of user created monitor entries.
     custom_entries = List(Instance(MonitoredEntry))
 
+    #: Minimal time in seconds between two refreshes of the displayed values.
+    #: The news received in the meantime are coalesced, only the last value
+    #: of each database entry being displayed.
+    refresh_interval = Float(0.1)
+
+    #: Number of news which were superseded by a newer value before being
+    #: displayed.
+    dropped_updates = Int()
+
+    #: Values are only formatted as text so reduced values can be displayed.
+    accepts_reduced = set_default(True)
+
     def start(self, parent_ui):
         if self.auto_show:
             self.show_monitor(parent_ui)
@@ -69,11 +83,18 @@ class TextMonitor(BaseMonitor):
         self._view = None
 
     def process_news(self, news):
+        """ Store the news, the displayed values are refreshed later.
 
-        values = self._database_values
-        values[news[0]] = news[1]
-        for updater in self.updaters[news[0]]:
-            updater(values)
+        This method can be called from any thread. The news are coalesced and
+        the entries updated at most once per refresh in the main thread.
+
+        """
+        with self._news_lock:
+            if news[0] in self._pending_news:
+                self._dropped_news += 1
+            self._pending_news[news[0]] = news[1]
+
+        self._refresher.request()
 
     def refresh_monitored_entries(self, entries={}):
         if not entries:
@@ -135,7 +156,11 @@ class TextMonitor(BaseMonitor):
         """ Clear the monitor state.
 
         """
+        with self._news_lock:
+            self._pending_news = {}
+            self._dropped_news = 0
         with self.suppress_notifications():
+            self.dropped_updates = 0
             self.displayed_entries = []
             self.undisplayed_entries = []
             self.hidden_entries = []
@@ -267,6 +292,51 @@ class TextMonitor(BaseMonitor):
     # Reference to the current display
     _view = Typed(TextMonitorView)
 
+    # News received since the last refresh.
+    _pending_news = Dict()
+
+    # Number of news superseded before being displayed.
+    _dropped_news = Int()
+
+    # Throttle calling _refresh_values at most once every refresh_interval.
+    _refresher = Typed(ThrottledCall)
+
+    # Lock protecting the access to the pending news.
+    _news_lock = Value(factory=Lock)
+
+    def _default__refresher(self):
+        return ThrottledCall(self._refresh_values, self.refresh_interval)
+
+    def _observe_refresh_interval(self, change):
+        """ Keep the interval of the refresher in sync.
+
+        """
+        self._refresher.interval = change['value']
+
+    def _refresh_values(self):
+        """ Update the entries depending on the database entries modified
+        since the last refresh.
+
+        Each entry is updated only once whatever the number of modified
+        database entries it depends on.
+
+        """
+        with self._news_lock:
+            news = self._pending_news
+            self._pending_news = {}
+            dropped = self._dropped_news
+
+        values = self._database_values
+        values.update(news)
+        updated = set()
+        for path in news:
+            for updater in self.updaters.get(path, ()):
+                if updater not in updated:
+                    updated.add(updater)
+                    updater(values)
+
+        self.dropped_updates = dropped
+
     @staticmethod
     def _create_default_entry(entry_path, value):
         """ Create a monitor entry for a database entry.
@@ -42,6 +42,20 @@ def _workspace():
     return MeasureSpace
 
 
+def _monitored_entries(measure):
+    """ Get the entries the engine should observe for a measure.
+
+    When some monitors asked for reducers a dict {entry: reducer or None} is
+    returned, otherwise a simple list of entries.
+
+    """
+    entries = measure.collect_entries_to_observe()
+    reducers = measure.collect_entries_reducers()
+    if reducers:
+        return {entry: reducers.get(entry) for entry in entries}
+    return entries
+
+
 class MeasurePlugin(HasPrefPlugin):
     """
     """
@@ -266,7 +280,7 @@ class MeasurePlugin(HasPrefPlugin):
         engine = self.engine_instance
 
         # Call engine prepare to run method.
-        entries = measure.collect_entries_to_observe()
+        entries = _monitored_entries(measure)
         engine.prepare_to_run(measure.name, measure.root_task, entries,
                               measure.store['build_deps'])
 
@@ -281,6 +295,14 @@ class MeasurePlugin(HasPrefPlugin):
         # Ask the engine to start the measure.
         engine.run()
 
+        # Let the engine get ready for the next measure.
+        next_measure = self.find_next_measure(exclude=measure)
+        if next_measure is not None and 'build_deps' in next_measure.store:
+            engine.prepare_next(next_measure.name, next_measure.root_task,
+                                _monitored_entries(next_measure),
+                                next_measure.store['build_deps'],
+                                next_measure.store.get('profiles', ()))
+
     def pause_measure(self):
         """ Pause the currently active measure.
 
@@ -337,9 +359,14 @@ class MeasurePlugin(HasPrefPlugin):
             self.flags.remove('processing')
         self.engine_instance.force_exit()
 
-    def find_next_measure(self):
+    def find_next_measure(self, exclude=None):
         """ Find the next runnable measure in the queue.
 
+        Parameters
+        ----------
+        exclude : Measure, optional
+            Measure to skip, typically the one currently running.
+
         Returns
         -------
         measure : Measure
@@ -354,7 +381,8 @@ class MeasurePlugin(HasPrefPlugin):
         # user is editing the second measure when the first measure ends).
         while i < len(enqueued_measures):
             measure = enqueued_measures[i]
-            if measure.status in INVALID_MEASURE_STATUS:
+            if (measure.status in INVALID_MEASURE_STATUS or
+                    measure is exclude):
                 i += 1
                 measure = None
             else:
@@ -407,6 +435,17 @@ class MeasurePlugin(HasPrefPlugin):
         if engine:
             engine.unobserve('news')
 
+        # Let the engine close the connections to the released profiles which
+        # are not used by the next measure.
+        meas = None
+        if not engine or 'stop_processing' not in self.flags:
+            meas = self.find_next_measure()
+        if engine:
+            kept = meas.store.get('profiles', ()) if meas is not None else ()
+            released = set(profs) - set(kept)
+            if released:
+                engine.release_instruments(sorted(released))
+
         # If we are supposed to stop, stop.
         if engine and'stop_processing' in self.flags:
             self.stop_processing()
@@ -420,7 +459,6 @@ class MeasurePlugin(HasPrefPlugin):
 
         # Otherwise find the next measure, if there is none stop the engine.
         else:
-            meas = self.find_next_measure()
             if meas is not None:
                 self.flags = []
                 self.start_measure(meas)
@@ -258,8 +258,10 @@ class MeasureSpace(Workspace):
             default_filename = measure.name + '_last_run.ini'
             path = os.path.join(measure.root_task.default_path,
                                 default_filename)
-            measure.save_measure(path)
-            meas = Measure.load_measure(self.plugin, path, build_deps)
+            # The file is only kept as a record of what was run, the measure
+            # to enqueue is copied in memory.
+            measure.save_measure(path, blocking=False)
+            meas = measure.copy_measure(build_deps)
             # Here don't keep the profiles in the runtime as it will defeat the
             # purpose of the manager.
             meas.root_task.run_time = runtime_deps
@@ -267,6 +269,10 @@ class MeasureSpace(Workspace):
             if use_instrs:
                 meas.store['profiles'] = profs
             meas.store['build_deps'] = build_deps
+            # Keep the checks results so that they are not run again before
+            # starting the measure if nothing changed.
+            if 'checks' in measure.store:
+                meas.store['checks'] = measure.store['checks']
             meas.status = 'READY'
             meas.infos = 'The measure is ready to be performed by an engine.'
             self.plugin.enqueued_measures.append(meas)
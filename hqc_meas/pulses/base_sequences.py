@@ -9,6 +9,7 @@ from atom.api import (Int, Instance, Str, Dict, Bool, List,
 from itertools import chain
 from inspect import cleandoc
 from copy import deepcopy
+from multiprocessing import Pool, current_process
 
 from hqc_meas.utils.atom_util import member_from_str
 from .contexts.base_context import BaseContext
@@ -665,6 +666,96 @@ class RootSequence(Sequence):
                 kwargs['sequence_duration'] = duration
             return self.context.compile_sequence(pulses, **kwargs)
 
+    def compile_sequences(self, vars_sets, use_context=True, processes=1):
+        """ Compile the sequence for several sets of external variables.
+
+        The pulses whose entries do not depend on the variables changing from
+        one set to the next are evaluated only once (per process) and their
+        waveforms are reused.
+
+        Parameters
+        ----------
+        vars_sets : list(dict)
+            Values of the external variables for each point. Variables absent
+            from a set keep the value they have in external_vars.
+
+        use_context : bool, optional
+            Should the context compile the pulse sequence.
+
+        processes : int, optional
+            Number of processes among which the points should be split. This
+            is only used when the context compiles the sequence, the sequence
+            does not contain templates and the current process is not
+            daemonic (daemonic processes, such as the one used by the process
+            engine, cannot have children).
+
+        Returns
+        -------
+        result : bool
+            Flag indicating whether or not the compilation succeeded.
+
+        args : list or tuple
+            In case of success, the list of the results of compile_sequence
+            for each point. In case of failure, a tuple containing the index
+            of the first point which failed and the associated compile_sequence
+            results.
+
+        """
+        if (processes > 1 and use_context and len(vars_sets) > 1 and
+                not current_process().daemon):
+            dependencies = self._collect_dependencies()
+            if dependencies is not None:
+                return self._compile_in_pool(vars_sets, processes,
+                                             dependencies)
+
+        results = []
+        for i, (res, out) in enumerate(self.iter_compile_sequences(
+                vars_sets, use_context)):
+            if not res:
+                return False, (i, out)
+            results.append(out)
+
+        return True, results
+
+    def iter_compile_sequences(self, vars_sets, use_context=True):
+        """ Compile the sequence for several sets of external variables, one
+        point at a time.
+
+        Contrary to compile_sequences, the result of a point is produced as
+        soon as it is compiled so that the caller can process it (for example
+        transfer it to an instrument) before the next point is compiled,
+        without holding the results of all the points in memory.
+
+        Parameters
+        ----------
+        vars_sets : iterable(dict)
+            Values of the external variables for each point. Variables absent
+            from a set keep the value they have in external_vars.
+
+        use_context : bool, optional
+            Should the context compile the pulse sequence.
+
+        Returns
+        -------
+        results : generator
+            Generator yielding the results of compile_sequence for each point.
+            It stops after the first point whose compilation failed.
+
+        """
+        external_vars = dict(self.external_vars)
+        for values in vars_sets:
+            point_vars = external_vars.copy()
+            point_vars.update(values)
+            self.external_vars = point_vars
+            try:
+                res, out = self.compile_sequence(use_context)
+            finally:
+                self.external_vars = external_vars
+
+            yield res, out
+            if not res:
+                return
+
     def get_bindable_vars(self):
         """ Access the list of bindable vars for the sequence.
 
@@ -777,6 +868,72 @@ class RootSequence(Sequence):
 
         return answers
 
+    def _collect_dependencies(self):
+        """ Collect the classes needed to rebuild the sequence from its
+        preferences.
+
+        Returns
+        -------
+        dependencies : dict or None
+            Dependencies in the format expected by build_from_config or None if
+            the sequence contains templates (which cannot be rebuilt without
+            the pulses manager).
+
+        """
+        pulses = {'shapes': {}, 'contexts': {}}
+        pulses['contexts'][self.context.context_class] = type(self.context)
+
+        sequences = [self]
+        while sequences:
+            for item in sequences.pop().items:
+                if 'template_id' in item.members():
+                    return None
+                pulses[item.item_class] = type(item)
+                if isinstance(item, Pulse):
+                    if item.shape is not None:
+                        shape = item.shape
+                        pulses['shapes'][shape.shape_class] = type(shape)
+                else:
+                    sequences.append(item)
+
+        return {'pulses': pulses}
+
+    def _compile_in_pool(self, vars_sets, processes, dependencies):
+        """ Compile the sequence for several sets of variables in a pool of
+        processes.
+
+        Each process rebuilds the sequence once and compiles a contiguous
+        chunk of points so that the invariant pulses are evaluated once per
+        process.
+
+        """
+        config = self.preferences_from_members()
+        # The current values of the external vars are sent along with each
+        # set rather than through the config as they may not be literals.
+        config['external_vars'] = repr(dict.fromkeys(self.external_vars))
+        vars_sets = [dict(self.external_vars, **values)
+                     for values in vars_sets]
+
+        chunk_size = -(-len(vars_sets) // processes)
+        starts = range(0, len(vars_sets), chunk_size)
+        jobs = [(config, dependencies, vars_sets[i:i+chunk_size])
+                for i in starts]
+
+        pool = Pool(min(processes, len(jobs)))
+        try:
+            outputs = pool.map(_compile_points, jobs)
+        finally:
+            pool.close()
+            pool.join()
+
+        results = []
+        for start, (res, out) in zip(starts, outputs):
+            if not res:
+                return False, (start + out[0], out[1])
+            results.extend(out)
+
+        return True, results
+
     def _observe_time_constrained(self, change):
         """ Keep the linkable_vars list in sync with fix_sequence_duration.
 
@@ -806,3 +963,15 @@ class RootSequence(Sequence):
                 r = prefix.format(var)
                 if r in link_vars:
                     link_vars.remove(r)
+
+
+def _compile_points(job):
+    """ Rebuild a root sequence and compile it for several sets of variables.
+
+    This function is run in the worker processes of
+    RootSequence.compile_sequences.
+
+    """
+    config, dependencies, vars_sets = job
+    seq = RootSequence.build_from_config(config, dependencies)
+    return seq.compile_sequences(vars_sets)
@@ -73,39 +73,32 @@ class AWGContext(BaseContext):
         array_analog = {}
         array_M1 = {}
         array_M2 = {}
+        buffers = {}
         for channel in used_channels:
-            # numpy array for analog channels int16 init 2**13
-            array_analog[channel] = np.ones(sequence_length,
-                                            dtype=np.uint16)*(2**13)
+            # numpy array for analog channels init 2**13. Use 32 bits integers
+            # so that under and overflows can be detected.
+            array_analog[channel] = np.empty(sequence_length, dtype=np.int32)
+            array_analog[channel].fill(2**13)
             # numpy array for marker1 init False. For AWG M1 = 0 = off
             array_M1[channel] = np.zeros(sequence_length, dtype=np.int8)
             # numpy array for marker2 init False. For AWG M2 = 0 = off
             array_M2[channel] = np.zeros(sequence_length, dtype=np.int8)
+            buffers[channel + '_A'] = array_analog[channel]
+            buffers[channel + '_M1'] = array_M1[channel]
+            buffers[channel + '_M2'] = array_M2[channel]
 
         for pulse in pulses:
-
-            waveform = pulse.waveform
-            channel = pulse.channel[:3]
             channeltype = pulse.channel[4:]
-
-            start_index = int(round(pulse.start*time_to_index))
-            stop_index = start_index + len(waveform)
-
-            if channeltype == 'A' and pulse.kind == 'Analogical':
-#                array_analog[channel][start_index:stop_index] +=\
-#                    np.rint(8191*waveform)
-                array_analog[channel][start_index:stop_index] +=\
-                    (np.rint(8191*waveform)).astype(np.uint16)
-            elif channeltype == 'M1' and pulse.kind == 'Logical':
-                array_M1[channel][start_index:stop_index] += waveform
-            elif channeltype == 'M2' and pulse.kind == 'Logical':
-                array_M2[channel][start_index:stop_index] += waveform
-            else:
+            if not ((channeltype == 'A' and pulse.kind == 'Analogical') or
+                    (channeltype in ('M1', 'M2') and
+                     pulse.kind == 'Logical')):
                 msg = 'Selected channel does not match kind for pulse {} ({}).'
                 return False, {'Kind issue':
                                msg.format(pulse.index,
                                           (pulse.kind, pulse.channel))}
 
+        self._fill_buffers(pulses, buffers, time_to_index, 8191)
+
         # Check the overflows
         traceback = {}
         for channel in used_channels:
@@ -4,8 +4,12 @@
 # author : Matthieu Dartiailh
 # license : MIT license
 # =============================================================================
-from atom.api import Enum, Str, Bool, Float, Property, Tuple, List
+from atom.api import Enum, Str, Bool, Float, Int, Property, Tuple, List
 from inspect import cleandoc
+from threading import Lock
+import atexit
+from multiprocessing.pool import ThreadPool
+import numpy as np
 
 from hqc_meas.utils.atom_util import HasPrefAtom
 
@@ -48,6 +52,10 @@ class BaseContext(HasPrefAtom):
     #: Name of the context class. Used for persistence purposes.
     context_class = Str().tag(pref=True)
 
+    #: Number of threads used to synthesise the pulses waveforms. A value of
+    #: 1 means the waveforms are synthesised in the calling thread.
+    synthesis_workers = Int(1).tag(pref=True)
+
     def compile_sequence(self, pulses, **kwargs):
         """
 
@@ -92,6 +100,54 @@ class BaseContext(HasPrefAtom):
                 raise ValueError('Time does not fit the instr resolution')
             return time
 
+    def _fill_buffers(self, pulses, buffers, time_to_index, scale):
+        """ Add the pulses waveforms into preallocated channel buffers.
+
+        The waveforms are synthesised by chunks of pulses in a thread pool
+        when synthesis_workers is larger than 1. Each buffer is protected by a
+        lock so that overlapping pulses are summed correctly.
+
+        Parameters
+        ----------
+        pulses : list(Pulse)
+            Pulses whose kind has already been checked against their channel.
+
+        buffers : dict
+            Dict {channel: array} in which the waveforms should be summed. The
+            keys are the channel names as used by the pulses.
+
+        time_to_index : float
+            Coefficient converting a time into an index of the buffers.
+
+        scale : float
+            Factor applied to the analogical waveforms before rounding them to
+            the nearest integer.
+
+        """
+        locks = {channel: Lock() for channel in buffers}
+
+        def fill(chunk):
+            for pulse in chunk:
+                waveform = pulse.waveform
+                if pulse.kind == 'Analogical':
+                    waveform = scale*waveform
+                    np.rint(waveform, waveform)
+
+                start_index = int(round(pulse.start*time_to_index))
+                stop_index = start_index + len(waveform)
+                with locks[pulse.channel]:
+                    view = buffers[pulse.channel][start_index:stop_index]
+                    np.add(view, waveform, view, casting='unsafe')
+
+        workers = self.synthesis_workers
+        if workers <= 1 or len(pulses) < 2:
+            fill(pulses)
+        else:
+            chunk_size = max(1, len(pulses) // (4*workers))
+            chunks = [pulses[i:i+chunk_size]
+                      for i in range(0, len(pulses), chunk_size)]
+            _get_pool(workers).map(fill, chunks)
+
     def _default_context_class(self):
         """ Default value the context class member.
 
@@ -105,3 +161,35 @@ class BaseContext(HasPrefAtom):
         answers = {m: getattr(self, m, None) for m in members}
         answers.update({k: c(self) for k, c in callables.iteritems()})
         return answers
+
+
+#: Thread pools used to synthesise waveforms, keyed by number of workers.
+_POOLS = {}
+
+#: Lock protecting the creation of the pools.
+_POOLS_LOCK = Lock()
+
+
+def _get_pool(workers):
+    """ Get a thread pool with the requested number of workers.
+
+    """
+    with _POOLS_LOCK:
+        if workers not in _POOLS:
+            _POOLS[workers] = ThreadPool(workers)
+        return _POOLS[workers]
+
+
+@atexit.register
+def close_pools():
+    """ Close the thread pools used to synthesise the waveforms.
+
+    The pools are created again if needed.
+
+    """
+    with _POOLS_LOCK:
+        pools = _POOLS.values()
+        _POOLS.clear()
+    for pool in pools:
+        pool.close()
+        pool.join()
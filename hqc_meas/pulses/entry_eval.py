@@ -10,6 +10,8 @@ import numpy as np
 from math import pi as Pi
 from inspect import cleandoc
 from textwrap import fill
+from collections import OrderedDict
+from threading import Lock
 from future.utils import exec_
 
 
@@ -26,62 +28,164 @@ EVALUATER_TOOLTIP = '\n'.join([
     "- pi is available as Pi"])
 
 
-def eval_entry(string, seq_locals, missing_locals):
-    """
+def entry_dependencies(string):
+    """ Collect the names of the variables referenced in an entry.
+
+    Parameters
+    ----------
+    string : str
+        Entry in which variables are referenced using '{' and '}'.
+
+    Returns
+    -------
+    names : list
+        Names of the referenced variables in order of appearance.
 
     """
     aux_strings = string.split('{')
-    if len(aux_strings) > 1:
-        elements = [el for aux in aux_strings
-                    for el in aux.split('}')]
+    if len(aux_strings) == 1:
+        return []
 
-        missing = [el for el in elements[1::2] if el not in seq_locals]
-        if missing:
-            missing_locals.update(set(missing))
-            return None
+    elements = [el for aux in aux_strings for el in aux.split('}')]
+    return elements[1::2]
 
-        replacement_token = ['_a{}'.format(i)
-                             for i in xrange(len(elements[1::2]))]
-        replacement_values = {'_a{}'.format(i): seq_locals[key]
-                              for i, key in enumerate(elements[1::2])}
 
-        str_to_eval = ''.join(key + '{}' for key in elements[::2])
-        str_to_eval = str_to_eval[:-2]
+def eval_entry(string, seq_locals, missing_locals):
+    """ Evaluate an entry in which variables are referenced using '{' and '}'.
 
-        expr = str_to_eval.format(*replacement_token)
-    else:
-        replacement_values = {}
-        expr = string
+    Parameters
+    ----------
+    string : str
+        Entry to evaluate.
 
-    return eval(expr, globals(), replacement_values)
+    seq_locals : dict
+        Known variables which can be referenced in the entry.
 
+    missing_locals : set
+        Set to which the names of the referenced but unknown variables are
+        added.
+
+    Returns
+    -------
+    value :
+        Result of the evaluation or None if some variables are missing.
 
-def exec_entry(string, seq_locals, missing_locals):
     """
+    code, names = compile_entry(string, 'eval')
+
+    missing = [name for name in names if name not in seq_locals]
+    if missing:
+        missing_locals.update(set(missing))
+        return None
+
+    replacement_values = {'_a{}'.format(i): seq_locals[name]
+                          for i, name in enumerate(names)}
+
+    return eval(code, globals(), replacement_values)
+
+
+def exec_entry(string, seq_locals, missing_locals):
+    """ Execute an entry in which variables are referenced using '{' and '}'.
+
+    Parameters
+    ----------
+    string : str
+        Code to execute.
+
+    seq_locals : dict
+        Known variables which can be referenced in the code.
+
+    missing_locals : set
+        Set to which the names of the referenced but unknown variables are
+        added.
+
+    Returns
+    -------
+    namespace : dict
+        Namespace in which the code was executed or None if some variables are
+        missing.
 
     """
-    aux_strings = string.split('{')
-    if len(aux_strings) > 1:
-        elements = [el for aux in aux_strings
-                    for el in aux.split('}')]
+    code, names = compile_entry(string, 'exec')
 
-        missing = [el for el in elements[1::2] if el not in seq_locals]
-        if missing:
-            missing_locals.update(set(missing))
-            return None
+    missing = [name for name in names if name not in seq_locals]
+    if missing:
+        missing_locals.update(set(missing))
+        return None
 
-        replacement_token = ['_a{}'.format(i)
-                             for i in xrange(len(elements[1::2]))]
-        replacement_values = {'_a{}'.format(i): seq_locals[key]
-                              for i, key in enumerate(elements[1::2])}
+    replacement_values = {'_a{}'.format(i): seq_locals[name]
+                          for i, name in enumerate(names)}
 
-        str_to_eval = ''.join(key + '{}' for key in elements[::2])
-        str_to_eval = str_to_eval[:-2]
+    exec_(code, globals(), replacement_values)
+    return replacement_values
+
+
+#: Maximum number of compiled entries kept in memory.
+ENTRY_CACHE_SIZE = 2048
+
+#: Compiled entries ordered from the least to the most recently used.
+_ENTRY_CACHE = OrderedDict()
+
+#: Lock protecting the access to the cache.
+_ENTRY_CACHE_LOCK = Lock()
+
+
+def compile_entry(string, mode):
+    """ Compile an entry, using the cache if it has already been compiled.
+
+    Parameters
+    ----------
+    string : str
+        Entry in which variables are referenced using '{' and '}'.
+
+    mode : {'eval', 'exec'}
+        Mode in which the entry should be compiled.
+
+    Returns
+    -------
+    code : code
+        Code object in which the referenced variables are replaced by _a0,
+        _a1, ...
 
+    names : tuple
+        Names of the referenced variables, in the order of the replacement
+        tokens.
+
+    """
+    key = (string, mode)
+    with _ENTRY_CACHE_LOCK:
+        compiled = _ENTRY_CACHE.pop(key, None)
+        if compiled is not None:
+            _ENTRY_CACHE[key] = compiled
+            return compiled
+
+    names = tuple(entry_dependencies(string))
+    if names:
+        elements = [el for aux in string.split('{') for el in aux.split('}')]
+        replacement_token = ['_a{}'.format(i) for i in xrange(len(names))]
+        str_to_eval = ''.join(el + '{}' for el in elements[::2])
+        str_to_eval = str_to_eval[:-2]
         expr = str_to_eval.format(*replacement_token)
     else:
-        replacement_values = {}
         expr = string
 
-    exec_(expr, locs=replacement_values)
-    return locals()
+    # Like eval, tolerate leading whitespaces in expressions.
+    if mode == 'eval':
+        expr = expr.lstrip(' \t')
+
+    compiled = (compile(expr, '<entry>', mode), names)
+
+    with _ENTRY_CACHE_LOCK:
+        _ENTRY_CACHE[key] = compiled
+        while len(_ENTRY_CACHE) > ENTRY_CACHE_SIZE:
+            _ENTRY_CACHE.popitem(last=False)
+
+    return compiled
+
+
+def clear_entry_cache():
+    """ Empty the cache of compiled entries.
+
+    """
+    with _ENTRY_CACHE_LOCK:
+        _ENTRY_CACHE.clear()
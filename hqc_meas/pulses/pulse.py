@@ -4,10 +4,13 @@
 # author : Matthieu Dartiailh
 # license : MIT license
 # =============================================================================
-from atom.api import (Instance, Str, Enum, Typed, Property, set_default)
+from atom.api import (Instance, Str, Enum, Typed, Property, Value,
+                      set_default)
+from itertools import chain
 import numpy as np
 
-from hqc_meas.utils.atom_util import member_from_str
+from hqc_meas.utils.atom_util import member_from_str, tagged_members
+from .entry_eval import entry_dependencies
 from .shapes.base_shapes import AbstractShape
 from .shapes.modulation import Modulation
 from item import Item
@@ -60,7 +63,36 @@ class Pulse(Item):
         flag : bool
             Boolean indicating whether or not the evaluation succeeded.
 
+        Notes
+        -----
+        The values of the variables read by the entries are recorded after a
+        successful evaluation. As long as neither the entries nor those values
+        change, the previous results are simply published in the locals and
+        the cached waveform is kept.
+
         """
+        state = self._entries_state()
+        cache = self._eval_cache
+        if cache and cache[0] == state:
+            deps = cache[1]
+        else:
+            cache = None
+            deps = self._entries_dependencies()
+
+        values = None
+        if all(d in sequence_locals for d in deps):
+            values = tuple(sequence_locals[d] for d in deps)
+            if cache and _same_values(cache[2], values):
+                prefix = '{}_'.format(self.index)
+                for name, val in zip(('start', 'duration', 'stop'), cache[3]):
+                    setattr(self, name, val)
+                    root_vars[prefix + name] = val
+                    sequence_locals[prefix + name] = val
+                return True
+
+        self._eval_cache = None
+        self._waveform_cache = None
+
         success = super(Pulse, self).eval_entries(root_vars, sequence_locals,
                                                   missings, errors)
 
@@ -72,6 +104,10 @@ class Pulse(Item):
             success &= self.shape.eval_entries(sequence_locals,
                                                missings, errors, self.index)
 
+        if success and values is not None:
+            times = (self.start, self.duration, self.stop)
+            self._eval_cache = (state, deps, values, times)
+
         return success
 
     @classmethod
@@ -132,6 +168,46 @@ class Pulse(Item):
 
     # --- Private API ---------------------------------------------------------
 
+    #: State of the entries, names and values of the variables they read and
+    #: resulting times recorded during the last successful evaluation.
+    _eval_cache = Value()
+
+    #: Last computed waveform along with the times and sampling it matches.
+    _waveform_cache = Value()
+
+    def _entries_state(self):
+        """ Collect everything besides the variables the evaluation of the
+        entries depends on.
+
+        """
+        context = self.root.context
+        state = [self.index, self.kind, self.def_mode, self.def_1, self.def_2,
+                 context.sampling_time, context.rectify_time]
+        if self.kind == 'Analogical':
+            for obj in (self.modulation, self.shape):
+                state.append(type(obj))
+                if obj is not None:
+                    state.extend(getattr(obj, name)
+                                 for name in sorted(tagged_members(obj,
+                                                                   'pref')))
+        return tuple(state)
+
+    def _entries_dependencies(self):
+        """ Collect the names of the variables read by the entries.
+
+        """
+        entries = [self.def_1, self.def_2]
+        if self.kind == 'Analogical':
+            for obj in (self.modulation, self.shape):
+                if obj is not None:
+                    entries.extend(getattr(obj, name)
+                                   for name in tagged_members(obj, 'pref')
+                                   if isinstance(getattr(obj, name),
+                                                 basestring))
+
+        return tuple(set(chain.from_iterable(entry_dependencies(e)
+                                             for e in entries)))
+
     def _answer(self, members, callables):
         """ Collect the answers for the walk method.
 
@@ -157,11 +233,33 @@ class Pulse(Item):
 
         """
         context = self.root.context
+        key = (self.start, self.stop, context.sampling_time,
+               context.time_unit)
+        if self._waveform_cache and self._waveform_cache[0] == key:
+            return self._waveform_cache[1]
+
         n_points = context.len_sample(self.duration)
         if self.kind == 'Analogical':
             time = np.linspace(self.start, self.stop, n_points, False)
             mod = self.modulation.compute(time, context.time_unit)
             shape = self.shape.compute(time, context.time_unit)
-            return mod*shape
+            waveform = mod*shape
         else:
-            return np.ones(n_points, dtype=np.int8)
+            waveform = np.ones(n_points, dtype=np.int8)
+
+        # The array is shared between compilations so it must not be altered.
+        waveform.flags.writeable = False
+        self._waveform_cache = (key, waveform)
+        return waveform
+
+
+def _same_values(old, new):
+    """ Compare two tuples of variable values.
+
+    Values which cannot be compared (such as arrays) are considered different.
+
+    """
+    try:
+        return bool(old == new)
+    except ValueError:
+        return False
@@ -9,7 +9,7 @@
 from atom.api\
     import (Atom, Str, Int, Instance, Bool, Value, observe, Unicode, List,
             ForwardTyped, Typed, ContainerList, set_default, Callable, Dict,
-            Tuple, Coerced)
+            Tuple, Coerced, Float)
 
 from configobj import Section, ConfigObj
 from inspect import cleandoc
@@ -18,11 +18,13 @@ import os
 import logging
 
 from ..utils.atom_util import member_from_str, tagged_members
+from ..utils.walks import flatten_walk
 from .tools.task_database import TaskDatabase
 from .tools.task_decorator import (make_parallel, make_wait, make_stoppable,
                                    smooth_crash)
 from .tools.string_evaluation import safe_eval
 from .tools.shared_resources import SharedDict, SharedCounter
+from .tools.instr_probing import instr_probe_key, probe_instruments
 
 
 PREFIX = '_a'
@@ -917,6 +919,11 @@ class ComplexTask(BaseTask):
     #: child disabled some access_exs.
     _disabled_exs = List()
 
+    #: Flag indicating that several children are being added or removed at
+    #: once and that the preferences should be registered only once at the
+    #: end of the operation.
+    _delay_preferences = Bool()
+
     # @observe('task_name, task_path, task_depth')
     def _update_paths(self, change):
         """Takes care that the paths, the database and the task names remains
@@ -986,52 +993,66 @@ class ComplexTask(BaseTask):
         """Handle children being added or removed from the task.
 
         """
-        # Do nothing in the absence of a root task.
-        if self.has_root:
-            # The whole list changed.
-            if change['type'] == 'update':
-                added = set(change['value']) - set(change['oldvalue'])
-                removed = set(change['oldvalue']) - set(change['value'])
-                for child in removed:
-                    self._child_removed(child)
-                for child in added:
-                    self._child_added(child)
-
-            # An operation has been performed on the list.
-            elif change['type'] == 'container':
-                op = change['operation']
-
-                # Children have been added
-                if op in ('__iadd__', 'append', 'extend', 'insert'):
-                    if 'item' in change:
-                        self._child_added(change['item'])
-                    if 'items' in change:
-                        for child in change['items']:
-                            self._child_added(child)
-
-                # Children have been removed.
-                elif op in ('__delitem__', 'remove', 'pop'):
-                    if 'item' in change:
-                        self._child_removed(change['item'])
-                    if 'items' in change:
-                        for child in change['items']:
-                            self._child_removed(child)
-
-                # One child was replaced.
-                elif op in ('__setitem__',):
-                    old = change['olditem']
-                    if isinstance(old, list):
-                        for child in old:
-                            self._child_removed(child)
-                    else:
-                        self._child_removed(old)
+        # Do nothing in the absence of a root task or when the list is simply
+        # created.
+        if self.has_root and change['type'] in ('update', 'container'):
+            # Registering the preferences walks the whole hierarchy so do it
+            # only once.
+            self._delay_preferences = True
+            try:
+                self._handle_children_change(change)
+            finally:
+                self._delay_preferences = False
+            self.register_preferences()
+
+    def _handle_children_change(self, change):
+        """Call _child_added and _child_removed according to the change.
 
-                    new = change['newitem']
-                    if isinstance(new, list):
-                        for child in new:
-                            self._child_added(child)
-                    else:
-                        self._child_added(new)
+        """
+        # The whole list changed.
+        if change['type'] == 'update':
+            added = set(change['value']) - set(change['oldvalue'])
+            removed = set(change['oldvalue']) - set(change['value'])
+            for child in removed:
+                self._child_removed(child)
+            for child in added:
+                self._child_added(child)
+
+        # An operation has been performed on the list.
+        elif change['type'] == 'container':
+            op = change['operation']
+
+            # Children have been added
+            if op in ('__iadd__', 'append', 'extend', 'insert'):
+                if 'item' in change:
+                    self._child_added(change['item'])
+                if 'items' in change:
+                    for child in change['items']:
+                        self._child_added(child)
+
+            # Children have been removed.
+            elif op in ('__delitem__', 'remove', 'pop'):
+                if 'item' in change:
+                    self._child_removed(change['item'])
+                if 'items' in change:
+                    for child in change['items']:
+                        self._child_removed(child)
+
+            # One child was replaced.
+            elif op in ('__setitem__',):
+                old = change['olditem']
+                if isinstance(old, list):
+                    for child in old:
+                        self._child_removed(child)
+                else:
+                    self._child_removed(old)
+
+                new = change['newitem']
+                if isinstance(new, list):
+                    for child in new:
+                        self._child_added(child)
+                else:
+                    self._child_added(new)
 
     def _child_added(self, child):
         """Update the database, depth and preferences when a child is added.
@@ -1049,7 +1070,8 @@ class ComplexTask(BaseTask):
         # Ask the child to register in database
         child.register_in_database()
         # Register anew preferences to keep the right ordering for the childs
-        self.register_preferences()
+        if not self._delay_preferences:
+            self.register_preferences()
 
         if child is self._last_removed[0]:
             entries = self._last_removed[1]
@@ -1083,7 +1105,8 @@ class ComplexTask(BaseTask):
                                 self._child_access_exs_changed)
 
         # Update preferences, cleanup database
-        self.register_preferences()
+        if not self._delay_preferences:
+            self.register_preferences()
         child.unregister_from_database()
         child.root_task = None
         child.parent_task = None
@@ -1319,10 +1342,19 @@ class RootTask(ComplexTask):
     threads = Typed(SharedDict, (list,))
 
     #: Dict like object used to store references to used instruments.
-    #: Keys are instrument profile names, values instr instance. Keys are never
-    #: deleted.
+    #: Keys are instrument profile names, values instr instance. Keys are only
+    #: deleted when the connections are closed (see close_instrs).
     instrs = Typed(SharedDict, ())
 
+    #: Pool of connections kept open between measures (see InstrumentPool).
+    #: When set, the connections are taken from it when possible and given
+    #: back to it instead of being closed.
+    instr_pool = Value()
+
+    #: Time (in s) allowed to open the connection to an instrument when
+    #: probing the instruments during the checks.
+    probe_timeout = Float(30.0)
+
     #: Dict like object used to store file handle.
     #: Keys are file handle id as defined by the first user of the file.
     #: Keys can be deleted.
@@ -1358,11 +1390,94 @@ class RootTask(ComplexTask):
             traceback[self.task_path + '/' + self.task_name] =\
                 'The provided default path is not a valid directory'
         self.task_database.set_value('root', 'default_path', self.default_path)
+        if kwargs.get('test_instr'):
+            kwargs['failed_probes'] = self.probe_instruments()
         check = super(RootTask, self).check(*args, **kwargs)
         test = test and check[0]
         traceback.update(check[1])
+        # The measure won't be performed, no need to keep the instruments.
+        if not test:
+            self.close_instrs()
         return test, traceback
 
+    def probe_instruments(self):
+        """ Open concurrently the connections to all the instruments used.
+
+        The (driver, profile) pairs used by the tasks are collected by walking
+        the hierarchy, and the connections not already tested (see the
+        'probed_instrs' runtime entry) are opened in parallel and closed
+        right away. Only the connections taken from the instrument pool are
+        stored in instrs for the tasks to use.
+
+        Returns
+        -------
+        failed : dict
+            Dict {probe key: message} for the connections which could not be
+            opened. The keys are built by instr_probe_key.
+
+        """
+        run_time = self.run_time
+        drivers = run_time.get('drivers', {})
+        profiles = run_time.get('profiles')
+        if not profiles:
+            return {}
+
+        walk = self.walk(callables={'instr_pair': _instr_pair})
+        pairs = flatten_walk(walk, ['instr_pair'])['instr_pair']
+
+        probed = run_time.setdefault('probed_instrs', set())
+        probes = {}
+        pool = self.instr_pool
+        for driver, profile in pairs:
+            if (driver not in drivers or not profiles.get(profile) or
+                    profile in self.instrs):
+                continue
+            key = instr_probe_key(driver, profiles[profile])
+            if pool is not None:
+                instr = pool.acquire(drivers[driver], profile,
+                                     profiles[profile])
+                if instr is not None:
+                    probed.add(key)
+                    self.instrs[profile] = instr
+                    continue
+            if key not in probed:
+                probes[key] = (drivers[driver], profiles[profile])
+
+        opened, failed = probe_instruments(probes, self.probe_timeout)
+        for key, instr in opened.iteritems():
+            probed.add(key)
+            try:
+                instr.close_connection()
+            except Exception:
+                log = logging.getLogger(__name__)
+                mes = 'Failed to close connection to instr:'
+                log.exception(mes)
+
+        return failed
+
+    def close_instrs(self):
+        """ Close the connections to all the instruments stored in instrs.
+
+        If an instrument pool is set, the connections are given back to it
+        instead.
+
+        """
+        instrs = self.instrs
+        pool = self.instr_pool
+        profiles = self.run_time.get('profiles', {})
+        for instr_profile in list(instrs):
+            try:
+                if pool is not None and instr_profile in profiles:
+                    pool.release(instr_profile, profiles[instr_profile],
+                                 instrs[instr_profile])
+                else:
+                    instrs[instr_profile].close_connection()
+            except Exception:
+                log = logging.getLogger(__name__)
+                mes = 'Failed to close connection to instr:'
+                log.exception(mes)
+            del instrs[instr_profile]
+
     @smooth_crash
     def perform(self):
         """ Run sequentially all child tasks, and close ressources.
@@ -1389,14 +1504,7 @@ class RootTask(ComplexTask):
                             log.exception(mes)
 
             # Close connection to all instruments.
-            instrs = self.instrs
-            for instr_profile in instrs:
-                try:
-                    instrs[instr_profile].close_connection()
-                except Exception:
-                    log = logging.getLogger(__name__)
-                    mes = 'Failed to close connection to instr:'
-                    log.exception(mes)
+            self.close_instrs()
 
             # Close all opened files.
             files = self.files
@@ -1454,7 +1562,8 @@ class RootTask(ComplexTask):
         # Ask the child to register in database
         child.register_in_database()
         # Register anew preferences to keep the right ordering for the childs
-        self.register_preferences()
+        if not self._delay_preferences:
+            self.register_preferences()
 
     def _default_task_class(self):
         return ComplexTask.__name__
@@ -1490,6 +1599,17 @@ class RootTask(ComplexTask):
     def _default_resume(self):
         return tEvent()
 
+
+def _instr_pair(task):
+    """ Get the (driver, profile) pair used by a task if any.
+
+    """
+    driver = getattr(task, 'selected_driver', None)
+    profile = getattr(task, 'selected_profile', None)
+    if driver and profile:
+        return (driver, profile)
+
+
 KNOWN_PY_TASKS = [ComplexTask]
 
 TASK_PACKAGES = ['tasks_util', 'tasks_logic']
@@ -12,6 +12,7 @@ from inspect import cleandoc
 from hqc_meas.instruments.driver_tools import (BaseInstrument,
                                                InstrIOError)
 from .base_tasks import SimpleTask
+from .tools.instr_probing import instr_probe_key
 from .task_interface import TaskInterface
 
 
@@ -56,15 +57,29 @@ class InstrumentTask(SimpleTask):
             return False, traceback
 
         if kwargs.get('test_instr') and config:
-            try:
-                instr = driver_class(config)
-                instr.close_connection()
-            except InstrIOError:
+            # Successful probes are recorded in the runtime dependencies so
+            # that the connection to an instrument is tested only once (the
+            # record is sent along the runtime dependencies to the engines).
+            probe = instr_probe_key(self.selected_driver, config)
+            # The root task may already have probed the instruments.
+            failed = kwargs.get('failed_probes', {})
+            if probe in failed:
                 traceback[self.task_path + '/' + self.task_name] =\
-                    cleandoc('''Failed to establish the connection with the
-                              selected instrument''')
+                    failed[probe]
                 return False, traceback
 
+            probed = run_time.setdefault('probed_instrs', set())
+            if probe not in probed:
+                try:
+                    instr = driver_class(config)
+                    instr.close_connection()
+                except InstrIOError:
+                    traceback[self.task_path + '/' + self.task_name] =\
+                        cleandoc('''Failed to establish the connection with
+                                  the selected instrument''')
+                    return False, traceback
+                probed.add(probe)
+
         return True, traceback
 
     def start_driver(self):
@@ -78,7 +93,12 @@ class InstrumentTask(SimpleTask):
         else:
             config = run_time['profiles'][self.selected_profile]
             driver_class = run_time['drivers'][self.selected_driver]
-            self.driver = driver_class(config)
+            pool = self.root_task.instr_pool
+            driver = None
+            if pool is not None:
+                driver = pool.acquire(driver_class, self.selected_profile,
+                                      config)
+            self.driver = driver or driver_class(config)
             instrs[self.selected_profile] = self.driver
 
     def stop_driver(self):
@@ -14,6 +14,7 @@ only to simplify the manager.
 from enaml.widgets.api import FileDialogEx
 
 from hqc_meas.tasks.api import RootTask
+from hqc_meas.utils.atom_util import tagged_members
 from .templates import load_template
 
 import enaml
@@ -80,6 +81,70 @@ def build_task_from_config(config, dep_source, root=False):
         return task_class.build_from_config(config, dep_source)
 
 
+def build_config_snapshot(task):
+    """ Build a compact copy of the config of a task hierarchy.
+
+    The snapshot is made of plain dictionaries, and the values of the task
+    members which are not strings are stored as is rather than as their
+    representation. It can hence be pickled cheaply and the members do not
+    need to be evaluated again when the hierarchy is rebuilt using
+    build_task_from_config.
+
+    Parameters
+    ----------
+    task : BaseTask
+        Task whose hierarchy should be described.
+
+    Returns
+    -------
+    snapshot : dict
+        Config of the hierarchy which can be passed to build_task_from_config.
+
+    """
+    task.update_preferences_from_members()
+    return _task_snapshot(task, task.task_preferences)
+
+
+def _task_snapshot(task, section):
+    """ Build the snapshot of a task from its preferences section.
+
+    """
+    children = {}
+    for name in tagged_members(task, 'child'):
+        child = getattr(task, name)
+        for aux in (child if isinstance(child, list) else [child]):
+            if aux is not None:
+                children[id(aux.task_preferences)] = aux
+
+    snapshot = {}
+    for key, value in section.iteritems():
+        if id(value) in children:
+            snapshot[key] = _task_snapshot(children[id(value)], value)
+        else:
+            snapshot[key] = _plain_copy(value)
+
+    # Strings are kept as such as member_from_str would otherwise evaluate
+    # them when they are stored in a member which is not a string member.
+    for name in tagged_members(task, 'pref'):
+        value = getattr(task, name)
+        if name in snapshot and not isinstance(value, basestring):
+            snapshot[name] = _plain_copy(value)
+
+    return snapshot
+
+
+def _plain_copy(value):
+    """ Recursively convert sections and atom containers to plain containers.
+
+    """
+    # Atom Dict members return proxies which are not Mapping instances.
+    if hasattr(value, 'iteritems'):
+        return {k: _plain_copy(v) for k, v in value.iteritems()}
+    elif isinstance(value, list):
+        return [_plain_copy(v) for v in value]
+    return value
+
+
 def build_root(manager, mode, config=None, parent_ui=None, build_dep=None):
     """ Create a new RootTask.
 
@@ -7,10 +7,12 @@
 """
 """
 import os
+import sys
 import logging
 import enaml
 from importlib import import_module
 from atom.api import (Str, Dict, List, Unicode, Typed, Subclass, Tuple)
+from enaml.application import deferred_call
 
 from watchdog.observers import Observer
 from watchdog.events import (FileSystemEventHandler, FileCreatedEvent,
@@ -19,7 +21,9 @@ from inspect import cleandoc
 from collections import defaultdict
 
 from hqc_meas.utils.has_pref_plugin import HasPrefPlugin
-from hqc_meas.tasks.api import BaseTask, TaskInterface, InterfaceableTaskMixin
+from hqc_meas.utils.discovery import (DiscoveryIndex, LazyObject, LazyDict,
+                                      IndexUpdater, default_index_path)
+from hqc_meas.tasks.api import BaseTask, InterfaceableTaskMixin
 from .filters.api import AbstractTaskFilter, TASK_FILTERS
 from .config.api import (SPECIAL_CONFIG, CONFIG_MAP_VIEW, IniConfigTask,
                          IniView)
@@ -31,6 +35,9 @@ PACKAGE_PATH = os.path.join(os.path.dirname(__file__), '..')
 
 MODULE_ANCHOR = 'hqc_meas'
 
+#: Name of the file in which the content of the tasks packages is indexed.
+INDEX_FILE = 'tasks_index.json'
+
 
 # XXXX Filters and Config being less prone to frequent udpates, no dynamic
 # introspection is performed and the old system using variables defined in
@@ -69,6 +76,12 @@ class TaskManagerPlugin(HasPrefPlugin):
     #: List of names to use when creating a new task.
     auto_task_names = List()
 
+    #: Path to the file in which the content of the tasks packages is
+    #: indexed. Modules already indexed are imported only when first needed.
+    #: By default the index is saved along the preferences (see
+    #: default_index_path).
+    index_path = Unicode().tag(pref=True)
+
     def start(self):
         """ Start the plugin life-cycle.
 
@@ -129,27 +142,31 @@ class TaskManagerPlugin(HasPrefPlugin):
         answer = {}
 
         if not use_class_names:
-            missing_py = set([name for name in tasks
-                              if name not in self._py_tasks.keys()])
+            found, missing_py = self._py_tasks.request(tasks)
             missing_temp = set([name for name in tasks
                                 if name not in self._template_tasks.keys()])
-            missing = list(set.intersection(missing_py, missing_temp))
+            missing = list(set.intersection(set(missing_py), missing_temp))
 
-            answer.update({key: val for key, val in self._py_tasks.iteritems()
-                           if key in tasks})
+            answer.update(found)
 
             answer.update({key: tuple([val] + list(load_template(val)))
                            for key, val in self._template_tasks.iteritems()
                            if key in tasks})
         else:
-            class_names = {val.__name__: val
-                           for val in self._py_tasks.values()}
-
-            missing = [name for name in tasks
-                       if name not in class_names]
-
-            answer.update({key: val for key, val in class_names.iteritems()
-                           if key in tasks})
+            # Tasks added directly to the registry are not in the index.
+            class_names = dict(self._task_class_names)
+            py_tasks = self._py_tasks
+            class_names.update({py_tasks[key].__name__: key
+                                for key in py_tasks
+                                if py_tasks.is_loaded(key)})
+
+            missing = []
+            for name in tasks:
+                task = py_tasks.get(class_names.get(name))
+                if task is None:
+                    missing.append(name)
+                else:
+                    answer[name] = task
 
         return answer, missing
 
@@ -167,11 +184,7 @@ class TaskManagerPlugin(HasPrefPlugin):
             Dict mapping the task class names to their associated views.
 
         """
-        views = self._task_views
-        missing = [t_class for t_class in task_classes
-                   if t_class not in views]
-        return {t_class: view for t_class, view in views.iteritems()
-                if t_class in task_classes}, missing
+        return self._task_views.request(task_classes)
 
     def interfaces_request(self, names, use_i_names=False):
         """ Give acces to interfaces classes.
@@ -197,17 +210,16 @@ class TaskManagerPlugin(HasPrefPlugin):
             t_names = self._task_interfaces
             missing = [task for task in names
                        if task not in t_names]
-            return {name: [known_interfaces[i_name]
-                           for i_name in t_names[name]]
-                    for name in t_names if name in names}, missing
+            answer = {}
+            for name in t_names:
+                if name in names:
+                    found, _ = known_interfaces.request(t_names[name])
+                    answer[name] = [found[i_name] for i_name in t_names[name]
+                                    if i_name in found]
+            return answer, missing
 
         else:
-            missing = [interface for interface in names
-                       if interface not in self._interfaces]
-
-            return {interface: i_class
-                    for interface, i_class in known_interfaces.iteritems()
-                    if interface in names}, missing
+            return known_interfaces.request(names)
 
     def interface_views_request(self, interface_classes):
         """ Give acces to task views.
@@ -223,11 +235,7 @@ class TaskManagerPlugin(HasPrefPlugin):
             Dict mapping the task class names to their associated views.
 
         """
-        views = self._interface_views
-        missing = [i_class for i_class in interface_classes
-                   if i_class not in views]
-        return {i_class: view for i_class, view in views.iteritems()
-                if i_class in interface_classes}, missing
+        return self._interface_views.request(interface_classes)
 
     def filter_tasks(self, filter):
         """ Filter the known tasks using the specified filter.
@@ -306,23 +314,29 @@ class TaskManagerPlugin(HasPrefPlugin):
         return self._failed
 
     # --- Private API ---------------------------------------------------------
-    #: Tasks implemented in Python
-    _py_tasks = Dict(Str(), Subclass(BaseTask))
+    #: Tasks implemented in Python (imported on first access).
+    _py_tasks = Typed(LazyDict, ())
+
+    #: Mapping between the class names of the python tasks and their names.
+    _task_class_names = Dict(Str(), Str())
 
     #: Template tasks (store full path to .ini)
     _template_tasks = Dict(Str(), Unicode())
 
-    #: Tasks views (task_class: view)
-    _task_views = Dict(Str())
+    #: Tasks views (task_class: view) (imported on first access).
+    _task_views = Typed(LazyDict, ())
 
     #: Dict linking task to their interfaces.
     _task_interfaces = Dict(Str(), List())
 
-    #: Interfaces
-    _interfaces = Dict(Str(), Subclass(TaskInterface))
+    #: Interfaces (imported on first access).
+    _interfaces = Typed(LazyDict, ())
+
+    #: Interfaces views (imported on first access).
+    _interface_views = Typed(LazyDict, ())
 
-    #: Interfaces views
-    _interface_views = Dict(Str())
+    #: Index of the content of the explored modules.
+    _index = Typed(DiscoveryIndex)
 
     #: Task filters
     _filters = Dict(Str(), Subclass(AbstractTaskFilter), TASK_FILTERS)
@@ -365,6 +379,10 @@ class TaskManagerPlugin(HasPrefPlugin):
         """
         path = PACKAGE_PATH
         failed = {}
+        if self._index is None:
+            index_path = (self.index_path or
+                          default_index_path(self.workbench, INDEX_FILE))
+            self._index = DiscoveryIndex(index_path)
 
         modules, v_modules = self._explore_package('tasks', path, failed)
 
@@ -397,50 +415,39 @@ class TaskManagerPlugin(HasPrefPlugin):
                 if pack in self.tasks_loading:
                     tasks_packages.remove(pack)
 
-        tasks = self._validate_interfaceable_tasks(tasks, failed)
+        self._index.save()
 
         # Map between task class name and formatted name.
-        aux_task_map = {v.__name__: k for k, v in tasks.iteritems()}
+        aux_task_map = {v[0]: k for k, v in tasks.iteritems()}
 
         # Keeping only the tasks with valid views.
-        valid_tasks = {k: tasks[k] for name, k in aux_task_map.iteritems()
+        valid_tasks = {k: tasks[k][1] for name, k in aux_task_map.iteritems()
                        if name in views}
         valid_views = {k: v for k, v in views.iteritems()
                        if k in aux_task_map or k == 'RootTask'}
 
         valid_interfaces = {k: [i for i in v
-                                if not i.has_view
-                                or i.__name__ in interface_views]
+                                if not i[1] or i[0] in interface_views]
                             for k, v in interfaces.iteritems()
                             }
 
-        self._py_tasks = valid_tasks
-        self._task_views = valid_views
-        self._task_interfaces = {k: [i.__name__ for i in v]
+        self._py_tasks = LazyDict(valid_tasks)
+        self._task_class_names = {name: k
+                                  for name, k in aux_task_map.iteritems()
+                                  if k in valid_tasks}
+        self._task_views = LazyDict(valid_views)
+        self._task_interfaces = {k: [i[0] for i in v]
                                  for k, v in valid_interfaces.iteritems()}
-        self._interfaces = {i.__name__: i for v in valid_interfaces.values()
-                            for i in v}
-        self._interface_views = interface_views
+        self._interfaces = LazyDict((i[0], i[2])
+                                    for v in valid_interfaces.values()
+                                    for i in v)
+        self._interface_views = LazyDict(interface_views)
         self.tasks = (list(valid_tasks.keys()) +
                       list(self._template_tasks.keys()))
 
         self._failed = failed
         # TODO do something with failed
 
-    def _validate_interfaceable_tasks(self, tasks, failed):
-        """ Check that the mixin InterfaceableTaskMixin never appear twice.
-
-        """
-        for name, task in tasks.iteritems():
-            if issubclass(task, InterfaceableTaskMixin):
-                ancestors = type(self).mro()
-                if ancestors.count(InterfaceableTaskMixin) > 1:
-                    failed[name] = cleandoc('''Task cannot inherit
-                        multiple times from InterfaceableTaskMixin''')
-                    del tasks[name]
-
-        return tasks
-
     def _refresh_filters(self):
         """ Place holder for a future filter discovery function
 
@@ -540,16 +547,20 @@ class TaskManagerPlugin(HasPrefPlugin):
                          prefix):
         """ Explore a list of modules, looking for tasks.
 
+        Modules whose content is known from the index are not imported.
+
         Parameters
         ----------
         modules : list
             The list of modules to explore
 
         tasks : dict
-            A dict in which discovered tasks will be stored.
+            A dict in which discovered tasks will be stored as
+            (class name, class or LazyObject).
 
         interfaces : dict
-            A dict in which discovered interfaces will be stored.
+            A dict in which discovered interfaces will be stored as
+            (class name, has_view, class or LazyObject).
 
         packages : list
             A list in which discovered packages will be stored.
@@ -562,30 +573,39 @@ class TaskManagerPlugin(HasPrefPlugin):
 
         """
         for mod in modules:
-            try:
-                m = import_module('.' + mod, MODULE_ANCHOR)
-            except Exception as e:
-                log = logging.getLogger(__name__)
-                mess = 'Failed to import {} : {}'.format(mod, e)
-                log.error(mess)
-                failed[mod] = mess
+            exports, m = self._module_exports(mod, '.py', failed,
+                                              self._describe_tasks_module)
+            if exports is None:
                 continue
 
-            if hasattr(m, 'KNOWN_PY_TASKS'):
-                tasks.update({self._normalise_name(task.__name__): task
-                              for task in m.KNOWN_PY_TASKS})
-
-            if hasattr(m, 'INTERFACES'):
-                for k, v in m.INTERFACES.iteritems():
-                    interfaces[k].extend(v)
-
-            if hasattr(m, 'TASK_PACKAGES'):
-                packs = [prefix + '.' + pack for pack in m.TASK_PACKAGES]
-                packages.extend(packs)
+            # The tasks are validated when describing the module so that the
+            # tasks known from the index are validated too.
+            invalid = exports.get('invalid_tasks', [])
+            for i, (name, class_name) in enumerate(exports['tasks']):
+                if name in invalid:
+                    failed[name] = cleandoc('''Task cannot inherit
+                        multiple times from InterfaceableTaskMixin''')
+                    continue
+                task = (m.KNOWN_PY_TASKS[i] if m else
+                        LazyObject(_absolute_name(mod), 'KNOWN_PY_TASKS',
+                                   (i,)))
+                tasks[name] = (class_name, task)
+
+            for k, v in exports['interfaces'].iteritems():
+                for i, (i_name, has_view) in enumerate(v):
+                    interface = (m.INTERFACES[k][i] if m else
+                                 LazyObject(_absolute_name(mod), 'INTERFACES',
+                                            (k, i)))
+                    interfaces[k].append((i_name, has_view, interface))
+
+            packs = [prefix + '.' + pack for pack in exports['packages']]
+            packages.extend(packs)
 
     def _explore_views(self, modules, views, interface_views, failed):
         """ Explore a list of modules, looking for views.
 
+        Modules whose content is known from the index are not imported.
+
         Parameters
         ----------
         modules : list
@@ -602,21 +622,98 @@ class TaskManagerPlugin(HasPrefPlugin):
 
         """
         for mod in modules:
-            try:
-                with enaml.imports():
-                    m = import_module('.' + mod, MODULE_ANCHOR)
-            except Exception as e:
-                log = logging.getLogger(__name__)
-                mess = 'Failed to import {} : {}'.format(mod, e)
-                log.error(mess)
-                failed[mod] = mess
+            exports, m = self._module_exports(mod, '.enaml', failed,
+                                              self._describe_views_module)
+            if exports is None:
                 continue
 
-            if hasattr(m, 'TASK_VIEW_MAPPING'):
-                views.update(m.TASK_VIEW_MAPPING)
+            for name in exports['views']:
+                views[name] = (
+                    m.TASK_VIEW_MAPPING[name] if m else
+                    LazyObject(_absolute_name(mod), 'TASK_VIEW_MAPPING',
+                               (name,)))
+
+            for name in exports['interface_views']:
+                interface_views[name] = (
+                    m.INTERFACE_VIEW_MAPPING[name] if m else
+                    LazyObject(_absolute_name(mod), 'INTERFACE_VIEW_MAPPING',
+                               (name,)))
+
+    def _module_exports(self, mod, suffix, failed, describe):
+        """ Get the description of the content of a module.
+
+        Parameters
+        ----------
+        mod : str
+            Name of the module relative to the MODULE_ANCHOR.
+
+        suffix : {'.py', '.enaml'}
+            Extension of the module file.
+
+        failed : dict
+            A dict in which failed imports will be stored.
+
+        describe : callable
+            Function returning the exports of an imported module.
+
+        Returns
+        -------
+        exports : dict or None
+            Description of the module exports, None if the import failed.
+
+        module : module or None
+            The module if it had to be imported.
+
+        """
+        mod_path = os.path.realpath(os.path.join(PACKAGE_PATH, '..',
+                                                 *mod.split('.'))) + suffix
+        exports = self._index.get(_absolute_name(mod), mod_path)
+        if exports is not None:
+            return exports, None
+
+        # A module imported before may not match its file anymore.
+        up_to_date = _absolute_name(mod) not in sys.modules
+        try:
+            with enaml.imports():
+                m = import_module('.' + mod, MODULE_ANCHOR)
+        except Exception as e:
+            log = logging.getLogger(__name__)
+            mess = 'Failed to import {} : {}'.format(mod, e)
+            log.error(mess)
+            failed[mod] = mess
+            return None, None
+
+        exports = describe(m)
+        if up_to_date:
+            self._index.update(_absolute_name(mod), mod_path, exports)
+        return exports, m
+
+    def _describe_tasks_module(self, m):
+        """ Describe the tasks, interfaces and packages declared by a module.
+
+        The tasks inheriting multiple times from InterfaceableTaskMixin are
+        listed as invalid.
+
+        """
+        interfaces = getattr(m, 'INTERFACES', {})
+        tasks = getattr(m, 'KNOWN_PY_TASKS', [])
+        return {'tasks': [(self._normalise_name(task.__name__), task.__name__)
+                          for task in tasks],
+                'invalid_tasks': [self._normalise_name(task.__name__)
+                                  for task in tasks
+                                  if _inherits_mixin_twice(task)],
+                'interfaces': {k: [(i.__name__, bool(i.has_view)) for i in v]
+                               for k, v in interfaces.iteritems()},
+                'packages': list(getattr(m, 'TASK_PACKAGES', []))}
+
+    @staticmethod
+    def _describe_views_module(m):
+        """ Describe the views declared by an enaml module.
 
-            if hasattr(m, 'INTERFACE_VIEW_MAPPING'):
-                interface_views.update(m.INTERFACE_VIEW_MAPPING)
+        """
+        return {'views': list(getattr(m, 'TASK_VIEW_MAPPING', {})),
+                'interface_views': list(getattr(m, 'INTERFACE_VIEW_MAPPING',
+                                                {}))}
 
     def _bind_observers(self):
         """ Setup the observers for the plugin.
@@ -627,6 +724,8 @@ class TaskManagerPlugin(HasPrefPlugin):
             handler = _FileListUpdater(self._refresh_template_tasks)
             self._observer.schedule(handler, folder, recursive=True)
 
+        self._schedule_index_updater()
+
         self._observer.start()
         self.observe('tasks_loading', self._update_tasks)
         self.observe('views_loading', self._update_tasks)
@@ -662,6 +761,17 @@ class TaskManagerPlugin(HasPrefPlugin):
             handler = _FileListUpdater(self._refresh_template_tasks)
             self._observer.schedule(handler, folder, recursive=True)
 
+        self._schedule_index_updater()
+
+    def _schedule_index_updater(self):
+        """ Watch the tasks package to keep the index up to date.
+
+        """
+        handler = IndexUpdater(self._index,
+                               lambda: deferred_call(self._refresh_tasks))
+        self._observer.schedule(handler, os.path.realpath(PACKAGE_PATH),
+                                recursive=True)
+
     @staticmethod
     def _normalise_name(name):
         """Normalize names by replacing '_' by spaces, removing the extension,
@@ -716,3 +826,21 @@ class _FileListUpdater(FileSystemEventHandler):
         super(_FileListUpdater, self).on_deleted(event)
         if isinstance(event, FileMovedEvent):
             self.handler()
+
+
+def _inherits_mixin_twice(task):
+    """ Check whether a task inherits multiple times from
+    InterfaceableTaskMixin, ie if several of its ancestors declare it as a
+    base.
+
+    """
+    ancestors = [c for c in task.mro()
+                 if InterfaceableTaskMixin in c.__bases__]
+    return len(ancestors) > 1
+
+
+def _absolute_name(mod):
+    """ Get the absolute name of a module given relative to MODULE_ANCHOR.
+
+    """
+    return MODULE_ANCHOR + '.' + mod
@@ -237,10 +237,9 @@ class PNASinglePointMeasureTask(SingleChannelPNATask):
                 self.channel_driver.sweep_mode = 'CONTinuous'
 
         if self.if_bandwidth < 5:
-            self.driver.fire_trigger(self.channel)
-            time.sleep(waiting_time)
-            while not self.driver.check_operation_completion():
-                time.sleep(0.1*waiting_time)
+            operation = self.driver.fire_trigger(self.channel, waiting_time)
+            if not operation.result(stop=self.root_task.should_stop):
+                return
         else:
             time.sleep(waiting_time)
 
@@ -370,18 +369,24 @@ class PNASweepTask(SingleChannelPNATask):
                                                   start, stop, points)
 
         waiting_time = self.channel_driver.sweep_time
-        self.driver.fire_trigger(self.channel)
-        time.sleep(waiting_time)
-        while not self.driver.check_operation_completion():
-            time.sleep(0.1*waiting_time)
+        operation = self.driver.fire_trigger(self.channel, waiting_time)
+        if not operation.result(stop=self.root_task.should_stop):
+            return
+
+        # Read the formatted and raw measures, each in a single transfer.
+        numbers = self.channel_driver.measure_numbers
+        read = {}
+        for formatted in (True, False):
+            indexes = [i for i, measure in enumerate(self.measures)
+                       if bool(measure[1]) == formatted]
+            if indexes:
+                meas_numbers = [numbers[meas_names[i]] for i in indexes]
+                read.update(zip(indexes,
+                                self.channel_driver.read_multiple_data(
+                                    meas_numbers, formatted)))
 
         data = [np.linspace(start, stop, points)]
-        for i, meas_name in enumerate(meas_names):
-            if self.measures[i][1]:
-                data.append(
-                    self.channel_driver.read_formatted_data(meas_name))
-            else:
-                data.append(self.channel_driver.read_raw_data(meas_name))
+        data.extend(read[i] for i in range(len(meas_names)))
 
         names = [self.sweep_type] + ['_'.join(measure)
                                      for measure in self.measures]
@@ -438,79 +443,223 @@ class PNAGetTraces(InstrumentTask):
     ch1,tr1;ch2,tr2;ch3,tr3;...
     ex: 1,1;1,3 for ch1, tr1 and ch1, tr3
 
+    In batched mode, the averaging is run on all the channels at once and all
+    the traces are read in a single query. The data are then stored as one
+    structured array per channel (keyed by the channel number) instead of one
+    per trace.
+
     """
 
     tracelist = Str('1,1').tag(pref=True)
     already_measured = Bool(False).tag(pref=True)
+    batched = Bool(False).tag(pref=True)
 
     driver_list = ['AgilentPNA']
     task_database_entries = set_default({'sweep_data': {}})
 
     def perform(self):
-        traces = self.tracelist.split(';')
         if not self.driver:
             self.start_driver()
 
+        channels = self._parse_tracelist()
+        self._check_traces(channels)
+        if self.batched:
+            self._perform_batched(channels)
+            return
+
         tr_data = {}
 
         if not self.already_measured:
             for i in range(1,30):
                 if str(i)+',' in self.tracelist:
-                    self.average_channel(i)
+                    if not self.average_channel(i):
+                        return
 
-        for trace in traces:
-            c_nb, t_nb = trace.split(',')
-            tr_data[trace] = self.get_trace(int(c_nb), int(t_nb))
+        # Read the traces of each channel in a single transfer.
+        for c_nb, c_traces in channels.iteritems():
+            channel_driver = self.driver.get_channel(c_nb)
+            raw_data = channel_driver.read_multiple_data(
+                [t_nb for t_nb, _ in c_traces])
+            for (t_nb, trace), data in zip(c_traces, raw_data):
+                tr_data[trace] = self.get_trace(c_nb, t_nb, data)
 
         self.write_in_database('sweep_data', tr_data)
 
     def average_channel(self, channelnb):
         """ Performs the averaging of a channel
 
+        Returns
+        -------
+        completed : bool
+            False if the measure was stopped during the averaging.
+
         """
         channel_driver = self.driver.get_channel(channelnb)
-        channel_driver.run_averaging()
+        return channel_driver.run_averaging(stop=self.root_task.should_stop)
 
-    def get_trace(self, channelnb, tracenb):
+    def get_trace(self, channelnb, tracenb, raw_data=None):
         """ Get the trace that is displayed right now (no new acquisition)
         on channel and tracenb.
 
-        """
+        Parameters
+        ----------
+        raw_data : numpy.array, optional
+            Raw data of the trace if already read.
 
+        """
         channel_driver = self.driver.get_channel(channelnb)
-
-        try:
-            channel_driver.tracenb = tracenb
-        except:
-            raise ValueError(cleandoc('''The trace {} does not exist on channel
-                                      {}: '''.format(tracenb, channelnb)))
-
-        measname = channel_driver.selected_measure
         data = channel_driver.sweep_x_axis
-        complexdata = channel_driver.read_raw_data(measname)* \
-                np.exp(2*np.pi*1j*data*channel_driver.electrical_delay)
-        aux = [data, complexdata.real, complexdata.imag,
-                np.absolute(complexdata),
-                np.unwrap(np.angle(complexdata))]
+        measname, aux = self._corrected_trace(channel_driver, channelnb,
+                                              tracenb, data, raw_data)
+
+        return np.rec.fromarrays([data] + aux,
+                                 names=['Freq (GHz)', measname+' real',
+                                        measname+' imag',  measname+' abs',
+                                        measname+' phase'])
+
+    def get_channel_traces(self, channelnb, tracenbs, raw_data):
+        """ Build the structured array holding several traces of a channel.
+
+        Parameters
+        ----------
+        channelnb : int
+            Number of the channel.
+        tracenbs : list(int)
+            Numbers of the traces.
+        raw_data : list(numpy.array)
+            Raw data of the traces.
 
-        return np.rec.fromarrays(aux, names=['Freq (GHz)', measname+' real',
-                    measname+' imag',  measname+' abs',  measname+' phase' ])
+        """
+        channel_driver = self.driver.get_channel(channelnb)
+        data = channel_driver.sweep_x_axis
+        arrays = [data]
+        names = ['Freq (GHz)']
+        for tracenb, trace_data in zip(tracenbs, raw_data):
+            measname, aux = self._corrected_trace(channel_driver, channelnb,
+                                                  tracenb, data, trace_data)
+            # Measures sharing a name are told apart by their trace number.
+            if measname+' real' in names:
+                measname = '{} ({})'.format(measname, tracenb)
+            arrays.extend(aux)
+            names.extend([measname+' real', measname+' imag',
+                          measname+' abs', measname+' phase'])
+
+        return np.rec.fromarrays(arrays, names=names)
 
     def check(self, *args, **kwargs):
         """
         """
         test, traceback = super(PNAGetTraces, self).check(*args, **kwargs)
 
-        traces = self.tracelist.split(';')
+        try:
+            channels = self._parse_tracelist()
+        except ValueError:
+            test = False
+            traceback[self.task_path + '/' + self.task_name + '-traces'] = \
+                'Invalid trace list {}'.format(self.tracelist)
+            return test, traceback
+
+        if self.batched:
+            keys = [str(c_nb) for c_nb in channels]
+        else:
+            keys = [trace for c_traces in channels.values()
+                    for _, trace in c_traces]
         sweep_data = {}
-        for trace in traces:
+        for key in keys:
             data = [np.array([0.0, 1.0]), np.array([1.0, 2.0])]
-            sweep_data[trace] = np.rec.fromarrays(data, names=['a', 'b'])
+            sweep_data[key] = np.rec.fromarrays(data, names=['a', 'b'])
 
         self.write_in_database('sweep_data', sweep_data)
         return test, traceback
 
+    # --- Private API ---------------------------------------------------------
+
+    def _parse_tracelist(self):
+        """ Parse the list of traces.
+
+        Returns
+        -------
+        channels : dict
+            Dict {channel number: [(trace number, trace string), ...]}, a
+            trace appearing several times is listed once.
 
+        """
+        channels = {}
+        for trace in self.tracelist.split(';'):
+            c_nb, t_nb = trace.split(',')
+            c_traces = channels.setdefault(int(c_nb), [])
+            if int(t_nb) not in [t for t, _ in c_traces]:
+                c_traces.append((int(t_nb), trace))
+        return channels
+
+    def _check_traces(self, channels):
+        """ Check that the traces to read exist before reading them.
+
+        Raises
+        ------
+        ValueError
+            If a trace does not exist on its channel.
+
+        """
+        for c_nb, c_traces in channels.iteritems():
+            channel_driver = self.driver.get_channel(c_nb)
+            numbers = []
+            if channel_driver is not None:
+                numbers = channel_driver.measure_numbers.values()
+            for t_nb, _ in c_traces:
+                if t_nb not in numbers:
+                    raise ValueError(cleandoc('''The trace {} does not exist on
+                                              channel {}: '''.format(t_nb,
+                                                                     c_nb)))
+
+    def _perform_batched(self, channels):
+        """ Average all the channels at once and read all the traces in a
+        single query.
+
+        """
+        if not self.already_measured:
+            stop = self.root_task.should_stop
+            if not self.driver.average_channels(sorted(channels), stop=stop):
+                return
+
+        numbers = {c_nb: [t_nb for t_nb, _ in c_traces]
+                   for c_nb, c_traces in channels.iteritems()}
+        raw_data = self.driver.read_channels_data(numbers)
+
+        sweep_data = {}
+        for c_nb, t_nbs in numbers.iteritems():
+            sweep_data[str(c_nb)] = self.get_channel_traces(c_nb, t_nbs,
+                                                            raw_data[c_nb])
+
+        self.write_in_database('sweep_data', sweep_data)
+
+    @staticmethod
+    def _corrected_trace(channel_driver, channelnb, tracenb, freq,
+                         raw_data=None):
+        """ Select a trace and correct its data from the electrical delay.
+
+        Returns
+        -------
+        measname : str
+            Name of the measure displayed by the trace.
+        arrays : list
+            Real part, imaginary part, modulus and phase of the data.
+
+        """
+        try:
+            channel_driver.tracenb = tracenb
+        except:
+            raise ValueError(cleandoc('''The trace {} does not exist on channel
+                                      {}: '''.format(tracenb, channelnb)))
+
+        measname = channel_driver.selected_measure
+        if raw_data is None:
+            raw_data = channel_driver.read_raw_data(measname)
+        complexdata = raw_data* \
+            np.exp(2*np.pi*1j*freq*channel_driver.electrical_delay)
+        return measname, [complexdata.real, complexdata.imag,
+                          np.absolute(complexdata),
+                          np.unwrap(np.angle(complexdata))]
 
 
 KNOWN_PY_TASKS = [PNASinglePointMeasureTask,
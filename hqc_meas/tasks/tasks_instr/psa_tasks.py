@@ -48,7 +48,10 @@ class PSAGetTrace(InstrumentTask):
                                    d.sweep_points_SA, sweep_modes[self.mode])
 
         self.write_in_database('psa_config', psa_config)
-        self.write_in_database('trace_data', self.driver.read_data(self.trace))
+        data = self.driver.read_data(self.trace, self.root_task.should_stop)
+        if data is None:
+            return
+        self.write_in_database('trace_data', data)
 
     def check(self, *args, **kwargs):
         """
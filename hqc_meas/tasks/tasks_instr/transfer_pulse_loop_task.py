@@ -116,17 +116,35 @@ class TransferPulseLoopTask(InterfaceableTaskMixin, InstrumentTask):
         """Compile the sequence.
 
         """
+        values = self.evaluate_sequence_vars(loop_names, value)
+        for k, v in values.items():
+            self.sequence.external_vars[k] = v
+        return self.sequence.compile_sequence()
+
+    def iter_compile_sequences(self, loop_names, variables):
+        """Compile the sequence for the points of the loop one at a time.
+
+        """
+        vars_sets = (self.evaluate_sequence_vars(loop_names, value)
+                     for value in variables)
+        return self.sequence.iter_compile_sequences(vars_sets)
+
+    def evaluate_sequence_vars(self, loop_names, value):
+        """Evaluate the sequence variables for a point of the loop.
+
+        """
+        values = {}
         for k, v in self.sequence_vars.items():
             if np.size(value) == 1:
                 if loop_names[0] in v:
-                    v = v.replace(loop_names[0], str(value))   
+                    v = v.replace(loop_names[0], str(value))
             else:
                 for p in range(np.size(value)):
                     if loop_names[p] in v:
-                        v = v.replace(loop_names[p], value[p])
-                        
-            self.sequence.external_vars[k] = self.format_and_eval_string(v)
-        return self.sequence.compile_sequence()
+                        v = v.replace(loop_names[p], str(value[p]))
+
+            values[k] = self.format_and_eval_string(v)
+        return values
 
     def answer(self, members, callables):
         """Overriden method to take into account the presence of the sequence.
@@ -228,30 +246,24 @@ class AWGTransferLoopInterface(InstrTaskInterface):
             else:
                 task.driver.internal_trigger = 'EXT'
         
-        for i in range(0, Nwaveforms):
-            seq_name = task.format_string(self.sequence_name) if self.sequence_name else 'Sequence'
-            seq_name_iter = seq_name + '_' + str(int(i))
-            res, seqs = task.compile_sequence(loop_names, variables[i])
+        seq_name = (task.format_string(self.sequence_name)
+                    if self.sequence_name else 'Sequence')
+        # Names under which the waveforms of each channel are stored. Non
+        # loopable channels reuse the waveform of the first element. Each
+        # point is transferred as soon as it is compiled.
+        names = {}
+        compiled = task.iter_compile_sequences(loop_names, variables)
+        for i, (res, seqs) in enumerate(compiled):
             if not res:
-                mess = 'Failed to compile the pulse sequence: missing {}, errs {}'
-                raise RuntimeError(mess.format(*seqs))
-    
+                mess = 'Failed to compile the pulse sequence for point {}: {}'
+                raise RuntimeError(mess.format(i, seqs))
             for ch_id in task.driver.defined_channels:
-                if ch_id in seqs and i == 0:
-                     task.driver.to_send(seq_name_iter 
-                                     + '_Ch{}'.format(ch_id), seqs[ch_id], False)
-                     task.driver.set_sequence_pos(seq_name_iter 
-                                     + '_Ch{}'.format(ch_id), ch_id, i +1)
-
-                elif ch_id in seqs and ch_id in loopable_ch:
-                    task.driver.to_send(seq_name_iter 
-                                    + '_Ch{}'.format(ch_id), seqs[ch_id], False)
-                    task.driver.set_sequence_pos(seq_name_iter 
-                                    + '_Ch{}'.format(ch_id), ch_id, i + 1)
-                elif ch_id in seqs:
-                    task.driver.set_sequence_pos(seq_name + '_' + str(0) 
-                                + '_Ch{}'.format(ch_id), ch_id, i +1)           
-      
+                if ch_id in seqs and (i == 0 or ch_id in loopable_ch):
+                    names[ch_id] = task.driver.send_waveform(
+                        seq_name + '_Ch{}'.format(ch_id), seqs[ch_id])
+                if ch_id in seqs:
+                    task.driver.set_sequence_pos(names[ch_id], ch_id, i + 1)
+
             index_start = (i + 1)
             index_stop = (i + 1) % Nwaveforms + 1
             task.driver.set_goto_pos(index_start, index_stop)
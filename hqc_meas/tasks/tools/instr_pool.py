@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# module : instr_pool.py
+# author : Matthieu Dartiailh
+# license : MIT license
+# =============================================================================
+""" Pool keeping the connections to the instruments open between measures.
+
+"""
+from threading import Lock
+import logging
+import time
+
+from .instr_probing import instr_probe_key
+
+
+class InstrumentPool(object):
+    """ Pool of open instrument connections shared by successive measures.
+
+    At the end of a measure, the root task gives back its connections to the
+    pool instead of closing them, and the next measure using the same profile
+    with the same driver and connection infos reuses them. Only the profiles
+    granted by the instrument manager to the current measure can be reused :
+    the connections to the other profiles are closed when a measure starts
+    (see retain), or as soon as the profiles are released by the main process
+    (see discard).
+
+    Before being reused a connection is checked : it must still be connected
+    and, unless check_connection reports that the cache of the driver is not
+    corrupted, the cache is cleared. The owner of the driver is reset. The
+    same is done for its sub-drivers (stored in a channels dict by the drivers
+    of multi-channel instruments) which are kept along the connection.
+
+    Parameters
+    ----------
+    max_idle : float, optional
+        Time in seconds after which an unused connection is closed.
+
+    """
+
+    def __init__(self, max_idle=300.):
+        self.max_idle = max_idle
+        self._idle = {}
+        self._lock = Lock()
+
+    def acquire(self, driver_class, profile, config):
+        """ Get an open connection to an instrument.
+
+        Parameters
+        ----------
+        driver_class : type
+            Class of the driver used to connect to the instrument.
+
+        profile : str
+            Name of the profile of the instrument.
+
+        config : dict
+            Connection infos of the instrument.
+
+        Returns
+        -------
+        instr : BaseInstrument or None
+            Open connection or None if there is no (valid) connection in the
+            pool.
+
+        """
+        key = instr_probe_key(driver_class, config)
+        with self._lock:
+            entry = self._idle.get(profile)
+            if entry is None or entry[0] != key:
+                return None
+            del self._idle[profile]
+
+        instr = entry[1]
+        if not self._check(instr):
+            self._close(instr)
+            return None
+        return instr
+
+    def release(self, profile, config, instr):
+        """ Give back a connection to the pool.
+
+        A connection previously stored for the same profile is closed.
+
+        """
+        key = instr_probe_key(type(instr), config)
+        with self._lock:
+            old = self._idle.get(profile)
+            self._idle[profile] = (key, instr, time.time())
+        if old is not None and old[1] is not instr:
+            self._close(old[1])
+
+    def retain(self, profiles):
+        """ Close the connections which cannot be used anymore.
+
+        Parameters
+        ----------
+        profiles : iterable
+            Profiles granted to the next measure, the connections to the other
+            profiles are closed.
+
+        """
+        profiles = set(profiles)
+        self._evict(lambda profile, entry: profile not in profiles)
+
+    def discard(self, profiles):
+        """ Close the connections to some profiles.
+
+        Parameters
+        ----------
+        profiles : iterable
+            Profiles which are not granted to the measures anymore.
+
+        """
+        profiles = set(profiles)
+        self._evict(lambda profile, entry: profile in profiles)
+
+    def evict_idle(self):
+        """ Close the connections unused for more than max_idle seconds.
+
+        """
+        limit = time.time() - self.max_idle
+        self._evict(lambda profile, entry: entry[2] < limit)
+
+    def close_all(self):
+        """ Close all the connections of the pool.
+
+        """
+        self._evict(lambda profile, entry: True)
+
+    def __len__(self):
+        return len(self._idle)
+
+    # --- Private API ---------------------------------------------------------
+
+    def _evict(self, predicate):
+        """ Close the connections for which predicate(profile, entry) is true.
+
+        """
+        with self._lock:
+            evicted = [(p, e) for p, e in self._idle.items()
+                       if predicate(p, e)]
+            for profile, _ in evicted:
+                del self._idle[profile]
+
+        for _, entry in evicted:
+            self._close(entry[1])
+
+    @staticmethod
+    def _check(instr):
+        """ Check that a connection can be reused, clearing the caches if they
+        may be corrupted.
+
+        Drivers which do not implement connected are assumed to be connected.
+        Any error raised while checking the connection (not only InstrError,
+        VisaIOError for example) means that it cannot be reused.
+
+        """
+        try:
+            if not _optional_call(instr.connected, True):
+                return False
+            corrupted = _optional_call(instr.check_connection, True)
+        except Exception:
+            logger = logging.getLogger(__name__)
+            logger.debug('Failed to check connection to instr:',
+                         exc_info=True)
+            return False
+
+        drivers = [instr] + list(getattr(instr, 'channels', {}).values())
+        for driver in drivers:
+            if corrupted is not False:
+                driver.clear_cache()
+            driver.owner = ''
+        return True
+
+    @staticmethod
+    def _close(instr):
+        """ Close a connection, logging any failure.
+
+        """
+        try:
+            instr.close_connection()
+        except Exception:
+            logger = logging.getLogger(__name__)
+            logger.exception('Failed to close connection to instr:')
+
+
+def _optional_call(method, default):
+    """ Call a method which drivers are not required to implement.
+
+    """
+    try:
+        return method()
+    except NotImplementedError:
+        return default
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# module : instr_probing.py
+# author : Matthieu Dartiailh
+# license : MIT license
+# =============================================================================
+""" Tools used to test the connection to the instruments before a measure.
+
+"""
+from threading import Thread, Lock
+from inspect import cleandoc
+import logging
+import time
+
+from hqc_meas.instruments.driver_tools import InstrIOError
+
+
+def instr_probe_key(driver, profile):
+    """ Build the key identifying a connection probe.
+
+    Parameters
+    ----------
+    driver : str
+        Name of the driver used to connect to the instrument.
+
+    profile : dict
+        Connection infos of the instrument.
+
+    Returns
+    -------
+    key : tuple
+        Hashable key, identical for two probes connecting the same driver
+        using the same connection infos.
+
+    """
+    if isinstance(profile, dict):
+        profile = sorted(profile.items())
+    return (driver, repr(profile))
+
+
+def probe_instruments(probes, timeout=None):
+    """ Open concurrently the connections to several instruments.
+
+    Each connection is opened in its own thread so that the time spent is the
+    one of the slowest instrument rather than the sum over all instruments.
+
+    Parameters
+    ----------
+    probes : dict
+        Dict {key: (driver_class, profile)} describing the connections to
+        open.
+
+    timeout : float, optional
+        Time allowed to each connection to be opened. A connection which is
+        not opened in time is considered as failed and closed as soon as it
+        is established.
+
+    Returns
+    -------
+    opened : dict
+        Dict {key: driver} of the successfully opened connections.
+
+    failed : dict
+        Dict {key: message} explaining why the other connections failed.
+
+    """
+    opened = {}
+    failed = {}
+    abandoned = set()
+    lock = Lock()
+
+    def probe(key, driver_class, profile):
+        try:
+            instr = driver_class(profile)
+        except InstrIOError:
+            msg = cleandoc('''Failed to establish the connection with the
+                           selected instrument''')
+            with lock:
+                failed[key] = msg
+            return
+        except Exception as e:
+            msg = cleandoc('''Failed to establish the connection with the
+                           selected instrument : {}'''.format(e))
+            with lock:
+                failed[key] = msg
+            return
+
+        with lock:
+            if key not in abandoned:
+                opened[key] = instr
+                return
+
+        # The probe took too long and the caller gave up on it.
+        try:
+            instr.close_connection()
+        except Exception:
+            logger = logging.getLogger(__name__)
+            logger.exception('Failed to close connection to instr:')
+
+    threads = {}
+    for key, (driver_class, profile) in probes.iteritems():
+        thread = Thread(target=probe, args=(key, driver_class, profile),
+                        name='InstrProbe')
+        thread.daemon = True
+        thread.start()
+        threads[key] = thread
+
+    deadline = time.time() + timeout if timeout else None
+    for thread in threads.itervalues():
+        if deadline is None:
+            thread.join()
+        else:
+            thread.join(max(deadline - time.time(), 0))
+
+    with lock:
+        for key in threads:
+            if key not in opened and key not in failed:
+                abandoned.add(key)
+                failed[key] = cleandoc('''Timeout while establishing the
+                                       connection with the selected
+                                       instrument''')
+
+        return dict(opened), dict(failed)
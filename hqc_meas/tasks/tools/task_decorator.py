@@ -124,10 +124,14 @@ def make_parallel(perform, pool):
         obj = args[0]
         root = obj.root_task
         safe_perform = smooth_crash(perform)
+        # The name of the thread starts with the one of the thread starting it
+        # so that the records of a measure can be told apart.
+        name = '{}:{}'.format(current_thread().name, obj.task_name)
         thread = Thread(group=None,
                         target=safe_perform,
                         args=args,
-                        kwargs=kwargs)
+                        kwargs=kwargs,
+                        name=name)
         # Create a shallow copy to avoid mutating a dict shared by multiple
         # threads.
         pools = obj.root_task.threads
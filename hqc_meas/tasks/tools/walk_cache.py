@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# module : walk_cache.py
+# author : Matthieu Dartiailh
+# license : MIT license
+# =============================================================================
+""" Memoisation of the walks performed on task hierarchies.
+
+"""
+from collections import defaultdict, OrderedDict
+
+from hqc_meas.utils.atom_util import tagged_members
+from hqc_meas.utils.walks import flatten_walk
+from ..base_tasks import BaseTask, ComplexTask
+
+
+class _WalkNode(object):
+    """ Cached flattened walk of a task and of its children.
+
+    """
+    __slots__ = ('task', 'parent', 'children', 'flat', 'dirty', 'volatile',
+                 'observed', '__weakref__')
+
+    def __init__(self, task):
+        self.task = task
+        self.parent = None
+        self.children = set()
+        self.flat = None
+        self.dirty = True
+        self.volatile = False
+        self.observed = []
+
+    def invalidate(self, change=None):
+        """ Mark the node and its ancestors as needing to be walked again.
+
+        """
+        node = self
+        while node is not None and not node.dirty:
+            node.dirty = True
+            node = node.parent
+
+
+class TaskWalkCache(object):
+    """ Memoise the flattened walk of task hierarchies.
+
+    The flattened answers of each task and of its children are kept. They are
+    invalidated by observers bound to the walked members, the interface and
+    the children of each task. Walking again an unchanged hierarchy simply
+    returns the stored result, after a modification only the modified tasks
+    are asked again and their ancestors merge the stored results of their
+    other children.
+
+    Tasks whose answer contains the walk of another kind of object (such as a
+    pulse sequence) cannot be observed and are asked again each time.
+
+    Parameters
+    ----------
+    max_trees : int, optional
+        Number of hierarchies for which the results are kept.
+
+    """
+
+    def __init__(self, max_trees=5):
+        self.max_trees = max_trees
+        self._trees = OrderedDict()
+
+    @staticmethod
+    def handles(obj):
+        """ Whether or not the walk of an object can be cached.
+
+        """
+        return isinstance(obj, BaseTask)
+
+    def flat_walk(self, task, members):
+        """ Get the flattened walk of a task hierarchy.
+
+        Parameters
+        ----------
+        task : BaseTask
+            Task at the top of the hierarchy to walk.
+
+        members : iterable(str)
+            Names of the members whose values should be retrieved.
+
+        Returns
+        -------
+        flat_walk : dict(str: set)
+            Same dict as the one returned by flatten_walk when called on the
+            walk of the task.
+
+        """
+        members = tuple(sorted(set(members)))
+        key = (id(task), members)
+        tree = self._trees.pop(key, None)
+        if tree is None or tree[0] is not task:
+            if tree is not None:
+                self._release(tree[1])
+            tree = (task, {})
+        self._trees[key] = tree
+        while len(self._trees) > self.max_trees:
+            _, old = self._trees.popitem(last=False)
+            self._release(old[1])
+
+        flat = self._flatten(task, None, members, tree[1])
+        return defaultdict(set, {k: set(v) for k, v in flat.iteritems()})
+
+    def clear(self):
+        """ Forget all the cached walks.
+
+        """
+        for _, nodes in self._trees.itervalues():
+            self._release(nodes)
+        self._trees.clear()
+
+    # --- Private API ---------------------------------------------------------
+
+    def _flatten(self, task, parent, members, nodes):
+        """ Get the flattened walk of a task, walking it only if necessary.
+
+        """
+        node = nodes.get(id(task))
+        if node is not None and node.task is not task:
+            self._discard(node, nodes)
+            node = None
+        if node is None:
+            node = _WalkNode(task)
+            nodes[id(task)] = node
+        node.parent = parent
+
+        if not node.dirty and not node.volatile:
+            return node.flat
+
+        # The interface may have changed so observers are bound anew.
+        self._unbind(node)
+        self._bind(node, members)
+
+        answer = task.answer(members, {})
+        volatile = isinstance(answer, list)
+        flat = flatten_walk([answer], members)
+
+        children = set()
+        if isinstance(task, ComplexTask):
+            for child in task._gather_children_task():
+                if not child:
+                    continue
+                child_flat = self._flatten(child, node, members, nodes)
+                volatile |= nodes[id(child)].volatile
+                for entry, values in child_flat.iteritems():
+                    flat[entry].update(values)
+                children.add(id(child))
+
+        # Forget the children which are no longer part of the hierarchy,
+        # unless they were moved under another task.
+        for child_id in node.children - children:
+            child_node = nodes.get(child_id)
+            if child_node is not None and child_node.parent is node:
+                self._discard(child_node, nodes)
+
+        node.children = children
+        node.flat = flat
+        node.volatile = volatile
+        node.dirty = False
+        return flat
+
+    def _bind(self, node, members):
+        """ Observe the members whose change invalidates the walk of a task.
+
+        """
+        task = node.task
+        objects = [(task, members)]
+        interface = getattr(task, 'interface', None)
+        if interface is not None:
+            objects.append((interface, members))
+
+        for obj, names in objects:
+            names = [m for m in names if obj.get_member(m) is not None]
+            if obj is task:
+                if isinstance(task, ComplexTask):
+                    names.extend(tagged_members(task, 'child'))
+                if task.get_member('interface') is not None:
+                    names.append('interface')
+            for name in set(names):
+                obj.observe(name, node.invalidate)
+                node.observed.append((obj, name))
+
+    def _unbind(self, node):
+        """ Remove the observers bound to a task.
+
+        """
+        for obj, name in node.observed:
+            obj.unobserve(name, node.invalidate)
+        node.observed = []
+
+    def _discard(self, node, nodes):
+        """ Forget a node and its children.
+
+        """
+        self._unbind(node)
+        if nodes.get(id(node.task)) is node:
+            del nodes[id(node.task)]
+        for child_id in node.children:
+            child_node = nodes.get(child_id)
+            if child_node is not None and child_node.parent is node:
+                self._discard(child_node, nodes)
+
+    def _release(self, nodes):
+        """ Remove the observers bound to all the tasks of a hierarchy.
+
+        """
+        for node in nodes.values():
+            self._unbind(node)
+        nodes.clear()
@@ -56,8 +56,13 @@ def simple_member_from_str(member, str_value):
         The converted value
 
     """
+    # Values which are not strings have already been converted (see
+    # hqc_meas.tasks.manager.building.build_config_snapshot).
+    if not isinstance(str_value, basestring):
+        value = str_value
+
     # If the member type is 'Str' then we just take the raw value.
-    if isinstance(member, Str):
+    elif isinstance(member, Str):
         value = str_value
 
     # If the member type is 'Unicode' then we convert the raw value.
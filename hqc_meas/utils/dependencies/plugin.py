@@ -14,6 +14,7 @@ import logging
 
 from hqc_meas.utils.walks import flatten_walk
 from hqc_meas.utils.configobj_ops import flatten_config
+from hqc_meas.tasks.tools.walk_cache import TaskWalkCache
 
 from .dependencies import BuildDependency, RuntimeDependency
 
@@ -47,6 +48,7 @@ class DependenciesManagerPlugin(Plugin):
 
         """
         self._unbind_observers()
+        self._walk_cache.clear()
         self.build_collectors.clear()
         self.runtime_collectors.clear()
         self._build_extensions.clear()
@@ -123,8 +125,13 @@ class DependenciesManagerPlugin(Plugin):
                 members.update(set(runtime_dep.walk_members))
                 callables.update(runtime_dep.walk_callables)
 
-        walk = obj.walk(members, callables)
-        flat_walk = flatten_walk(walk, list(members) + callables.keys())
+        # The answers of callables cannot be observed so the cache is used
+        # only when walking members.
+        if not callables and self._walk_cache.handles(obj):
+            flat_walk = self._walk_cache.flat_walk(obj, members)
+        else:
+            walk = obj.walk(members, callables)
+            flat_walk = flatten_walk(walk, list(members) + callables.keys())
 
         deps = ({}, {})
         errors = {}
@@ -207,6 +214,9 @@ class DependenciesManagerPlugin(Plugin):
     #: Dict storing which extension declared which runtime dependency.
     _runtime_extensions = Typed(defaultdict, (list,))
 
+    #: Cache of the walks of the task hierarchies.
+    _walk_cache = Typed(TaskWalkCache, ())
+
     def _refresh_build_deps(self):
         """ Refresh the list of known build dependency collectors.
 
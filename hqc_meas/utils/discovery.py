@@ -0,0 +1,351 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# module : discovery.py
+# author : Matthieu Dartiailh
+# license : MIT license
+# =============================================================================
+""" Tools used by the managers to discover the content of packages without
+importing all their modules at startup.
+
+The names exported by each explored module are recorded in a DiscoveryIndex
+persisted on disk. As long as a module file is not modified, its exports are
+read from the index and the objects are only imported when first accessed
+through a LazyDict.
+
+"""
+import os
+import json
+import logging
+from collections import MutableMapping
+from importlib import import_module
+from threading import RLock
+
+import enaml
+from watchdog.events import (FileSystemEventHandler, FileCreatedEvent,
+                             FileDeletedEvent, FileMovedEvent)
+
+
+#: Folder in which the indexes are saved when the folder of the application
+#: preferences is not known.
+INDEX_FOLDER = os.path.join(os.path.expanduser('~'), '.hqc_meas')
+
+
+def default_index_path(workbench, filename):
+    """ Get the default path of an index file.
+
+    The indexes are saved in the folder of the application preferences, or in
+    INDEX_FOLDER if it is not set, rather than in the package.
+
+    Parameters
+    ----------
+    workbench : Workbench
+        Workbench of the application, used to access the preferences plugin.
+
+    filename : unicode
+        Name of the index file.
+
+    """
+    pref_plugin = workbench.get_plugin(u'hqc_meas.preferences')
+    folder = pref_plugin.default_folder or INDEX_FOLDER
+    return os.path.join(folder, filename)
+
+
+class DiscoveryIndex(object):
+    """ Persisted record of what the modules of a package export.
+
+    Entries are keyed by module name and store the path of the module file,
+    its modification time when it was explored and a JSON serialisable
+    description of its exports. An entry is valid as long as the file is not
+    modified.
+
+    Parameters
+    ----------
+    path : unicode
+        Path of the file in which the index is saved.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = {}
+        self._modified = False
+        self._lock = RLock()
+        if os.path.isfile(path):
+            try:
+                with open(path) as f:
+                    self._entries = json.load(f)
+            except Exception:
+                logger = logging.getLogger(__name__)
+                logger.warn('Corrupted discovery index {}'.format(path),
+                            exc_info=True)
+
+    def get(self, module, mod_path):
+        """ Get the recorded exports of a module.
+
+        Parameters
+        ----------
+        module : str
+            Name of the module.
+
+        mod_path : unicode
+            Path of the file of the module.
+
+        Returns
+        -------
+        exports : dict or None
+            Exports recorded for the module, None if the module is unknown or
+            was modified since it was recorded.
+
+        """
+        with self._lock:
+            entry = self._entries.get(module)
+        try:
+            mtime = os.path.getmtime(mod_path)
+        except OSError:
+            return None
+        if entry and entry['path'] == mod_path and entry['mtime'] == mtime:
+            return entry['exports']
+
+    def update(self, module, mod_path, exports):
+        """ Record the exports of a module.
+
+        """
+        with self._lock:
+            self._entries[module] = {'path': mod_path,
+                                     'mtime': os.path.getmtime(mod_path),
+                                     'exports': exports}
+            self._modified = True
+
+    def discard(self, mod_path):
+        """ Forget the modules whose file is located at the given path.
+
+        Returns
+        -------
+        discarded : bool
+            Whether or not an entry was known for this path.
+
+        """
+        mod_path = os.path.normcase(os.path.realpath(mod_path))
+        with self._lock:
+            modules = [m for m, e in self._entries.iteritems()
+                       if os.path.normcase(os.path.realpath(e['path'])) ==
+                       mod_path]
+            for module in modules:
+                del self._entries[module]
+            if modules:
+                self._modified = True
+
+        return bool(modules)
+
+    def save(self):
+        """ Save the index if it was modified or does not exist yet.
+
+        """
+        with self._lock:
+            if not self._modified and os.path.isfile(self.path):
+                return
+            temp = self.path + '.tmp'
+            try:
+                folder = os.path.dirname(self.path)
+                if folder and not os.path.isdir(folder):
+                    os.makedirs(folder)
+                with open(temp, 'w') as f:
+                    json.dump(self._entries, f)
+                if os.path.isfile(self.path):
+                    os.remove(self.path)
+                os.rename(temp, self.path)
+                self._modified = False
+            except Exception:
+                logger = logging.getLogger(__name__)
+                logger.warn('Failed to save discovery index {}'
+                            .format(self.path), exc_info=True)
+
+
+class LazyObject(object):
+    """ Placeholder for an object imported on first use.
+
+    Parameters
+    ----------
+    module : str
+        Absolute name of the module from which to retrieve the object.
+
+    attr : str
+        Name of the module attribute holding the object.
+
+    keys : tuple, optional
+        Keys (or indexes) to use to retrieve the object from the attribute.
+
+    """
+    __slots__ = ('module', 'attr', 'keys')
+
+    def __init__(self, module, attr, keys=()):
+        self.module = module
+        self.attr = attr
+        self.keys = tuple(keys)
+
+    def resolve(self):
+        """ Import the module and retrieve the object.
+
+        """
+        with enaml.imports():
+            obj = getattr(import_module(self.module), self.attr)
+        for key in self.keys:
+            obj = obj[key]
+        return obj
+
+
+class LazyDict(MutableMapping):
+    """ Mapping whose LazyObject values are resolved when first accessed.
+
+    Objects which fail to import are logged and removed from the mapping, as
+    if they were missing. To avoid checking the presence of a key and then
+    failing to retrieve it, use get or request rather than the in operator
+    followed by an item access.
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._dict = dict(*args, **kwargs)
+        self._lock = RLock()
+
+    def __getitem__(self, key):
+        with self._lock:
+            value = self._dict[key]
+            if isinstance(value, LazyObject):
+                try:
+                    value = value.resolve()
+                except Exception:
+                    logger = logging.getLogger(__name__)
+                    logger.exception('Failed to import {} from {}'
+                                     .format(key, value.module))
+                    del self._dict[key]
+                    raise KeyError(key)
+                self._dict[key] = value
+
+        return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._dict[key] = value
+
+    def __delitem__(self, key):
+        with self._lock:
+            del self._dict[key]
+
+    def __contains__(self, key):
+        return key in self._dict
+
+    def __iter__(self):
+        return iter(list(self._dict))
+
+    def __len__(self):
+        return len(self._dict)
+
+    def clear(self):
+        with self._lock:
+            self._dict.clear()
+
+    def get(self, key, default=None):
+        """ Get the object associated to a key or default if the key is
+        unknown or the import of the object failed.
+
+        """
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def request(self, keys):
+        """ Get the objects associated to some keys.
+
+        Parameters
+        ----------
+        keys : iterable
+            Keys whose associated objects should be returned.
+
+        Returns
+        -------
+        found : dict
+            Objects which were found.
+
+        missing : list
+            Keys which are unknown or whose object failed to import.
+
+        """
+        found = {}
+        missing = []
+        for key in keys:
+            try:
+                found[key] = self[key]
+            except KeyError:
+                missing.append(key)
+
+        return found, missing
+
+    def iteritems(self):
+        for key in self:
+            try:
+                yield key, self[key]
+            except KeyError:
+                continue
+
+    def itervalues(self):
+        for _, value in self.iteritems():
+            yield value
+
+    def items(self):
+        return list(self.iteritems())
+
+    def values(self):
+        return list(self.itervalues())
+
+    def is_loaded(self, key):
+        """ Whether or not the object associated to a key was imported.
+
+        """
+        return not isinstance(self._dict[key], LazyObject)
+
+
+class IndexUpdater(FileSystemEventHandler):
+    """ Watchdog handler keeping a discovery index up to date.
+
+    The index entries of the modified modules are discarded and the handler
+    is called when a module is created, deleted or moved.
+
+    Parameters
+    ----------
+    index : DiscoveryIndex
+        Index to keep up to date.
+
+    handler : callable
+        Function called without arguments when a module is created, deleted
+        or moved.
+
+    extensions : tuple, optional
+        Extensions of the files considered as modules.
+
+    """
+    def __init__(self, index, handler, extensions=('.py', '.enaml')):
+        self.index = index
+        self.handler = handler
+        self.extensions = extensions
+
+    def dispatch(self, event):
+        paths = [p for p in (event.src_path, getattr(event, 'dest_path', ''))
+                 if p.endswith(self.extensions)]
+        if paths:
+            for path in paths:
+                self.index.discard(path)
+            super(IndexUpdater, self).dispatch(event)
+
+    def on_created(self, event):
+        if isinstance(event, FileCreatedEvent):
+            self.handler()
+
+    def on_deleted(self, event):
+        if isinstance(event, FileDeletedEvent):
+            self.handler()
+
+    def on_moved(self, event):
+        if isinstance(event, FileMovedEvent):
+            self.handler()
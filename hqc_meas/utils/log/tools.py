@@ -14,21 +14,27 @@ process log emitted in the measure process.
     StreamToLogRedirector
         Simple class to redirect a stream to a logger.
     QueueHandler
-        Logger handler putting records into a queue.
-    GuiConsoleHandler
+        Logger handler putting records (possibly by batches) into a queue.
+    PanelModel
+        Model keeping the last lines of log displayed in a GUI panel.
+    GuiHandler
         Logger handler adding the message of a record to a GUI panel.
     QueueLoggerThread
         Thread getting log record from a queue and asking logging to handle
         them.
+    rebuild_record
+        Function rebuilding a record from the tuple sent by a QueueHandler.
 """
 
 import logging, Queue, time, os, datetime, sys
 from logging.handlers import TimedRotatingFileHandler
+from collections import deque
 from inspect import cleandoc
 from textwrap import fill
-from threading import Thread
-from enaml.application import deferred_call
-from atom.api import Atom, Unicode
+from threading import Thread, Timer
+from atom.api import Atom, Unicode, Int, Bool, Typed
+
+from ..throttling import ThrottledCall
 try:
     import codecs
 except ImportError:
@@ -109,6 +115,10 @@ class StreamToLogRedirector(object):
         return None
 
 
+#: Formatter used to format the tracebacks of compacted records.
+_DEFAULT_FORMATTER = logging.Formatter()
+
+
 # Copied and pasted from the logging module of Python 3.3
 class QueueHandler(logging.Handler):
     """
@@ -117,14 +127,25 @@ class QueueHandler(logging.Handler):
     (in a multi-process application), so as to avoid file write contention
     between processes.
 
+    When capacity is larger than one, the records are sent by lists holding
+    at most capacity records. A batch is sent when it is full, when a record
+    of level ERROR or above is emitted or at the latest flush_interval seconds
+    after its first record was emitted. Batched records are not pickled but
+    converted to compact tuples (see compact) from which QueueLoggerThread
+    rebuilds records only if they will be handled.
+
     """
 
-    def __init__(self, queue):
+    def __init__(self, queue, capacity=1, flush_interval=0.1):
         """
         Initialise an instance, using the passed queue.
         """
         logging.Handler.__init__(self)
         self.queue = queue
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self._batch = []
+        self._timer = None
 
     def enqueue(self, record):
         """
@@ -168,28 +189,122 @@ class QueueHandler(logging.Handler):
         Writes the LogRecord to the queue, preparing it first.
         """
         try:
-            self.enqueue(self.prepare(record))
+            if self.capacity <= 1:
+                self.enqueue(self.prepare(record))
+                return
+
+            # Called with the handler lock held.
+            self._batch.append(self.compact(record))
+            if (len(self._batch) >= self.capacity or
+                    record.levelno >= logging.ERROR):
+                self.flush()
+            elif self._timer is None:
+                self._timer = Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
         except (KeyboardInterrupt, SystemExit):
             raise
         except:
             self.handleError(record)
 
+    def compact(self, record):
+        """
+        Convert a record to the tuple (level, time, name, message, process)
+        sent when batching. The traceback, if any, is appended to the message.
+        The name of the process is kept as it is used to sort the records.
+        """
+        message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            formatter = self.formatter or _DEFAULT_FORMATTER
+            record.exc_text = formatter.formatException(record.exc_info)
+        if record.exc_text:
+            message += '\n' + record.exc_text
+        return (record.levelno, record.created, record.name, message,
+                record.processName)
+
+    def flush(self):
+        """
+        Send the pending batch of records.
+        """
+        self.acquire()
+        try:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            batch, self._batch = self._batch, []
+            if batch:
+                self.enqueue(batch)
+        finally:
+            self.release()
+
+    def close(self):
+        """
+        Send the pending records and close the handler.
+        """
+        self.flush()
+        logging.Handler.close(self)
+
 
 class PanelModel(Atom):
     """ Simple model which can be used for a GuiHandler.
 
-    """
+    Only the last max_lines lines are kept so that appending to the text does
+    not get slower as the log grows.
 
+    """
+    #: Text to display, assigning it directly replaces the kept lines.
     text = Unicode()
 
+    #: Maximum number of lines kept.
+    max_lines = Int(1000)
+
+    def append(self, string):
+        """ Append some text, dropping the oldest lines if necessary.
+
+        """
+        lines = self._lines
+        new = string.splitlines(True)
+        if lines and new and not lines[-1].endswith('\n'):
+            lines[-1] += new.pop(0)
+        lines.extend(new)
+        self._appending = True
+        try:
+            self.text = u''.join(lines)
+        finally:
+            self._appending = False
+
+    # --- Private API ---------------------------------------------------------
+
+    #: Last lines of the text.
+    _lines = Typed(deque)
+
+    #: Flag indicating that the text is being updated from the kept lines.
+    _appending = Bool()
+
+    def _default__lines(self):
+        return deque(maxlen=self.max_lines)
+
+    def _observe_text(self, change):
+        if not self._appending:
+            self._lines = deque(change['value'].splitlines(True),
+                                maxlen=self.max_lines)
+
+    def _observe_max_lines(self, change):
+        self._lines = deque(self._lines, maxlen=change['value'])
+
 
 class GuiHandler(logging.Handler):
     """Logger record sending the log message to a GUI panel
 
+    The messages are accumulated and appended to the model, in the main
+    thread, at most once every refresh_interval seconds.
+
     Parameters
     ----------
-    model : Atom
-        Model object with a text member.
+    model : PanelModel
+        Model to which the messages are appended.
+    refresh_interval : float, optional
+        Minimal time in seconds between two updates of the model.
 
     Methods
     -------
@@ -197,9 +312,11 @@ class GuiHandler(logging.Handler):
         Handle a log record by appending the log message to the model
 
     """
-    def __init__(self, model):
+    def __init__(self, model, refresh_interval=0.1):
         logging.Handler.__init__(self)
         self.model = model
+        self._pending = []
+        self._refresher = ThrottledCall(self._write_in_panel, refresh_interval)
 
     def emit(self, record):
         """
@@ -211,26 +328,37 @@ class GuiHandler(logging.Handler):
         msg = self.format(record)
         try:
             if record.levelname == 'INFO':
-                deferred_call(self._write_in_panel, self.model,
-                              msg + '\n')
+                string = msg + '\n'
             elif record.levelname == 'CRITICAL':
-                deferred_call(self._write_in_panel, self.model,
-                              fill(cleandoc('''An error occured please check
-                                  the log file for more details.''')) + '\n')
+                string = fill(cleandoc('''An error occured please check
+                                  the log file for more details.''')) + '\n'
             else:
-                deferred_call(self._write_in_panel, self.model,
-                              record.levelname + ': ' + msg + '\n')
+                string = record.levelname + ': ' + msg + '\n'
+
+            # Called with the handler lock held.
+            self._pending.append(string)
+            self._refresher.request()
         except (KeyboardInterrupt, SystemExit):
             raise
         except:
             self.handleError(record)
 
-    def _write_in_panel(self, model, string):
-        """
+    def _write_in_panel(self):
+        """ Append the pending messages to the model.
+
         """
+        self.acquire()
+        try:
+            pending, self._pending = self._pending, []
+        finally:
+            self.release()
+
+        if not pending:
+            return
+        string = ''.join(pending)
         if sys.platform == 'win32':
             string = string.decode('cp1252')
-        model.text += string
+        self.model.append(string)
 
 
 class QueueLoggerThread(Thread):
@@ -251,15 +379,66 @@ class QueueLoggerThread(Thread):
         while True:
             #Collect all display output from process
             try:
-                record = self.queue.get()
-                if record is None:
+                records = self.queue.get()
+                if records is None:
                     break
-                logger = logging.getLogger(record.name)
-                logger.handle(record)
+                # Batching QueueHandler send lists of compact records.
+                if not isinstance(records, list):
+                    records = [records]
+                for record in records:
+                    if isinstance(record, tuple):
+                        record = rebuild_record(record)
+                        if record is None:
+                            continue
+                    logger = logging.getLogger(record.name)
+                    logger.handle(record)
             except Queue.Empty:
                 continue
 
 
+def rebuild_record(infos):
+    """ Rebuild a record from the tuple created by QueueHandler.compact.
+
+    Parameters
+    ----------
+    infos : tuple
+        Tuple (level, time, name, message, process) describing the record.
+
+    Returns
+    -------
+    record : LogRecord or None
+        Rebuilt record or None if no handler would handle it.
+
+    """
+    level, created, name, message, process = infos
+    logger = logging.getLogger(name)
+    if not _is_handled(logger, level):
+        return None
+
+    record = logging.LogRecord(name, level, '', 0, message, None, None)
+    record.created = created
+    record.msecs = (created - long(created)) * 1000
+    record.relativeCreated = (created - logging._startTime) * 1000
+    record.processName = process
+    return record
+
+
+def _is_handled(logger, level):
+    """ Check whether a record of the given level would be handled by at least
+    one handler when logged by the given logger.
+
+    """
+    if not logger.isEnabledFor(level):
+        return False
+    while logger:
+        if any(level >= handler.level for handler in logger.handlers):
+            return True
+        if not logger.propagate:
+            break
+        logger = logger.parent
+    return False
+
+
 class DayRotatingTimeHandler(TimedRotatingFileHandler):
     """ Custom implementation of the TimeRotatingHandler to avoid issues on
     win32.
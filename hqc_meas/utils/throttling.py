@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# module : throttling.py
+# author : Matthieu Dartiailh
+# license : MIT license
+# =============================================================================
+""" Tool used to refresh a GUI from other threads without flooding it.
+
+"""
+import time
+from threading import Lock
+
+from enaml.application import deferred_call, timed_call
+
+
+class ThrottledCall(object):
+    """ Call a function in the main thread at most once every interval.
+
+    The calls requested (from any thread) before the function is actually
+    called are coalesced into a single call. The function should hence
+    process everything which happened since its last call.
+
+    Parameters
+    ----------
+    func : callable
+        Function to call in the main thread, without arguments.
+
+    interval : float, optional
+        Minimal time in seconds between two calls of the function.
+
+    """
+    def __init__(self, func, interval=0.1):
+        self.func = func
+        self.interval = interval
+        self._lock = Lock()
+        self._scheduled = False
+        self._last_call = 0.
+
+    def request(self):
+        """ Ask for the function to be called.
+
+        This method can be called from any thread.
+
+        """
+        with self._lock:
+            if self._scheduled:
+                return
+            self._scheduled = True
+
+        deferred_call(self._schedule)
+
+    def _schedule(self):
+        """ Call the function, waiting if the last call is too recent.
+
+        """
+        delay = self._last_call + self.interval - time.time()
+        if delay > 0:
+            timed_call(int(delay*1000), self._call)
+        else:
+            self._call()
+
+    def _call(self):
+        """ Call the function, the requests made from now on lead to a new
+        call.
+
+        """
+        with self._lock:
+            self._scheduled = False
+
+        self._last_call = time.time()
+        self.func()
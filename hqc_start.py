@@ -20,22 +20,15 @@ with enaml.imports():
     from hqc_meas.utils.log.manifest import LogManifest
     from hqc_meas.debug.debugger_manifest import DebuggerManifest
 
-if __name__ == '__main__':
+WORKSPACES = {'measure': 'hqc_meas.measure.workspace',
+              'debug': 'hqc_meas.debug.workspace',
+              'pulses': 'hqc_meas.pulses.workspace'}
 
-    WORKSPACES = {'measure': 'hqc_meas.measure.workspace',
-                  'debug': 'hqc_meas.debug.workspace',
-                  'pulses': 'hqc_meas.pulses.workspace'}
 
-    import argparse
-    parser = argparse.ArgumentParser(description='Start the Hqc app')
-    parser.add_argument("-w", "--workspace", help='select start-up workspace',
-                        default='measure', choices=WORKSPACES)
-    parser.add_argument("-s", "--nocapture",
-                        help="Don't capture stdout/stderr",
-                        action='store_false')
-    args = parser.parse_args()
+def register_manifests(workbench):
+    """ Register all the manifests making the application.
 
-    workbench = Workbench()
+    """
     workbench.register(CoreManifest())
     workbench.register(UIManifest())
     workbench.register(HqcAppManifest())
@@ -49,17 +42,25 @@ if __name__ == '__main__':
     workbench.register(MeasureManifest())
     workbench.register(DebuggerManifest())
 
+
+def start_workbench(workbench, workspace='measure', capture=True):
+    """ Start the logging and select the start-up workspace.
+
+    This starts all the plugins needed by the workspace but does not show the
+    main window.
+
+    """
     core = workbench.get_plugin('enaml.workbench.core')
     core.invoke_command('hqc_meas.logging.start_logging',
-                        {'std': args.nocapture}, workbench)
+                        {'std': capture}, workbench)
     core.invoke_command('enaml.workbench.ui.select_workspace',
-                        {'workspace': WORKSPACES[args.workspace]}, workbench)
+                        {'workspace': WORKSPACES[workspace]}, workbench)
 
-    ui = workbench.get_plugin(u'enaml.workbench.ui')
-    ui.show_window()
-    ui.window.maximize()
-    ui.start_application()
 
+def unregister_manifests(workbench):
+    """ Unregister the manifests, stopping the plugins.
+
+    """
     workbench.unregister(u'hqc_meas.pulses')
     workbench.unregister(u'hqc_meas.debug')
     workbench.unregister(u'hqc_meas.measure')
@@ -72,3 +73,26 @@ if __name__ == '__main__':
     workbench.unregister(u'hqc_meas.app')
     workbench.unregister(u'enaml.workbench.ui')
     workbench.unregister(u'enaml.workbench.core')
+
+
+if __name__ == '__main__':
+
+    import argparse
+    parser = argparse.ArgumentParser(description='Start the Hqc app')
+    parser.add_argument("-w", "--workspace", help='select start-up workspace',
+                        default='measure', choices=WORKSPACES)
+    parser.add_argument("-s", "--nocapture",
+                        help="Don't capture stdout/stderr",
+                        action='store_false')
+    args = parser.parse_args()
+
+    workbench = Workbench()
+    register_manifests(workbench)
+    start_workbench(workbench, args.workspace, args.nocapture)
+
+    ui = workbench.get_plugin(u'enaml.workbench.ui')
+    ui.show_window()
+    ui.window.maximize()
+    ui.start_application()
+
+    unregister_manifests(workbench)
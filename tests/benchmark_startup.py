@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# module : benchmark_startup.py
+# author : Matthieu Dartiailh
+# license : MIT license
+# =============================================================================
+""" Benchmark of the start up of the application.
+
+The workbench is started as in hqc_start.py but the main window is never
+shown. The time spent importing each module and starting each plugin is
+recorded.
+
+Run as a script to save the results as JSON and to compare them with the
+results obtained on another commit :
+
+    python -m tests.benchmark_startup -o new.json -c old.json
+
+"""
+import __builtin__
+import sys
+import os
+import json
+import argparse
+import subprocess
+from timeit import default_timer
+
+from atom.api import Dict, List
+from enaml.application import Application
+from enaml.workbench.api import Workbench
+
+
+class ImportProfiler(object):
+    """ Record the time spent importing modules for the first time.
+
+    The builtin __import__ is wrapped so that the inclusive time (including
+    the modules imported in turn) and the self time of each import statement
+    bringing in a new module are measured.
+
+    """
+
+    def __init__(self):
+        #: Dict {module: {'inclusive': t, 'self': t}}.
+        self.times = {}
+        self._stack = []
+        self._import = None
+
+    def install(self):
+        """ Start profiling the imports.
+
+        """
+        self._import = __builtin__.__import__
+        __builtin__.__import__ = self._profiled_import
+
+    def uninstall(self):
+        """ Stop profiling the imports.
+
+        """
+        __builtin__.__import__ = self._import
+
+    def _profiled_import(self, name, globals=None, locals=None, fromlist=None,
+                         level=-1):
+        """ Time the import when it brings in new modules.
+
+        """
+        candidates = self._candidates(name, globals, level)
+        if any(c in sys.modules for c in candidates) and not fromlist:
+            return self._import(name, globals, locals, fromlist, level)
+
+        known = len(sys.modules)
+        self._stack.append(0.0)
+        start = default_timer()
+        try:
+            return self._import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = default_timer() - start
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            if len(sys.modules) != known:
+                module = next((c for c in candidates if sys.modules.get(c)),
+                              name)
+                if module not in self.times:
+                    self.times[module] = {'inclusive': elapsed,
+                                          'self': elapsed - children}
+
+    @staticmethod
+    def _candidates(name, globals, level):
+        """ Absolute names the imported module may have.
+
+        """
+        package = None
+        if globals and level != 0:
+            package = globals.get('__package__')
+            if package is None:
+                package = globals.get('__name__', '')
+                if '__path__' not in globals:
+                    package = package.rpartition('.')[0]
+
+        if not package:
+            return (name,)
+
+        if level > 0:
+            package = package.rsplit('.', level - 1)[0]
+            return (package + '.' + name if name else package,)
+
+        # Implicit relative imports are tried first.
+        return (package + '.' + name, name)
+
+
+class ProfiledWorkbench(Workbench):
+    """ Workbench recording the time needed to create and start each plugin.
+
+    """
+
+    #: Dict {plugin_id: {'inclusive': t, 'self': t}}.
+    times = Dict()
+
+    def get_plugin(self, plugin_id, force_create=True):
+        if plugin_id in self._plugins or not force_create:
+            return super(ProfiledWorkbench, self).get_plugin(plugin_id,
+                                                             force_create)
+
+        self._stack.append(0.0)
+        start = default_timer()
+        try:
+            return super(ProfiledWorkbench, self).get_plugin(plugin_id)
+        finally:
+            elapsed = default_timer() - start
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            self.times[plugin_id] = {'inclusive': elapsed,
+                                     'self': elapsed - children}
+
+    #: Time spent starting the plugins started by the plugin being started.
+    _stack = List()
+
+
+def profile_startup(workspace='measure'):
+    """ Start the application headless and collect timing informations.
+
+    Returns
+    -------
+    results : dict
+        Dict holding the durations of the different steps ('steps'), the
+        start time of each plugin ('plugins') and the import time of each
+        module ('imports').
+
+    """
+    profiler = ImportProfiler()
+    steps = {}
+    start = default_timer()
+    profiler.install()
+    try:
+        import hqc_start
+    finally:
+        profiler.uninstall()
+    steps['imports'] = default_timer() - start
+
+    workbench = ProfiledWorkbench()
+    aux = default_timer()
+    hqc_start.register_manifests(workbench)
+    steps['register'] = default_timer() - aux
+
+    aux = default_timer()
+    profiler.install()
+    try:
+        hqc_start.start_workbench(workbench, workspace, capture=False)
+        # Process the calls deferred by the plugins during their start.
+        qapp = Application.instance()._qapp
+        qapp.flush()
+        qapp.processEvents()
+    finally:
+        profiler.uninstall()
+    steps['start'] = default_timer() - aux
+    steps['total'] = default_timer() - start
+
+    workbench.get_plugin(u'enaml.workbench.ui').close_workspace()
+    hqc_start.unregister_manifests(workbench)
+
+    return {'commit': _current_commit(), 'workspace': workspace,
+            'steps': steps, 'plugins': workbench.times,
+            'imports': profiler.times}
+
+
+def compare_results(old, new, threshold=0.01):
+    """ Format the differences between two benchmark results.
+
+    Only the differences larger than the threshold (in seconds) are reported
+    for plugins and imports.
+
+    """
+    lines = ['Startup {} -> {}'.format(old.get('commit'), new.get('commit'))]
+    for key in ('steps', 'plugins', 'imports'):
+        lines.append(key.capitalize())
+        old_t, new_t = old.get(key, {}), new.get(key, {})
+        diffs = []
+        for name in set(old_t) | set(new_t):
+            o = _get_time(old_t.get(name))
+            n = _get_time(new_t.get(name))
+            if key == 'steps' or abs(n - o) > threshold:
+                diffs.append((n - o, name, o, n))
+
+        for diff, name, o, n in sorted(diffs, reverse=True):
+            lines.append('    {:<50} {:8.3f} {:8.3f} {:+8.3f}'.format(name, o,
+                                                                      n, diff))
+
+    return '\n'.join(lines)
+
+
+def _get_time(entry):
+    """ Get the self time of an entry (0 if the entry does not exist).
+
+    """
+    if entry is None:
+        return 0.0
+    if isinstance(entry, dict):
+        return entry['self']
+    return entry
+
+
+def _current_commit():
+    """ Get the commit of the repository, if it can be determined.
+
+    """
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short',
+                                        'HEAD'],
+                                       cwd=os.path.dirname(__file__)).strip()
+    except Exception:
+        return None
+
+
+class BenchmarkStartup(object):
+
+    def benchmark_startup(self):
+        results = profile_startup()
+        for step in ('imports', 'register', 'start', 'total'):
+            print step, results['steps'][step]
+
+        plugins = sorted(results['plugins'].iteritems(),
+                         key=lambda x: x[1]['self'], reverse=True)
+        for plugin_id, times in plugins:
+            print plugin_id, times['self']
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Benchmark the start up')
+    parser.add_argument('-w', '--workspace', default='measure',
+                        help='start-up workspace')
+    parser.add_argument('-o', '--output', help='file in which to save the '
+                        'results as JSON')
+    parser.add_argument('-c', '--compare', help='JSON results to which the '
+                        'new results should be compared')
+    args = parser.parse_args()
+
+    results = profile_startup(args.workspace)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            print compare_results(json.load(f), results)
+    else:
+        print json.dumps(results['steps'], indent=2, sort_keys=True)
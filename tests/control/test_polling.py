@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+from time import sleep
+from threading import Lock
+import numpy as np
+from nose.tools import assert_equal, assert_true, assert_false
+
+from hqc_meas.control.polling import PollingScheduler, value_changed
+
+from ..util import complete_line
+
+
+def setup_module():
+    print complete_line(__name__ + ': setup_module()', '~', 78)
+
+
+def teardown_module():
+    print complete_line(__name__ + ': teardown_module()', '~', 78)
+
+
+class Recorder(object):
+    """ Owner recording the polls it is asked to perform.
+
+    """
+    def __init__(self):
+        self.calls = []
+        self.lock = Lock()
+
+    def poll(self, names):
+        with self.lock:
+            self.calls.append(names)
+
+
+class TestPollingScheduler(object):
+
+    @classmethod
+    def setup_class(cls):
+        print complete_line(__name__ +
+                            ':{}.setup_class()'.format(cls.__name__), '-', 77)
+
+    @classmethod
+    def teardown_class(cls):
+        print complete_line(__name__ +
+                            ':{}.teardown_class()'.format(cls.__name__), '-',
+                            77)
+
+    def setup(self):
+        self.scheduler = PollingScheduler(tolerance=0.5)
+
+    def teardown(self):
+        self.scheduler.stop()
+
+    def test_coalescing(self):
+        """ Test that the polls of an owner due together are coalesced.
+
+        """
+        owner = Recorder()
+        other = Recorder()
+        self.scheduler.schedule(owner, 'a', owner.poll, 0.1)
+        self.scheduler.schedule(owner, 'b', owner.poll, 0.12)
+        self.scheduler.schedule(other, 'a', other.poll, 0.1)
+        sleep(0.15)
+
+        assert_equal(owner.calls, [['a', 'b']])
+        assert_equal(other.calls, [['a']])
+
+    def test_unschedule(self):
+        """ Test stopping polls.
+
+        """
+        owner = Recorder()
+        self.scheduler.schedule(owner, 'a', owner.poll, 0.05)
+        self.scheduler.schedule(owner, 'b', owner.poll, 0.05)
+        self.scheduler.unschedule(owner, 'a')
+        sleep(0.08)
+        assert_equal(owner.calls, [['b']])
+
+        self.scheduler.unschedule(owner)
+        sleep(0.1)
+        assert_equal(len(owner.calls), 1)
+
+    def test_adaptive_interval(self):
+        """ Test that the interval grows while the value does not change.
+
+        """
+        owner = Recorder()
+        self.scheduler.schedule(owner, 'a', owner.poll, 0.1, 1)
+        poll = self.scheduler._polls[(id(owner), 'a')]
+        for i in range(3):
+            self.scheduler.report(owner, 'a', False)
+        assert_true(poll.interval > 0.3)
+
+        due = poll.due
+        self.scheduler.report(owner, 'a', True)
+        assert_equal(poll.interval, 0.1)
+        assert_true(poll.due <= due)
+
+        # Intervals without maximum are not adapted.
+        self.scheduler.schedule(owner, 'b', owner.poll, 0.1)
+        self.scheduler.report(owner, 'b', False)
+        assert_equal(self.scheduler._polls[(id(owner), 'b')].interval, 0.1)
+
+    def test_stop(self):
+        """ Test stopping the scheduler thread.
+
+        """
+        owner = Recorder()
+        self.scheduler.schedule(owner, 'a', owner.poll, 0.05)
+        thread = self.scheduler._thread
+        self.scheduler.stop()
+        assert_false(thread.is_alive())
+        sleep(0.07)
+        assert_equal(owner.calls, [])
+
+
+def test_value_changed():
+    # Test comparing polled values, including arrays.
+    assert_false(value_changed(1.0, 1.0))
+    assert_true(value_changed('ON', 'OFF'))
+    assert_false(value_changed(np.arange(3), np.arange(3)))
+    assert_true(value_changed(np.arange(3), np.arange(1, 4)))
+    assert_true(value_changed(np.arange(3), np.arange(4)))
+    assert_true(value_changed(None, np.arange(3)))
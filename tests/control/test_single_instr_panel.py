@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# module : test_single_instr_panel.py
+# author : Matthieu Dartiailh
+# license : MIT license
+# =============================================================================
+"""
+"""
+import os
+import shutil
+from tempfile import mkdtemp
+from time import sleep
+from atom.api import Int
+from configobj import ConfigObj
+from nose.tools import assert_equal, assert_true, assert_false
+
+from hqc_meas.control.single_instr_panel import SingleInstrPanel
+from hqc_meas.instruments.dummies.panel_dummy import DRIVERS
+
+from ..util import complete_line
+
+
+def setup_module():
+    print complete_line(__name__ + ': setup_module()', '~', 78)
+
+
+def teardown_module():
+    print complete_line(__name__ + ': teardown_module()', '~', 78)
+
+
+class DummyPanel(SingleInstrPanel):
+    """ Panel controlling the dummy_int property of a PanelTestDummy.
+
+    """
+    dummy_int = Int()
+
+    def dget_dummy_int(self):
+        return self.driver.dummy_int
+
+    def dset_dummy_int(self, value):
+        self.driver.dummy_int = value
+
+
+def wait_for(condition, timeout=5.):
+    """ Wait for a condition to be met, return whether it was.
+
+    """
+    for i in range(int(timeout/0.05)):
+        if condition():
+            return True
+        sleep(0.05)
+    return condition()
+
+
+def test_panel_polling():
+    # Test that a panel polls its driver through the shared scheduler and
+    # forwards the new values to it.
+    directory = mkdtemp()
+    try:
+        profile = os.path.join(directory, 'dummy.ini')
+        config = ConfigObj(profile)
+        config['driver'] = 'PanelTestDummy'
+        config.write()
+
+        state = {'pref': {'profile': profile, 'refresh_time': '0.1'},
+                 'profile_available': False}
+        panel = DummyPanel(state, DRIVERS)
+        assert_false(panel.profile_in_use)
+
+        driver = panel.driver
+        driver.fail = 0
+        driver._int = 3
+        panel.restart_driver()
+        try:
+            assert_true(panel.profile_in_use)
+            assert_true(wait_for(lambda: panel.dummy_int == 3))
+
+            # The value is polled periodically.
+            driver._int = 5
+            assert_true(wait_for(lambda: panel.dummy_int == 5))
+
+            # The new values are sent to the driver.
+            panel.update_driver('dummy_int', 7)
+            assert_true(wait_for(lambda: driver._int == 7))
+            assert_true(wait_for(lambda: panel.dummy_int == 7))
+
+        finally:
+            panel.release_driver()
+
+        # The driver is not polled anymore.
+        driver._int = 9
+        sleep(0.3)
+        assert_equal(panel.dummy_int, 7)
+
+    finally:
+        shutil.rmtree(directory)
@@ -200,6 +200,32 @@ class Test_DriverManagement(BaseClass):
         path = plugin.profile_path('N')
         assert path is None
 
+    def test_profile_infos(self):
+        # Test reading a profile through the cache.
+        self.workbench.register(InstrManagerManifest())
+        plugin = self.workbench.get_plugin(u'hqc_meas.instr_manager')
+        assert plugin.profile_infos('N') is None
+
+        infos = plugin.profile_infos('Dummy')
+        assert_equal(infos['driver'], 'PanelTestDummy')
+        # Copies are returned.
+        infos['driver'] = 'Modified'
+        assert_equal(plugin.profile_infos('Dummy')['driver'],
+                     'PanelTestDummy')
+
+        # Modifications of the file are detected.
+        path = plugin.profile_path('Dummy')
+        prof = ConfigObj(path)
+        prof['new'] = 'value'
+        prof.write()
+        mtime = os.path.getmtime(path)
+        os.utime(path, (mtime + 10, mtime + 10))
+        try:
+            assert_equal(plugin.profile_infos('Dummy')['new'], 'value')
+        finally:
+            del prof['new']
+            prof.write()
+
     def test_profile_request1(self):
         # Test basic profile request by registered user.
         self.workbench.register(InstrManagerManifest())
@@ -6,11 +6,17 @@
 #==============================================================================
 """
 """
+import time
+from threading import Event, Timer
 from hqc_meas.instruments.driver_tools import (BaseInstrument,
                                                instrument_property,
                                                InstrIOError,
-                                               secure_communication)
-from nose.tools import assert_is_instance, assert_equal, raises
+                                               secure_communication,
+                                               OperationFuture,
+                                               wait_operations,
+                                               operation_timeout)
+from nose.tools import (assert_is_instance, assert_equal, assert_true,
+                        assert_false, assert_less, assert_raises, raises)
 
 from ..util import complete_line
 
@@ -285,3 +291,64 @@ def test_base_instrument_errors4():
 def test_base_instrument_errors5():
     i = BaseInstrument({})
     i.connected()
+
+
+class Operation(object):
+    """ Fake operation lasting a given time and counting the polls.
+
+    """
+    def __init__(self, duration):
+        self.end = time.time() + duration
+        self.polls = 0
+
+    def __call__(self):
+        self.polls += 1
+        return time.time() >= self.end
+
+
+def test_operation_future1():
+    # Test that the instrument is not polled before the expected duration and
+    # that the interval between polls grows.
+    operation = Operation(0.3)
+    future = OperationFuture(operation, expected=0.1, poll_interval=0.01)
+    assert_false(future.done())
+    assert_equal(operation.polls, 0)
+    future.result()
+    assert_true(future.done())
+    assert_less(operation.polls, 8)
+
+
+@raises(InstrIOError)
+def test_operation_future2():
+    # Test that an operation not over before its deadline fails.
+    OperationFuture(Operation(1.), timeout=0.1).result()
+
+
+def test_wait_operations():
+    # Test that the waits for several operations overlap.
+    operations = [Operation(0.2) for i in range(3)]
+    futures = [OperationFuture(op, expected=0.1) for op in operations]
+    start = time.time()
+    assert_true(wait_operations(futures))
+    assert_less(time.time() - start, 0.4)
+    assert_true(all(f.done() for f in futures))
+
+    with assert_raises(InstrIOError):
+        wait_operations([OperationFuture(Operation(1.))], 0.1)
+
+
+def test_wait_operations_interruption():
+    # Test that setting the stop event interrupts the wait.
+    stop = Event()
+    Timer(0.1, stop.set).start()
+    start = time.time()
+    future = OperationFuture(Operation(10.), expected=5.)
+    assert_false(future.result(stop=stop))
+    assert_less(time.time() - start, 1.)
+    assert_false(future.done())
+
+
+def test_operation_timeout():
+    # Test that the timeout grows with the expected duration.
+    assert_less(0, operation_timeout(0.))
+    assert_less(10., operation_timeout(10.))
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# module : test_agilent_pna.py
+# author : Matthieu Dartiailh
+# license : MIT license
+# =============================================================================
+""" Test the binary data transfers and the batched operations of the Agilent
+PNA driver.
+
+"""
+from threading import Event
+import numpy as np
+from nose.tools import (assert_equal, assert_in, assert_not_in, assert_raises,
+                        assert_true, assert_false)
+from nose.plugins.skip import SkipTest
+
+try:
+    from hqc_meas.instruments.visa.agilent_pna import (AgilentPNA,
+                                                       AgilentPNAChannel)
+except ImportError:
+    # PyVisa is not installed.
+    AgilentPNA = None
+
+from hqc_meas.instruments.driver_tools import InstrIOError
+from ...util import complete_line
+
+
+def setup_module():
+    print complete_line(__name__ + ': setup_module()', '~', 78)
+
+
+def teardown_module():
+    print complete_line(__name__ + ': teardown_module()', '~', 78)
+
+
+def block(values, dtype):
+    """ Build a definite length IEEE 488.2 binary block.
+
+    """
+    data = np.asarray(values, dtype).tostring()
+    length = str(len(data))
+    return '#{}{}{}'.format(len(length), length, data)
+
+
+class FakeVisa(object):
+    """ Visa connection answering from a table of queries and a list of raw
+    reads.
+
+    Writing 'CMD value' updates the answer to 'CMD?' if it exists so that the
+    setters can check the value they set. A list of answers is consumed one
+    answer at a time and an exception in the reads is raised when reached.
+
+    """
+    def __init__(self, answers, reads=()):
+        self.answers = dict(answers)
+        self.reads = list(reads)
+        self.written = []
+        self.cleared = 0
+        self.stb = 32
+
+    def write(self, message):
+        self.written.append(message)
+        command, _, value = message.partition(' ')
+        if command + '?' in self.answers:
+            self.answers[command + '?'] = value
+
+    def ask(self, message):
+        answer = self.answers[message]
+        if isinstance(answer, list):
+            return answer.pop(0)
+        return answer
+
+    def ask_for_values(self, message, format=None):
+        return [float(val) for val in self.ask(message).split(',')]
+
+    def read_raw(self):
+        raw = self.reads.pop(0)
+        if isinstance(raw, Exception):
+            raise raw
+        return raw
+
+    def clear(self):
+        self.cleared += 1
+
+
+class TestBinaryTransfers(object):
+
+    def setup(self):
+        if AgilentPNA is None:
+            raise SkipTest('PyVisa is not installed')
+        self.pna = AgilentPNA({'connection_type': 'GPIB',
+                               'address': '0',
+                               'additionnal_mode': 'INSTR'},
+                              auto_open=False)
+
+    def connect(self, reads, data_format='REAL,+32', byte_order='NORM'):
+        self.pna._driver = FakeVisa({'FORMAT:DATA?': data_format,
+                                     'FORMat:BORDer?': byte_order}, reads)
+        return self.pna._driver
+
+    def test_definite_block(self):
+        self.connect([block([1.5, -2.], '>f4') + '\n'])
+        data = self.pna.ask_for_block('CALC1:DATA? FDATA', '>f4')
+        np.testing.assert_array_equal(data, [1.5, -2.])
+        assert_true(data.flags.writeable)
+
+    def test_indefinite_block(self):
+        raw = np.array([1.5, -2.], '>f8').tostring()
+        self.connect(['#0' + raw + '\n'])
+        data = self.pna.ask_for_block('CALC1:DATA? FDATA', '>f8')
+        np.testing.assert_array_equal(data, [1.5, -2.])
+
+    def test_split_block(self):
+        raw = block(np.arange(10), '>f4') + '\n'
+        self.connect([raw[:7], raw[7:25], raw[25:]])
+        data = self.pna.ask_for_block('CALC1:DATA? FDATA', '>f4')
+        np.testing.assert_array_equal(data, np.arange(10))
+
+    def test_invalid_block(self):
+        self.connect(['1.5,-2.0\n'])
+        assert_raises(InstrIOError, self.pna.ask_for_block,
+                      'CALC1:DATA? FDATA', '>f4')
+
+    def test_blocks(self):
+        raw = np.array([3., 4.], '>f4').tostring()
+        self.connect([block([1., 2.], '>f4') + ';#0' + raw + '\n'])
+        data = self.pna.ask_for_blocks('CALC1:DATA? FDATA;:CALC2:DATA? FDATA',
+                                       '>f4', 2)
+        assert_equal(len(data), 2)
+        np.testing.assert_array_equal(data[0], [1., 2.])
+        np.testing.assert_array_equal(data[1], [3., 4.])
+
+    def test_blocks_indefinite_not_last(self):
+        raw = np.array([1., 2.], '>f4').tostring()
+        self.connect(['#0' + raw + ';' + block([3.], '>f4') + '\n'])
+        assert_raises(InstrIOError, self.pna.ask_for_blocks,
+                      'CALC1:DATA? FDATA;:CALC2:DATA? FDATA', '>f4', 2)
+
+    def test_read_data_select_format(self):
+        # Test that an ASCII transfer is switched to REAL,32 and that the byte
+        # order in use is kept.
+        visa = self.connect([block([1.5, -2.], '<f4') + '\n'],
+                            data_format='ASC,+0', byte_order='SWAP')
+        data = self.pna.read_data('CALC1:DATA? FDATA')
+        np.testing.assert_array_equal(data, [1.5, -2.])
+        assert_equal(visa.written, ['FORMAT:DATA REAL,32',
+                                    'CALC1:DATA? FDATA'])
+
+    def test_read_data_swapped(self):
+        # Test that a SWAPped byte order already set is taken into account.
+        self.connect([block([1.5, -2.], '<f8') + '\n'],
+                     data_format='REAL,+64', byte_order='SWAP')
+        data = self.pna.read_data('CALC1:DATA? FDATA')
+        np.testing.assert_array_equal(data, [1.5, -2.])
+
+    def test_read_data_complex(self):
+        values = [1.5 + 2j, -3. - 4j]
+        self.connect([block(values, '>c8') + '\n'])
+        data = self.pna.read_data('CALC1:DATA? SDATA', True)
+        np.testing.assert_array_equal(data, values)
+
+    def test_read_data_compound(self):
+        self.connect([block([1., 2.], '>f4') + ';' + block([3.], '>f4') +
+                      '\n'])
+        data = self.pna.read_data('CALC1:DATA? FDATA;:CALC2:DATA? FDATA',
+                                  count=2)
+        assert_equal(len(data), 2)
+        np.testing.assert_array_equal(data[0], [1., 2.])
+        np.testing.assert_array_equal(data[1], [3.])
+
+    def test_read_multiple_data(self):
+        values = [1.5 + 2j, -3. - 4j, 5j, 6.]
+        visa = self.connect([block(values, '>c8') + '\n'])
+        channel = AgilentPNAChannel(self.pna, 2)
+        data = channel.read_multiple_data([1, 3])
+        assert_equal(len(data), 2)
+        np.testing.assert_array_equal(data[0], values[:2])
+        np.testing.assert_array_equal(data[1], values[2:])
+        assert_equal(visa.written, ['CALCulate2:DATA:MSData? "1,3"'])
+        assert_not_in('FORMat:BORDer NORMal', visa.written)
+
+
+class TestBatchedOperations(object):
+
+    def setup(self):
+        if AgilentPNA is None:
+            raise SkipTest('PyVisa is not installed')
+        self.pna = AgilentPNA({'connection_type': 'GPIB',
+                               'address': '0',
+                               'additionnal_mode': 'INSTR'},
+                              auto_open=False)
+        self.pna.clear_cache()
+        self.pna._cache['defined_channels'] = [1, 2]
+
+    def connect(self, reads=(), answers={}):
+        table = {'FORMAT:DATA?': 'REAL,+64', 'FORMat:BORDer?': 'NORM',
+                 'SYSTem:ERRor?': ['+0,"No error"'],
+                 'TRIGger:SEQuence:SOURce?': 'MAN', '*ESR?': '0'}
+        for channel in (1, 2):
+            table.update({'SENSe{}:SWEep:MODE?'.format(channel): 'CONT',
+                          'SENSe{}:AVERage:COUNt?'.format(channel): '3',
+                          'SENSe{}:AVERage:STATe?'.format(channel): '0',
+                          'sense{}:sweep:time?'.format(channel): '0.001',
+                          'CALC{}:PAR:MNUM?'.format(channel): '1',
+                          'CALC{}:PARameter:SELect?'.format(channel): '"M"'})
+        table.update(answers)
+        self.pna._driver = FakeVisa(table, reads)
+        return self.pna._driver
+
+    def test_average_channels(self):
+        visa = self.connect()
+        assert_true(self.pna.average_channels([1, 2]))
+        assert_in('SENSe1:SWEep:GROups:COUNt 3', visa.written)
+        assert_in('SENSe2:SWEep:GROups:COUNt 3', visa.written)
+        assert_equal(visa.written[-3:],
+                     ['*ESE 1',
+                      'SENSe1:SWEep:MODE GROups;:SENSe2:SWEep:MODE GROups',
+                      '*OPC'])
+
+    def test_run_averaging(self):
+        # Test that a group count left by average_channels is overridden.
+        visa = self.connect(answers={'SENSe1:SWEep:GROups:COUNt?': '9'})
+        assert_true(self.pna.get_channel(1).run_averaging())
+        assert_equal(visa.answers['SENSe1:SWEep:GROups:COUNt?'], '3')
+        assert_equal(visa.written[-3:],
+                     ['*ESE 1', 'sense1:sweep:mode gro', '*OPC'])
+
+    def test_average_channels_interrupted(self):
+        visa = self.connect()
+        visa.stb = 0
+        stop = Event()
+        stop.set()
+        assert_false(self.pna.average_channels([1, 2], stop))
+
+    def test_read_channels_data(self):
+        values = [1. + 2j, 3j, 4., 5. - 6j]
+        visa = self.connect([block(values[:2], '>c16') + ';' +
+                             block(values[2:], '>c16') + '\n'])
+        data = self.pna.read_channels_data({1: [1, 3], 2: [2]})
+        assert_equal(sorted(data), [1, 2])
+        np.testing.assert_array_equal(data[1][0], values[:1])
+        np.testing.assert_array_equal(data[1][1], values[1:2])
+        np.testing.assert_array_equal(data[2][0], values[2:])
+        assert_equal(visa.written, ['CALCulate1:DATA:MSData? "1,3";'
+                                    ':CALCulate2:DATA:MSData? "2"'])
+
+    def test_read_channels_data_unsupported(self):
+        # Test that the channels are read one after the other if the PNA does
+        # not know the query.
+        errors = ['-113,"Undefined header"', '+0,"No error"']
+        visa = self.connect([InstrIOError('Timeout'),
+                             block([1. + 2j], '>c16') + '\n',
+                             block([3j], '>c16') + '\n'],
+                            {'SYSTem:ERRor?': errors})
+        data = self.pna.read_channels_data({1: [1, 3]})
+        np.testing.assert_array_equal(data[1][0], [1. + 2j])
+        np.testing.assert_array_equal(data[1][1], [3j])
+        assert_false(self.pna.multiple_data_supported)
+        assert_equal(visa.cleared, 1)
+        assert_in('CALC1:PAR:MNUM 3', visa.written)
+
+    def test_read_channels_data_failure(self):
+        # Test that an other failure does not disable the batched query.
+        errors = ['-222,"Data out of range"', '+0,"No error"']
+        self.connect([InstrIOError('Timeout')], {'SYSTem:ERRor?': errors})
+        assert_raises(InstrIOError, self.pna.read_channels_data, {1: [1, 3]})
+        assert_true(self.pna.multiple_data_supported)
+
+    def test_read_channels_data_wrong_size(self):
+        self.connect([block([1., 2., 3.], '>c16') + ';' +
+                      block([4.], '>c16') + '\n'])
+        assert_raises(InstrIOError, self.pna.read_channels_data,
+                      {1: [1, 3], 2: [2]})
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# module : test_tektro_awg.py
+# author : Matthieu Dartiailh
+# license : MIT license
+# =============================================================================
+""" Test the registry of the waveforms sent to the Tektronix AWG.
+
+"""
+import os
+import re
+import shutil
+from tempfile import mkdtemp
+from nose.tools import assert_equal, assert_in, assert_not_in
+from nose.plugins.skip import SkipTest
+
+try:
+    from hqc_meas.instruments.visa import tektro_awg
+    from hqc_meas.instruments.visa.tektro_awg import AWG
+except ImportError:
+    # PyVisa is not installed.
+    tektro_awg = None
+    AWG = object
+
+from ...util import complete_line
+
+
+def setup_module():
+    print complete_line(__name__ + ': setup_module()', '~', 78)
+
+
+def teardown_module():
+    print complete_line(__name__ + ': teardown_module()', '~', 78)
+
+
+class FakeAWG(AWG):
+    """ AWG driver whose WLIST is simulated.
+
+    """
+    def __init__(self):
+        super(FakeAWG, self).__init__({'connection_type': 'TCPIP',
+                                       'address': '0.0.0.0',
+                                       'additionnal_mode': 'INSTR'},
+                                      auto_open=False)
+        self.wlist = ['sin', 'ramp']
+        self.uploads = []
+        self.queries = []
+
+    def write(self, message):
+        match = re.match("WLIST:WAVEFORM:(DELETE|NEW) '([^']*)'", message)
+        if match:
+            action, name = match.groups()
+            if action == 'DELETE' and name in self.wlist:
+                self.wlist.remove(name)
+            elif action == 'NEW':
+                self.wlist.append(name)
+        elif message.startswith('WLIS:WAV:DATA'):
+            self.uploads.append(message.split("'")[1])
+
+    def ask(self, message):
+        self.queries.append(message)
+        if message == 'WLISt:SIZE?':
+            return str(len(self.wlist))
+        return '"{}"'.format(self.wlist[int(message.split()[1])])
+
+    def reset(self):
+        self.wlist = ['sin', 'ramp']
+
+
+class TestWaveformRegistry(object):
+
+    def setup(self):
+        if tektro_awg is None:
+            raise SkipTest('PyVisa is not installed')
+        self.folder = mkdtemp()
+        self.old_folder = tektro_awg.REGISTRY_FOLDER
+        tektro_awg.REGISTRY_FOLDER = self.folder
+        tektro_awg.WAVEFORM_REGISTRIES.clear()
+        self.awg = FakeAWG()
+
+    def teardown(self):
+        if tektro_awg is None:
+            return
+        tektro_awg.REGISTRY_FOLDER = self.old_folder
+        tektro_awg.WAVEFORM_REGISTRIES.clear()
+        shutil.rmtree(self.folder)
+
+    def test_deduplication(self):
+        # Test that a waveform is uploaded only once.
+        name = self.awg.send_waveform('Seq_Ch1', bytearray(b'\x00\x01'))
+        assert_in(name, self.awg.wlist)
+        assert_equal(self.awg.send_waveform('Seq_Ch1', bytearray(b'\x00\x01')),
+                     name)
+        self.awg.send_waveform('Seq_Ch1', bytearray(b'\x00\x02'))
+        assert_equal(len(self.awg.uploads), 2)
+        assert_equal(len(self.awg.wlist), 4)
+
+    def test_existing_waveforms(self):
+        # Test that the waveforms already in the WLIST are not sent again.
+        name = self.awg.send_waveform('Seq_Ch1', bytearray(b'\x00\x01'))
+        tektro_awg.WAVEFORM_REGISTRIES.clear()
+        os.remove(self.awg._registry_path())
+        assert_equal(self.awg.send_waveform('Seq_Ch1', bytearray(b'\x00\x01')),
+                     name)
+        assert_equal(len(self.awg.uploads), 1)
+        assert_in('WLISt:NAME? 2', self.awg.queries)
+
+    def test_reset(self):
+        # Test that the waveforms are sent again after a reset.
+        self.awg.send_waveform('Seq_Ch1', bytearray(b'\x00\x01'))
+        self.awg.reset()
+        name = self.awg.send_waveform('Seq_Ch1', bytearray(b'\x00\x01'))
+        assert_equal(len(self.awg.uploads), 2)
+        assert_in(name, self.awg.wlist)
+
+    def test_external_deletion(self):
+        # Test that a waveform deleted by other means is sent again.
+        name = self.awg.send_waveform('Seq_Ch1', bytearray(b'\x00\x01'))
+        self.awg.send_waveform('Seq_Ch1', bytearray(b'\x00\x02'))
+        self.awg.wlist.remove(name)
+        assert_equal(self.awg.send_waveform('Seq_Ch1', bytearray(b'\x00\x01')),
+                     name)
+        assert_equal(len(self.awg.uploads), 3)
+        assert_in(name, self.awg.wlist)
+
+    def test_overwritten_name(self):
+        # Test that a waveform overwritten using to_send is sent again.
+        name = self.awg.send_waveform('Seq_Ch1', bytearray(b'\x00\x01'))
+        self.awg.to_send(name, bytearray(b'\x00\x03'), False)
+        self.awg.send_waveform('Seq_Ch1', bytearray(b'\x00\x01'))
+        assert_equal(self.awg.uploads, [name]*3)
+
+    def test_overwritten_name_saved(self):
+        # Test that another process does not reuse an overwritten waveform.
+        name = self.awg.send_waveform('Seq_Ch1', bytearray(b'\x00\x01'))
+        self.awg.to_send(name, bytearray(b'\x00\x03'), False)
+        tektro_awg.WAVEFORM_REGISTRIES.clear()
+        awg = FakeAWG()
+        awg.wlist = self.awg.wlist
+        awg.send_waveform('Seq_Ch1', bytearray(b'\x00\x01'))
+        assert_equal(awg.uploads, [name])
+
+    def test_pruning(self):
+        # Test that the least recently used waveforms not used by the current
+        # sequence are deleted once the maximal count is reached.
+        old_max = tektro_awg.MAX_HASHED_WAVEFORMS
+        tektro_awg.MAX_HASHED_WAVEFORMS = 2
+        try:
+            first = self.awg.send_waveform('Seq_Ch1', bytearray(b'\x00\x01'))
+            second = self.awg.send_waveform('Seq_Ch1',
+                                            bytearray(b'\x00\x02'))
+            self.awg.clear_sequence()
+            self.awg.send_waveform('Seq_Ch1', bytearray(b'\x00\x01'))
+            third = self.awg.send_waveform('Seq_Ch1', bytearray(b'\x00\x03'))
+            assert_not_in(second, self.awg.wlist)
+            assert_in(first, self.awg.wlist)
+            assert_in(third, self.awg.wlist)
+
+            # The waveforms of the current sequence are kept.
+            self.awg.send_waveform('Seq_Ch1', bytearray(b'\x00\x04'))
+            assert_equal(len(self.awg.wlist), 5)
+
+            # The saved registry matches the WLIST.
+            tektro_awg.WAVEFORM_REGISTRIES.clear()
+            awg = FakeAWG()
+            awg.wlist = self.awg.wlist
+            awg.send_waveform('Seq_Ch1', bytearray(b'\x00\x03'))
+            assert_equal(awg.uploads, [])
+            assert_not_in('WLISt:NAME? 0', awg.queries)
+        finally:
+            tektro_awg.MAX_HASHED_WAVEFORMS = old_max
+
+    def test_saved_registry(self):
+        # Test that another process reuses the saved registry without
+        # scanning the WLIST.
+        name = self.awg.send_waveform('Seq_Ch1', bytearray(b'\x00\x01'))
+        tektro_awg.WAVEFORM_REGISTRIES.clear()
+        awg = FakeAWG()
+        awg.wlist = self.awg.wlist
+        assert_equal(awg.send_waveform('Seq_Ch1', bytearray(b'\x00\x01')),
+                     name)
+        assert_equal(awg.uploads, [])
+        assert_not_in('WLISt:NAME? 0', awg.queries)
+
+        # An outdated saved registry is not used.
+        tektro_awg.WAVEFORM_REGISTRIES.clear()
+        awg.reset()
+        awg.send_waveform('Seq_Ch1', bytearray(b'\x00\x01'))
+        assert_equal(awg.uploads, [name])
@@ -223,6 +223,56 @@ class TestProcessEngine(object):
         assert_in('test',
                   workspace.dock_area.find('subprocess_log').model.text)
 
+    def test_measure_processing_standby(self):
+        """ Test that the next measure is run by the standby process.
+
+        """
+        plugin = self.workbench.get_plugin(u'hqc_meas.measure')
+        measure1 = self._create_measure(plugin)
+        plugin.enqueued_measures.append(measure1)
+        measure2 = self._create_measure(plugin)
+        measure2.name = 'Test2'
+        core = self.workbench.get_plugin('enaml.workbench.core')
+        cmd = 'hqc_meas.dependencies.collect_dependencies'
+        _, b_deps = core.invoke_command(cmd, {'obj': measure2.root_task,
+                                              'dependencies': ['build']})
+        measure2.store['build_deps'] = b_deps
+        plugin.enqueued_measures.append(measure2)
+
+        cmd = u'enaml.workbench.ui.select_workspace'
+        core.invoke_command(cmd, {'workspace': u'hqc_meas.measure.workspace'},
+                            self)
+
+        workspace = plugin.workspace
+        plugin.selected_engine = u'hqc_meas.measure.engines.process_engine'
+        workspace.start_processing_measures()
+
+        engine = plugin.engine_instance
+        assert_true(engine._standby and engine._standby.is_alive())
+        assert_equal(engine._prepared[0], 'Test2')
+        standby_pid = engine._standby.pid
+
+        i = 0
+        while measure2.status != 'RUNNING':
+            process_app_events()
+            sleep(0.05)
+            i += 1
+            if i > 400:
+                raise Exception('First measure took too long to complete.')
+
+        assert_equal(measure1.status, 'COMPLETED')
+        assert_equal(engine._process.pid, standby_pid)
+
+        while engine.active:
+            process_app_events()
+            sleep(0.1)
+            i += 1
+            if i > 600:
+                raise Exception('Engine took too long to exit.')
+
+        process_app_events()
+        assert_equal(measure2.status, 'COMPLETED')
+
 # For some tests don't need to use the plugin to start, stop the engine.
 
     def test_measure_processing2(self):
@@ -253,6 +303,8 @@ class TestProcessEngine(object):
 
         # Check engine state.
         assert_true(engine._temp)
+        shared_dir = engine._shared_dir
+        assert_true(os.path.isdir(shared_dir))
         assert_false(engine._meas_stop.is_set())
         assert_false(engine._stop.is_set())
         assert_false(engine._force_stop.is_set())
@@ -290,6 +342,9 @@ class TestProcessEngine(object):
         assert_in('root/print_message', monitor.engine_news)
         assert_equal(monitor.engine_news['root/print_message'], 'test')
 
+        # Check the directory used to share the arrays was removed.
+        assert_false(os.path.isdir(shared_dir))
+
     def test_measure_processing3(self):
         """ Test the processing of a measure failing the tests.
 
@@ -633,3 +688,22 @@ def test_proc_filter4():
     filt = ProcFilter(reject_if_equal=True)
     rec = Record('MeasureProcess')
     assert_false(filt.filter(rec))
+
+
+def test_prepare_next_pooled_profiles():
+    # Test that no standby process is started for a measure using the
+    # instruments to which the current process keeps connections open.
+    engine = ProcessEngine()
+    engine._pooled_profiles = set(['Test', 'Other'])
+    engine.prepare_next('Next', RootTask(), [], {}, ['Test'])
+    assert_false(engine._standby)
+    assert_equal(engine._prepared, ('', None))
+
+
+def test_release_instruments():
+    # Test that the released profiles are forgotten even if the process is
+    # not running.
+    engine = ProcessEngine()
+    engine._pooled_profiles = set(['Test', 'Other'])
+    engine.release_instruments(['Test'])
+    assert_equal(engine._pooled_profiles, set(['Other']))
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+from enaml.workbench.api import Workbench
+import enaml
+import os
+import logging
+from time import sleep
+from configobj import ConfigObj
+from nose.tools import (assert_in, assert_not_in, assert_equal, assert_true,
+                        assert_false)
+
+from hqc_meas.measurement.measure import Measure
+from hqc_meas.tasks.base_tasks import RootTask
+from hqc_meas.tasks.tasks_util.log_task import LogTask
+from hqc_meas.tasks.tasks_util.sleep_task import SleepTask
+
+with enaml.imports():
+    from enaml.workbench.core.core_manifest import CoreManifest
+    from enaml.workbench.ui.ui_manifest import UIManifest
+    from hqc_meas.app_manifest import HqcAppManifest
+    from hqc_meas.utils.state.manifest import StateManifest
+    from hqc_meas.utils.preferences.manifest import PreferencesManifest
+    from hqc_meas.utils.log.manifest import LogManifest
+    from hqc_meas.utils.dependencies.manifest import DependenciesManifest
+    from hqc_meas.measurement.manifest import MeasureManifest
+    from hqc_meas.tasks.manager.manifest import TaskManagerManifest
+    from hqc_meas.instruments.manager.manifest import InstrManagerManifest
+    from hqc_meas.measurement.engines.thread_engine.engine\
+        import ThreadEngine
+
+    from ..helpers import TestSuiteManifest
+
+from ...util import (complete_line, process_app_events, remove_tree,
+                     create_test_dir)
+
+
+def setup_module():
+    print complete_line(__name__ + ': setup_module()', '~', 78)
+
+
+def teardown_module():
+    print complete_line(__name__ + ': teardown_module()', '~', 78)
+
+
+class TestThreadEngine(object):
+
+    test_dir = ''
+
+    @classmethod
+    def setup_class(cls):
+        print complete_line(__name__ +
+                            ':{}.setup_class()'.format(cls.__name__), '-', 77)
+        # Creating dummy directory for prefs (avoid prefs interferences).
+        directory = os.path.dirname(__file__)
+        cls.test_dir = os.path.join(directory, '_temps')
+        create_test_dir(cls.test_dir)
+
+        # Creating dummy default.ini file in utils.
+        util_path = os.path.join(directory, '..', '..', '..', 'hqc_meas',
+                                 'utils', 'preferences')
+        def_path = os.path.join(util_path, 'default.ini')
+
+        # Making the preference manager look for info in test dir.
+        default = ConfigObj(def_path)
+        default['folder'] = cls.test_dir
+        default['file'] = 'default_test.ini'
+        default.write()
+
+        conf = ConfigObj(os.path.join(cls.test_dir, 'default_test.ini'))
+        path = 'hqc_meas.measurement.engines.thread_engine'
+        prefs = {'manifests': repr([(path, 'ThreadEngineManifest')])}
+        conf[u'hqc_meas.measure'] = prefs
+        conf.write()
+
+    @classmethod
+    def teardown_class(cls):
+        print complete_line(__name__ +
+                            ':{}.teardown_class()'.format(cls.__name__), '-',
+                            77)
+        # Removing pref files creating during tests.
+        remove_tree(cls.test_dir)
+
+        # Restoring default.ini file in utils
+        directory = os.path.dirname(__file__)
+        util_path = os.path.join(directory, '..', '..', '..', 'hqc_meas',
+                                 'utils', 'preferences')
+        def_path = os.path.join(util_path, 'default.ini')
+        os.remove(def_path)
+
+        aux = os.path.join(util_path, '__default.ini')
+        if os.path.isfile(aux):
+            os.rename(aux, def_path)
+
+    def setup(self):
+
+        self.workbench = Workbench()
+        self.workbench.register(CoreManifest())
+        self.workbench.register(UIManifest())
+        self.workbench.register(HqcAppManifest())
+        self.workbench.register(StateManifest())
+        self.workbench.register(PreferencesManifest())
+        self.workbench.register(LogManifest())
+        self.workbench.register(DependenciesManifest())
+        self.workbench.register(TaskManagerManifest())
+        self.workbench.register(InstrManagerManifest())
+        self.workbench.register(MeasureManifest())
+        self.workbench.register(TestSuiteManifest())
+
+    def teardown(self):
+        core = self.workbench.get_plugin(u'enaml.workbench.core')
+        core.invoke_command(u'enaml.workbench.ui.close_workspace', {}, self)
+        self.workbench.unregister(u'tests.suite')
+        self.workbench.unregister(u'hqc_meas.measure')
+        self.workbench.unregister(u'hqc_meas.task_manager')
+        self.workbench.unregister(u'hqc_meas.instr_manager')
+        self.workbench.unregister(u'hqc_meas.logging')
+        self.workbench.unregister(u'hqc_meas.dependencies')
+        self.workbench.unregister(u'hqc_meas.preferences')
+        self.workbench.unregister(u'hqc_meas.state')
+        self.workbench.unregister(u'hqc_meas.app')
+        self.workbench.unregister(u'enaml.workbench.ui')
+        self.workbench.unregister(u'enaml.workbench.core')
+
+    def test_measure_processing1(self):
+        """ Test the processing of a single measure (using the plugin).
+
+        """
+        counter = 0
+        plugin = self.workbench.get_plugin(u'hqc_meas.measure')
+        assert_in(u'hqc_meas.measure.engines.thread_engine', plugin.engines)
+        measure = self._create_measure(plugin)
+        plugin.enqueued_measures.append(measure)
+
+        core = self.workbench.get_plugin(u'enaml.workbench.core')
+        cmd = u'enaml.workbench.ui.select_workspace'
+        core.invoke_command(cmd, {'workspace': u'hqc_meas.measure.workspace'},
+                            self)
+
+        workspace = plugin.workspace
+        plugin.selected_engine = u'hqc_meas.measure.engines.thread_engine'
+        workspace.start_processing_measures()
+
+        engine = plugin.engine_instance
+        assert_true(engine.active)
+        while engine.active:
+            process_app_events()
+            sleep(0.05)
+            counter += 1
+            if counter > 200:
+                raise Exception('Task took too long to complete.')
+
+        process_app_events()
+        assert_equal(measure.status, 'COMPLETED')
+        assert_in('test', workspace.log_model.text)
+
+    def test_measure_processing2(self):
+        """ Test the processing of a single measure (not using the plugin).
+
+        Test the communication with the monitors.
+
+        """
+        plugin = self.workbench.get_plugin(u'hqc_meas.measure')
+
+        measure = self._create_measure(plugin)
+        monitor = measure.monitors.values()[0]
+
+        core = self.workbench.get_plugin('enaml.workbench.core')
+        cmd = 'hqc_meas.dependencies.collect_dependencies'
+        _, b_deps = core.invoke_command(cmd, {'obj': measure.root_task,
+                                              'dependencies': ['build']})
+
+        engine = ThreadEngine(workbench=self.workbench)
+        engine.observe('news', monitor.process_news)
+        results = []
+        engine.observe('done', lambda change: results.append(change['value']))
+
+        engine.prepare_to_run('test', measure.root_task,
+                              measure.collect_entries_to_observe(), b_deps)
+        assert_false(engine._root is measure.root_task)
+
+        monitor.start(None)
+        engine.run()
+
+        i = 0
+        while engine.active:
+            process_app_events()
+            sleep(0.05)
+            i += 1
+            if i == 5:
+                logging.getLogger(__name__).critical('unrelated record')
+            if i > 200:
+                raise Exception('Task took too long to complete.')
+
+        assert_equal(results, [('COMPLETED', 'Measure test succeeded')])
+        assert_equal(monitor.engine_news['root/print_message'], 'test')
+
+        # Only the records of the measure are logged in its file.
+        with open(os.path.join(self.test_dir, 'test.log')) as f:
+            assert_not_in('unrelated record', f.read())
+
+    def test_stop_measure(self):
+        """ Test stopping a measure.
+
+        """
+        plugin = self.workbench.get_plugin(u'hqc_meas.measure')
+        measure = self._create_measure(plugin)
+
+        core = self.workbench.get_plugin('enaml.workbench.core')
+        cmd = 'hqc_meas.dependencies.collect_dependencies'
+        _, b_deps = core.invoke_command(cmd, {'obj': measure.root_task,
+                                              'dependencies': ['build']})
+
+        engine = ThreadEngine(workbench=self.workbench)
+        results = []
+        engine.observe('done', lambda change: results.append(change['value']))
+
+        engine.prepare_to_run('test', measure.root_task,
+                              measure.collect_entries_to_observe(), b_deps)
+        engine.run()
+        sleep(0.2)
+        engine.stop()
+
+        i = 0
+        while engine.active:
+            process_app_events()
+            sleep(0.05)
+            i += 1
+            if i > 200:
+                raise Exception('Task took too long to stop.')
+
+        assert_equal(results, [('INTERRUPTED', 'Measure test was stopped')])
+
+    def test_force_stop_measure(self):
+        """ Test forcing a measure to stop.
+
+        """
+        plugin = self.workbench.get_plugin(u'hqc_meas.measure')
+        measure = self._create_measure(plugin)
+
+        core = self.workbench.get_plugin('enaml.workbench.core')
+        cmd = 'hqc_meas.dependencies.collect_dependencies'
+        _, b_deps = core.invoke_command(cmd, {'obj': measure.root_task,
+                                              'dependencies': ['build']})
+
+        engine = ThreadEngine(workbench=self.workbench)
+        results = []
+        engine.observe('done', lambda change: results.append(change['value']))
+
+        engine.prepare_to_run('test', measure.root_task,
+                              measure.collect_entries_to_observe(), b_deps)
+        engine.run()
+        engine.force_stop()
+
+        assert_false(engine.active)
+        assert_equal(results[0][0], 'INTERRUPTED')
+
+        # The abandoned thread should not notify anything.
+        engine._thread.join()
+        process_app_events()
+        assert_equal(len(results), 1)
+
+    def _create_measure(self, plugin):
+        """ Create a measure.
+
+        """
+        measure = Measure(plugin=plugin, name='Test1')
+        measure.root_task = RootTask(default_path=self.test_dir)
+        children = [SleepTask(task_name='sleep1', time=1),
+                    LogTask(task_name='print', message='test'),
+                    SleepTask(task_name='sleep2', time=0.1)]
+        measure.root_task.children_task.extend(children)
+        measure.status = 'READY'
+        monitor_decl = plugin.monitors[u'monitor1']
+        measure.add_monitor(monitor_decl.id,
+                            monitor_decl.factory(monitor_decl,
+                                                 self.workbench))
+        return measure
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+from multiprocessing.queues import Queue
+import numpy as np
+from nose.tools import (assert_equal, assert_is_instance, assert_false,
+                        assert_is_none, assert_not_equal)
+
+from hqc_meas.tasks.tools.task_database import TaskDatabase
+from hqc_meas.measurement.engines.tools import (MeasureSpy,
+                                                ThreadMeasureMonitor,
+                                                SharedArray,
+                                                load_shared_array,
+                                                make_shared_dir,
+                                                SHARED_ARRAY_SLOTS)
+from hqc_meas.measurement.monitors.decimation import Decimator, Decimated
+
+from ...util import complete_line
+
+
+def setup_module():
+    print complete_line(__name__ + ': setup_module()', '~', 78)
+
+
+def teardown_module():
+    print complete_line(__name__ + ': teardown_module()', '~', 78)
+
+
+class FalseEngine(object):
+    """ Object collecting the news sent by the monitor thread.
+
+    """
+    def __init__(self):
+        self.received = []
+
+    def news(self, news):
+        self.received.append(news)
+
+
+def test_shared_arrays():
+    # Test that large arrays go through memory mapped files while small
+    # values are sent as is.
+    database = TaskDatabase()
+    database.set_value('root', 'small', 1)
+    database.set_value('root', 'large', np.zeros(1))
+    database.prepare_for_running()
+
+    queue = Queue()
+    spy = MeasureSpy(queue, ['root/small', 'root/large'], database)
+    large = np.arange(20000, dtype=np.float64)
+    database.set_value('root', 'small', 2)
+    for i in range(SHARED_ARRAY_SLOTS + 1):
+        database.set_value('root', 'large', large + i)
+
+    small = queue.get()
+    assert_equal(small, ('root/small', 2))
+    shared = [queue.get() for i in range(SHARED_ARRAY_SLOTS + 1)]
+    assert_is_instance(shared[0][1], SharedArray)
+    # The files are used in turn.
+    assert_equal(shared[0][1].path, shared[-1][1].path)
+    assert_equal(len(set(s[1].path for s in shared)), SHARED_ARRAY_SLOTS)
+
+    # The first value was overwritten before being read and is dropped.
+    for news in [small] + shared:
+        queue.put(news)
+    spy.close()
+    queue.put((None, None))
+
+    engine = FalseEngine()
+    monitor = ThreadMeasureMonitor(engine, queue)
+    monitor.start()
+    monitor.join()
+
+    assert_equal(engine.received[0], ('root/small', 2))
+    assert_equal(len(engine.received), SHARED_ARRAY_SLOTS + 1)
+    for i, (entry, value) in enumerate(engine.received[1:]):
+        assert_equal(entry, 'root/large')
+        assert_false(isinstance(value, np.memmap))
+        np.testing.assert_array_equal(value, large + i + 1)
+
+    assert_false(os.path.isdir(spy.shared_dir))
+
+
+def test_shared_array_generation():
+    # Test that a value being written or overwritten is never read.
+    database = TaskDatabase()
+    database.set_value('root', 'large', np.zeros(1))
+    database.prepare_for_running()
+
+    queue = Queue()
+    spy = MeasureSpy(queue, ['root/large'], database)
+    large = np.arange(40000, dtype=np.int32).reshape((200, 200))
+    database.set_value('root', 'large', large)
+    _, shared = queue.get()
+    np.testing.assert_array_equal(load_shared_array(shared), large)
+
+    # Value being written.
+    header = np.memmap(shared.path, dtype=np.int64, mode='r+', shape=(1,))
+    header[0] = -shared.generation
+    assert_is_none(load_shared_array(shared))
+
+    # Value overwritten.
+    header[0] = shared.generation + SHARED_ARRAY_SLOTS
+    assert_is_none(load_shared_array(shared))
+    del header
+
+    # File removed.
+    spy.close()
+    _, shared_dir = queue.get()
+    shutil.rmtree(shared_dir)
+    assert_is_none(load_shared_array(shared))
+
+
+def test_shared_array_locked_file():
+    # Test that a file which cannot be removed when the size of the array
+    # changes (Windows) is replaced by a new one.
+    database = TaskDatabase()
+    database.set_value('root', 'large', np.zeros(1))
+    database.prepare_for_running()
+
+    queue = Queue()
+    spy = MeasureSpy(queue, ['root/large'], database)
+    for i in range(SHARED_ARRAY_SLOTS):
+        database.set_value('root', 'large', np.zeros(20000))
+    shared = [queue.get()[1] for i in range(SHARED_ARRAY_SLOTS)]
+
+    def locked(path):
+        raise OSError()
+
+    remove = os.remove
+    os.remove = locked
+    try:
+        database.set_value('root', 'large', np.ones(30000))
+    finally:
+        os.remove = remove
+
+    _, new = queue.get()
+    assert_not_equal(new.path, shared[0].path)
+    np.testing.assert_array_equal(load_shared_array(new), np.ones(30000))
+    spy.close()
+    shutil.rmtree(queue.get()[1])
+
+
+def test_provided_shared_dir():
+    # Test that the spy writes the large arrays in the directory it is given.
+    database = TaskDatabase()
+    database.set_value('root', 'large', np.zeros(1))
+    database.prepare_for_running()
+
+    shared_dir = make_shared_dir()
+    try:
+        queue = Queue()
+        spy = MeasureSpy(queue, ['root/large'], database, shared_dir)
+        database.set_value('root', 'large', np.zeros(20000))
+        _, shared = queue.get()
+        assert_equal(os.path.dirname(shared.path), shared_dir)
+        spy.close()
+        assert_equal(queue.get(), ('', shared_dir))
+    finally:
+        shutil.rmtree(shared_dir)
+
+
+def test_spy_reducers():
+    # Test that the reducers are applied before sending the values and that a
+    # failing reducer does not prevent sending them.
+    database = TaskDatabase()
+    database.set_value('root', 'trace', np.zeros(1))
+    database.set_value('root', 'failing', 1)
+    database.set_value('root', 'raw', 1)
+    database.prepare_for_running()
+
+    def failing(value):
+        raise ValueError()
+
+    queue = Queue()
+    spy = MeasureSpy(queue, {'root/trace': Decimator(10),
+                             'root/failing': failing, 'root/raw': None},
+                     database)
+    database.set_value('root', 'trace', np.arange(100000.))
+    database.set_value('root', 'failing', 2)
+    database.set_value('root', 'raw', 3)
+
+    entry, value = queue.get()
+    assert_equal(entry, 'root/trace')
+    assert_is_instance(value, Decimated)
+    assert_equal(len(value.values), 10)
+    assert_equal(queue.get(), ('root/failing', 2))
+    assert_equal(queue.get(), ('root/raw', 3))
+    spy.close()
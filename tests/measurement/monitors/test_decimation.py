@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import cPickle
+import numpy as np
+from nose.tools import assert_equal, assert_is, assert_is_instance
+
+from hqc_meas.measurement.monitors.decimation import (decimate_minmax,
+                                                      decimate_mean,
+                                                      Decimator, Decimated)
+
+from ...util import complete_line
+
+
+def setup_module():
+    print complete_line(__name__ + ': setup_module()', '~', 78)
+
+
+def teardown_module():
+    print complete_line(__name__ + ': teardown_module()', '~', 78)
+
+
+def test_decimate_minmax():
+    # Test that the envelope of the trace is preserved.
+    array = np.zeros(1000)
+    array[123] = 5
+    array[877] = -3
+    decimated = decimate_minmax(array, 10)
+    assert_equal(decimated.shape, (1000,))
+    assert_equal(len(decimated.values), 20)
+    assert_equal(decimated.values.max(), 5)
+    assert_equal(decimated.values.min(), -3)
+    assert_equal(decimated.positions[0], 0)
+    assert_equal(decimated.positions[-1], 999)
+
+    # Short arrays are left untouched.
+    decimated = decimate_minmax(np.arange(10), 10)
+    np.testing.assert_array_equal(decimated.values, np.arange(10))
+
+    # Complex arrays are decimated using their modulus.
+    decimated = decimate_minmax(np.ones(1000)*1j, 10)
+    np.testing.assert_array_equal(decimated.values, np.ones(20))
+
+
+def test_decimate_mean():
+    # Test averaging 1D and 2D arrays.
+    decimated = decimate_mean(np.arange(100.), 10)
+    np.testing.assert_array_equal(decimated.values,
+                                  np.arange(4.5, 100, 10))
+    np.testing.assert_array_equal(decimated.positions, np.arange(0, 100, 10))
+
+    decimated = decimate_mean(np.ones((40, 5)), 10)
+    assert_equal(decimated.values.shape, (10, 5))
+    assert_equal(decimated.shape, (40, 5))
+    np.testing.assert_array_equal(decimated.positions[1], np.arange(5))
+
+
+def test_decimate_mean_integers():
+    # Test that integer and boolean arrays are not floor divided.
+    decimated = decimate_mean(np.arange(100), 10)
+    np.testing.assert_array_equal(decimated.values,
+                                  np.arange(4.5, 100, 10))
+
+    decimated = decimate_mean(np.arange(40) % 2 == 0, 10)
+    np.testing.assert_array_equal(decimated.values, 0.5*np.ones(10))
+
+
+def test_decimator():
+    # Test the decimator selects the right decimation and can be pickled.
+    decimator = Decimator(20)
+    assert_equal(len(decimator(np.arange(1000.)).values), 20)
+    assert_equal(len(Decimator(20, 'mean')(np.arange(1000.)).values), 20)
+    assert_is_instance(decimator(np.ones((100, 100))), Decimated)
+    value = [1, 2]
+    assert_is(decimator(value), value)
+
+    assert_equal(cPickle.loads(cPickle.dumps(decimator, 2)), decimator)
+    assert_equal(len({Decimator(20), Decimator(20), Decimator(10)}), 2)
+
+
+def test_decimated():
+    # Test that a decimated array can be pickled and displayed as text.
+    decimated = Decimator(20)(np.arange(1000.))
+    copy = cPickle.loads(cPickle.dumps(decimated, 2))
+    assert_is_instance(copy, Decimated)
+    np.testing.assert_array_equal(copy.values, decimated.values)
+    assert_equal('{}'.format(decimated),
+                 '{} (decimated from shape (1000,))'.format(decimated.values))
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+from time import sleep
+import numpy as np
+from nose.tools import (assert_equal, assert_true, assert_false,
+                        assert_is_instance, assert_dict_equal)
+
+from hqc_meas.measurement.monitors.decimation import Decimator
+from hqc_meas.measurement.monitors.plot_monitor.monitor import PlotMonitor
+from hqc_meas.measurement.monitors.plot_monitor.plots import (TracePlot,
+                                                              MapPlot)
+
+from ...util import complete_line, process_app_events
+
+
+def setup_module():
+    print complete_line(__name__ + ': setup_module()', '~', 78)
+
+
+def teardown_module():
+    print complete_line(__name__ + ': teardown_module()', '~', 78)
+
+
+class TestPlots(object):
+
+    @classmethod
+    def setup_class(cls):
+        print complete_line(__name__ +
+                            ':{}.setup_class()'.format(cls.__name__), '-', 77)
+
+    @classmethod
+    def teardown_class(cls):
+        print complete_line(__name__ +
+                            ':{}.teardown_class()'.format(cls.__name__), '-',
+                            77)
+
+    def test_trace_plot(self):
+        """ Test processing raw and decimated traces.
+
+        """
+        plot = TracePlot(entry='root/trace', points=100)
+        assert_equal(plot.depend_on, ['root/trace'])
+        assert_equal(plot.get_data(), None)
+        assert_false(plot.process('root/other', 1))
+
+        decimator = plot.reducers()['root/trace']
+        assert_equal(decimator, Decimator(100))
+        assert_true(plot.process('root/trace', decimator(np.arange(1e4))))
+        positions, values = plot.get_data()
+        assert_equal(len(values), 100)
+        assert_equal(values.max(), 9999)
+
+        # Raw values are decimated locally.
+        assert_true(plot.process('root/trace', np.arange(1e4)))
+        assert_equal(len(plot.get_data()[1]), 100)
+
+        plot.clear()
+        assert_equal(plot.get_data(), None)
+
+    def test_map_plot_pixels(self):
+        """ Test building a map point by point.
+
+        """
+        plot = MapPlot(entry='root/val', row_index='root/i',
+                       column_index='root/j', rows=2, columns=3)
+        assert_equal(plot.depend_on, ['root/val', 'root/i', 'root/j'])
+        assert_dict_equal(plot.reducers(), {})
+
+        for i in (1, 2, 3):
+            assert_false(plot.process('root/i', i))
+            for j in (1, 2, 3):
+                plot.process('root/j', j)
+                assert_true(plot.process('root/val', 10*i + j))
+
+        data = plot.get_data()
+        assert_equal(data.shape, (3, 3))
+        assert_equal(data[2, 1], 32)
+
+    def test_map_plot_rows(self):
+        """ Test building a map row by row from decimated arrays.
+
+        """
+        plot = MapPlot(entry='root/val', row_index='root/i', columns=10)
+        decimator = plot.reducers()['root/val']
+        plot.process('root/i', 1)
+        plot.process('root/val', decimator(np.ones(100)))
+        data = plot.get_data()
+        assert_equal(data.shape, (1, 10))
+        np.testing.assert_array_equal(data[0], np.ones(10))
+
+
+class TestMonitor(object):
+
+    @classmethod
+    def setup_class(cls):
+        print complete_line(__name__ +
+                            ':{}.setup_class()'.format(cls.__name__), '-', 77)
+
+    @classmethod
+    def teardown_class(cls):
+        print complete_line(__name__ +
+                            ':{}.teardown_class()'.format(cls.__name__), '-',
+                            77)
+
+    def setup(self):
+        self.monitor = PlotMonitor()
+
+    def teardown(self):
+        self.monitor = None
+
+    def test_entries_and_reducers(self):
+        """ Test that the monitored entries follow the plots.
+
+        """
+        trace = TracePlot(entry='root/trace', points=100)
+        self.monitor.plots.append(trace)
+        assert_equal(self.monitor.database_entries, ['root/trace'])
+        assert_dict_equal(dict(self.monitor.database_reducers),
+                          {'root/trace': Decimator(100)})
+
+        trace.points = 50
+        assert_dict_equal(dict(self.monitor.database_reducers),
+                          {'root/trace': Decimator(50)})
+
+        # A map needing the raw values prevents the decimation.
+        self.monitor.plots.append(MapPlot(entry='root/trace',
+                                          row_index='root/i',
+                                          column_index='root/j'))
+        assert_equal(self.monitor.database_entries,
+                     ['root/i', 'root/j', 'root/trace'])
+        assert_dict_equal(dict(self.monitor.database_reducers), {})
+
+        del self.monitor.plots[1]
+        trace.entry = ''
+        assert_equal(self.monitor.database_entries, [])
+
+    def test_process_news(self):
+        """ Test that the plots are notified once per refresh.
+
+        """
+        trace = TracePlot(entry='root/trace', points=100)
+        self.monitor.plots.append(trace)
+        updates = []
+        trace.observe('updated', updates.append)
+
+        for i in range(5):
+            self.monitor.process_news(('root/trace', np.arange(10.) + i))
+        self.monitor.process_news(('root/other', 1))
+        process_app_events()
+        assert_equal(len(updates), 1)
+        assert_equal(trace.get_data()[1][0], 4)
+
+        self.monitor.refresh_interval = 0.2
+        self.monitor.process_news(('root/trace', np.arange(10.)))
+        process_app_events()
+        assert_equal(len(updates), 1)
+        sleep(0.25)
+        process_app_events()
+        assert_equal(len(updates), 2)
+
+    def test_state(self):
+        """ Test saving and restoring the plots.
+
+        """
+        self.monitor.plots.append(TracePlot(name='t', entry='root/trace',
+                                            points=100))
+        self.monitor.plots.append(MapPlot(name='m', entry='root/val',
+                                          row_index='root/i', columns=20))
+        self.monitor.auto_show = False
+        state = self.monitor.get_state()
+
+        monitor = PlotMonitor()
+        monitor.set_state(state, {'root/trace': 1, 'root/i': 1})
+        assert_false(monitor.auto_show)
+        assert_equal(monitor.known_entries, ['root/i', 'root/trace'])
+        assert_equal(len(monitor.plots), 2)
+        trace, map_plot = monitor.plots
+        assert_is_instance(trace, TracePlot)
+        assert_equal(trace.points, 100)
+        assert_is_instance(map_plot, MapPlot)
+        assert_equal(map_plot.columns, 20)
+        assert_equal(map_plot.row_index, 'root/i')
+        assert_equal(monitor.database_entries,
+                     ['root/i', 'root/trace', 'root/val'])
+
+        monitor.clear_state()
+        assert_equal(monitor.plots, [])
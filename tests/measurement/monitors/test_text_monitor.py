@@ -3,6 +3,7 @@ from enaml.workbench.api import Workbench
 from enaml.widgets.api import Window
 import enaml
 import os
+from time import sleep
 from configobj import ConfigObj
 from nose.tools import (assert_in, assert_not_in, assert_equal, assert_true,
                         assert_false, assert_is, assert_dict_equal)
@@ -377,6 +378,31 @@ class TestMonitor(object):
         assert_equal(self.monitor.displayed_entries[1].value, '2')
         assert_equal(self.monitor.displayed_entries[2].value, '2/10')
 
+    def test_process_news_coalescing(self):
+        """ Test that news received between two refreshes are coalesced.
+
+        """
+        self.monitor.database_modified({'value': ('root/test_index', 1)})
+        entry = self.monitor.displayed_entries[0]
+        updates = []
+        entry.observe('value', updates.append)
+
+        for i in range(10):
+            self.monitor.process_news(('root/test_index', i))
+        process_app_events()
+        assert_equal(entry.value, '9')
+        assert_equal(len(updates), 1)
+        assert_equal(self.monitor.dropped_updates, 9)
+
+        # Refreshes too close to each other are delayed.
+        self.monitor.refresh_interval = 0.2
+        self.monitor.process_news(('root/test_index', 10))
+        process_app_events()
+        assert_equal(entry.value, '9')
+        sleep(0.25)
+        process_app_events()
+        assert_equal(entry.value, '10')
+
     def test_clear_state(self):
         """ Test clearing the monitor state.
 
@@ -9,11 +9,13 @@
 from enaml.workbench.api import Workbench
 import enaml
 import os
+import logging
 from configobj import ConfigObj
 from nose.tools import (assert_in, assert_not_in, assert_equal, assert_true,
                         assert_false)
 
-from hqc_meas.tasks.api import RootTask
+from atom.api import Value
+from hqc_meas.tasks.api import RootTask, SimpleTask
 from hqc_meas.measurement.measure import Measure
 with enaml.imports():
     from enaml.workbench.core.core_manifest import CoreManifest
@@ -23,7 +25,7 @@ with enaml.imports():
     from hqc_meas.measurement.manifest import MeasureManifest
     from hqc_meas.tasks.manager.manifest import TaskManagerManifest
 
-    from .helpers import TestSuiteManifest, Checker
+    from .helpers import TestSuiteManifest, Checker, TestMonitor
 
 from ..util import complete_line, remove_tree, create_test_dir
 
@@ -36,6 +38,32 @@ def teardown_module():
     print complete_line(__name__ + ': teardown_module()', '~', 78)
 
 
+class CountingTask(SimpleTask):
+    """ Task counting the number of times its checks are run.
+
+    """
+    checks = 0
+
+    #: Mutable value stored as a preference.
+    values = Value().tag(pref=True)
+
+    def check(self, *args, **kwargs):
+        CountingTask.checks += 1
+        return True, {}
+
+
+class RecordingHandler(logging.Handler):
+    """ Logging handler keeping the records it receives.
+
+    """
+    def __init__(self):
+        super(RecordingHandler, self).__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
 class TestPluginCoreFunctionalities(object):
 
     test_dir = ''
@@ -150,6 +178,71 @@ class TestPluginCoreFunctionalities(object):
         # Check that the notifier is correctly observed.
         assert_true(measure.root_task.task_database.has_observers('notifier'))
 
+    def test_copy_measure(self):
+        """ Test copying a measure in memory and saving it in the background.
+
+        """
+        plugin = self.workbench.get_plugin(u'hqc_meas.measure')
+        measure = Measure(plugin=plugin, name='Test', status='Under test')
+        measure.root_task = RootTask(default_path=self.test_dir)
+        measure.root_task.children_task.append(
+            CountingTask(task_name='c', values={'a': set([1])}))
+
+        # Needed because of Atom returning a _DictProxy
+        measure.checks = dict(plugin.checks)
+        # Needed because of Atom returning a _DictProxy
+        measure.headers = dict(plugin.headers)
+        # Adding a monitor.
+        monitor_decl = plugin.monitors[u'monitor1']
+        measure.add_monitor(monitor_decl.id,
+                            monitor_decl.factory(monitor_decl,
+                                                 self.workbench))
+        measure.monitors[u'monitor1'].save_test = True
+
+        path = os.path.join(self.test_dir, 'copied_measure.ini')
+        thread = measure.save_measure(path, blocking=False)
+        deps = {'tasks': {'CountingTask': CountingTask}}
+        copy = measure.copy_measure(deps)
+
+        assert_equal(copy.name, 'Test')
+        assert_equal(copy.path, path)
+        assert_true(copy.root_task is not measure.root_task)
+        assert_equal(copy.root_task.default_path, self.test_dir)
+        assert_equal(copy.root_task.children_task[0].task_name, 'c')
+        values = copy.root_task.children_task[0].values
+        assert_equal(values, {'a': set([1])})
+        assert_true(values['a'] is not
+                    measure.root_task.children_task[0].values['a'])
+        assert_equal(copy.checks, dict(plugin.checks))
+        assert_equal(copy.headers, dict(plugin.headers))
+        assert_true(copy.monitors[u'monitor1'].save_test)
+        assert_true(copy.monitors[u'monitor1'] is not
+                    measure.monitors[u'monitor1'])
+
+        thread.join()
+        assert_true(os.path.isfile(path))
+
+    def test_save_measure_in_background_failure(self):
+        """ Test that a failure of the background save is logged.
+
+        """
+        plugin = self.workbench.get_plugin(u'hqc_meas.measure')
+        measure = Measure(plugin=plugin, name='Test')
+        measure.root_task = RootTask(default_path=self.test_dir)
+
+        path = os.path.join(self.test_dir, 'missing', 'measure.ini')
+        handler = RecordingHandler()
+        logger = logging.getLogger('hqc_meas.measurement.measure')
+        logger.addHandler(handler)
+        try:
+            measure.save_measure(path, blocking=False).join()
+        finally:
+            logger.removeHandler(handler)
+
+        assert_false(os.path.isfile(path))
+        assert_equal(len(handler.records), 1)
+        assert_in(path, handler.records[0].getMessage())
+
     def test_save_load_measure2(self):
         """ Test saving a measure to a file and reloading it with absent tools.
 
@@ -294,6 +387,36 @@ class TestPluginCoreFunctionalities(object):
         assert_true(res)
         assert_equal(errors, {})
 
+    def test_run_checks_cache(self):
+        """ Test that the checks are not run again if nothing changed.
+
+        """
+        plugin = self.workbench.get_plugin(u'hqc_meas.measure')
+        measure = Measure(plugin=plugin)
+        measure.root_task = RootTask(default_path=self.test_dir)
+        measure.root_task.children_task.append(CountingTask(task_name='c'))
+
+        CountingTask.checks = 0
+        res, errors = measure.run_checks(self.workbench, internal_only=True)
+        assert_true(res)
+        measure.run_checks(self.workbench, internal_only=True)
+        assert_equal(CountingTask.checks, 1)
+
+        # Testing the instruments requires to run the checks again.
+        measure.run_checks(self.workbench, True, True)
+        measure.run_checks(self.workbench, False, True)
+        assert_equal(CountingTask.checks, 2)
+
+        # Modifying the hierarchy too.
+        measure.root_task.children_task[0].task_name = 'd'
+        measure.run_checks(self.workbench, True, True)
+        assert_equal(CountingTask.checks, 3)
+
+        # Modifying the runtime dependencies too.
+        measure.root_task.run_time['drivers'] = {}
+        measure.run_checks(self.workbench, True, True)
+        assert_equal(CountingTask.checks, 4)
+
     def test_collect_headers(self):
         """ Test header collection.
 
@@ -359,6 +482,30 @@ class TestPluginCoreFunctionalities(object):
                             monitor_decl.factory(monitor_decl,
                                                  self.workbench))
 
+    def test_collect_entries_reducers(self):
+        """ Test that a reducer is used only if all monitors agree on it or
+        accept reduced values.
+
+        """
+        plugin = self.workbench.get_plugin(u'hqc_meas.measure')
+        measure = Measure(plugin=plugin, name='Test', status='Under test')
+        reducer = lambda value: value
+        monitor1 = TestMonitor(database_entries=['root/a', 'root/b'],
+                               database_reducers={'root/a': reducer,
+                                                  'root/b': reducer})
+        monitor2 = TestMonitor(database_entries=['root/b', 'root/c'])
+        measure.monitors = {u'monitor1': monitor1, u'monitor2': monitor2}
+
+        assert_equal(measure.collect_entries_reducers(), {'root/a': reducer})
+
+        # Monitors accepting reduced values do not prevent the reduction.
+        monitor2.accepts_reduced = True
+        assert_equal(measure.collect_entries_reducers(),
+                     {'root/a': reducer, 'root/b': reducer})
+
+        monitor2.database_reducers = {'root/b': lambda value: value}
+        assert_equal(measure.collect_entries_reducers(), {'root/a': reducer})
+
     def test_remove_monitor1(self):
         """ Test removing a monitor.
 
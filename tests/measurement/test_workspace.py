@@ -250,6 +250,9 @@ class TestMeasureSpace(object):
                      'The measure is ready to be performed by an engine.')
         assert_in('build_deps', en_meas.store)
         assert_not_in('profiles', en_meas.store)
+        # The checks do not need to be run again.
+        assert_equal(en_meas.store['checks']['digest'],
+                     en_meas.checks_digest())
 
     def test_enqueue_measure2(self):
         # Test enqueueing a measure failing the tests using no instruments.
@@ -14,6 +14,7 @@ def time(*args, **kwargs):
     return min(repeat(*args, **kwargs))/kwargs['number']
 
 from hqc_meas.pulses.base_sequences import RootSequence, Sequence
+from hqc_meas.pulses.entry_eval import clear_entry_cache
 from hqc_meas.pulses.pulse import Pulse
 from hqc_meas.pulses.sequences.conditional_sequence import ConditionalSequence
 from hqc_meas.pulses.shapes.base_shapes import SquareShape
@@ -155,3 +156,22 @@ class BenchmarkCompilation(object):
 
         print 'Conditional seq 2', time(partial(self.root.compile_sequence,
                                                 False))
+
+    def benchmark_large_sequence_compilation(self):
+        # Compare compiling a sequence of hundreds of pulses with and without
+        # the cache of compiled entries. The external variable is changed
+        # before each compilation so that every pulse is re-evaluated.
+        self.root.external_vars = {'a': 1.5}
+
+        pulses = [Pulse(def_1='{a} + 20*%d' % i, def_2='{%d_start} + 1.0' % i)
+                  for i in range(1, 301)]
+        self.root.items.extend(pulses)
+
+        def compile_sequence(clear):
+            if clear:
+                clear_entry_cache()
+            self.root.external_vars = {'a': self.root.external_vars['a'] + 1}
+            self.root.compile_sequence(False)
+
+        print 'Large seq, no cache', time(partial(compile_sequence, True))
+        print 'Large seq, cache', time(partial(compile_sequence, False))
@@ -4,11 +4,13 @@
 # author : Matthieu Dartiailh
 # license : MIT license
 # =============================================================================
+from multiprocessing import Process, Queue
 import numpy as np
 from nose.tools import (assert_equal, assert_true, assert_sequence_equal,
                         assert_in, assert_false)
 
 from hqc_meas.pulses.contexts.awg_context import AWGContext
+from hqc_meas.pulses.contexts.base_context import close_pools
 from hqc_meas.pulses.base_sequences import RootSequence, Sequence
 from hqc_meas.pulses.pulse import Pulse
 from hqc_meas.pulses.shapes.base_shapes import SquareShape
@@ -225,3 +227,103 @@ class TestAWGContext(object):
         assert_true(res)
         assert_equal(len(arrays), 3)
         assert_equal(sorted(arrays.keys()), sorted([1, 2, 3]))
+
+    def test_parallel_synthesis(self):
+        self.root.time_constrained = True
+        self.root.sequence_duration = '20'
+        pulses = []
+        for i in range(40):
+            channel = 'Ch{}_A'.format(i % 2 + 1)
+            mod = Modulation(frequency='2.5', kind='sin', phase='{}'.format(i),
+                             activated=True)
+            pulses.append(Pulse(kind='Analogical', def_1='{}'.format(0.4*i),
+                                def_2='{}'.format(0.4*i + 0.9),
+                                channel=channel, modulation=mod,
+                                shape=SquareShape(amplitude='0.4')))
+        self.root.items = pulses
+
+        res, serial = self.root.compile_sequence()
+        assert_true(res)
+
+        self.context.synthesis_workers = 4
+        res, parallel = self.root.compile_sequence()
+        assert_true(res)
+        assert_equal(serial, parallel)
+
+        # Closed pools are created again when needed.
+        close_pools()
+        res, parallel = self.root.compile_sequence()
+        assert_true(res)
+        assert_equal(serial, parallel)
+
+    def test_compiling_several_points(self):
+        self.root.external_vars = {'a': 0.1, 'b': 0.5}
+        pulse1 = Pulse(kind='Analogical', def_1='{a}', def_2='0.5',
+                       channel='Ch1_A', shape=SquareShape(amplitude='{b}'))
+        pulse2 = Pulse(kind='Logical', def_1='0.1', def_2='0.5',
+                       channel='Ch2_M1')
+        self.root.items = [pulse1, pulse2]
+
+        vars_sets = [{'a': 0.1*i} for i in range(1, 5)]
+        res, serial = self.root.compile_sequences(vars_sets)
+        assert_true(res)
+        assert_equal(len(serial), 4)
+        assert_equal(self.root.external_vars, {'a': 0.1, 'b': 0.5})
+        for i, values in enumerate(vars_sets):
+            self.root.external_vars = {'a': values['a'], 'b': 0.5}
+            assert_equal(serial[i], self.root.compile_sequence()[1])
+
+        res, parallel = self.root.compile_sequences(vars_sets, processes=2)
+        assert_true(res)
+        assert_equal(serial, parallel)
+
+        res, (index, _) = self.root.compile_sequences([{'a': 0.2},
+                                                       {'a': 0.6}])
+        assert_false(res)
+        assert_equal(index, 1)
+
+    def test_iter_compiling_several_points(self):
+        # Test that the points are compiled one at a time, the external
+        # variables being restored between two points.
+        self.root.external_vars = {'a': 0.1, 'b': 0.5}
+        self.root.items = [Pulse(kind='Analogical', def_1='{a}', def_2='0.5',
+                                 channel='Ch1_A',
+                                 shape=SquareShape(amplitude='{b}'))]
+        vars_sets = [{'a': 0.1*i} for i in range(1, 5)]
+        _, serial = self.root.compile_sequences(vars_sets)
+
+        points = self.root.iter_compile_sequences(iter(vars_sets))
+        for i, (res, out) in enumerate(points):
+            assert_true(res)
+            assert_equal(out, serial[i])
+            assert_equal(self.root.external_vars, {'a': 0.1, 'b': 0.5})
+        assert_equal(i, 3)
+
+        # The iteration stops after the first failure.
+        points = self.root.iter_compile_sequences([{'a': 0.2}, {'a': 0.6},
+                                                   {'a': 0.3}])
+        assert_equal([res for res, _ in points], [True, False])
+
+    def test_compiling_several_points_in_daemon(self):
+        # Test that a daemonic process (such as the process engine worker)
+        # compiles the points serially as it cannot create a pool.
+        self.root.external_vars = {'a': 0.1}
+        self.root.items = [Pulse(kind='Analogical', def_1='{a}', def_2='0.5',
+                                 channel='Ch1_A', shape=SquareShape())]
+        vars_sets = [{'a': 0.1*i} for i in range(1, 5)]
+        _, serial = self.root.compile_sequences(vars_sets)
+
+        def compile_points(queue):
+            try:
+                queue.put(self.root.compile_sequences(vars_sets,
+                                                      processes=2))
+            except Exception as e:
+                queue.put(repr(e))
+
+        queue = Queue()
+        process = Process(target=compile_points, args=(queue,))
+        process.daemon = True
+        process.start()
+        result = queue.get(timeout=30)
+        process.join()
+        assert_equal(result, (True, serial))
@@ -721,6 +721,37 @@ class TestCompilation(object):
         assert_equal(len(pulses), 3)
         assert_equal(pulses[0].stop, 2.)
 
+    def test_sequence_compilation1ter(self):
+        # Compiles two times a sequence while changing a parameter to make
+        # sure only the pulses depending on it are re-evaluated.
+        self.root.external_vars = {'a': 2.0, 'b': 4.0}
+
+        pulse1 = Pulse(def_1='1.0', def_2='{a}')
+        pulse2 = Pulse(def_1='{b} + 1.0', def_2='6.0', kind='Analogical',
+                       shape=SquareShape(amplitude='0.5'))
+        pulse3 = Pulse(def_1='{1_stop} + 1.0', def_2='10')
+        self.root.items.extend([pulse1, pulse2, pulse3])
+
+        res, pulses = self.root.compile_sequence(False)
+        assert_true(res)
+        waveforms = [p.waveform for p in pulses]
+        assert_is(pulse2.waveform, waveforms[1])
+
+        self.root.external_vars = {'a': 3.0, 'b': 4.0}
+        res, pulses = self.root.compile_sequence(False)
+        assert_true(res)
+        assert_equal(pulses[0].stop, 3.)
+        assert_equal(pulses[1].start, 5.)
+        assert_equal(pulses[2].start, 4.)
+        assert_is(pulses[1].waveform, waveforms[1])
+        assert_array_equal(pulses[1].waveform, 0.5*np.ones(2))
+        assert_equal(len(pulses[0].waveform), 4)
+        assert_equal(len(pulses[2].waveform), 12)
+
+        pulse2.shape.amplitude = '0.25'
+        res, pulses = self.root.compile_sequence(False)
+        assert_true(res)
+        assert_array_equal(pulses[1].waveform, 0.25*np.ones(2))
 
     def test_sequence_compilation2(self):
         # Test compiling a flat sequence of fixed duration.
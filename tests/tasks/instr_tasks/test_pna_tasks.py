@@ -7,9 +7,10 @@
 """
 """
 from nose.tools import (assert_equal, assert_true, assert_false, assert_in,
-                        assert_is_instance, assert_is)
+                        assert_is_instance, assert_is, assert_raises)
 from nose.plugins.attrib import attr
 from multiprocessing import Event
+import numpy as np
 from enaml.workbench.api import Workbench
 
 from hqc_meas.tasks.api import RootTask
@@ -17,7 +18,7 @@ from hqc_meas.tasks.tasks_instr.rf_tasks\
     import (SetRFFrequencyTask, SetRFPowerTask)
 from hqc_meas.tasks.tasks_instr.pna_tasks\
     import (PNASetRFFrequencyInterface, PNASetRFPowerInterface,
-            PNASinglePointMeasureTask, PNASweepTask)
+            PNASinglePointMeasureTask, PNASweepTask, PNAGetTraces)
 
 import enaml
 with enaml.imports():
@@ -475,3 +476,129 @@ class TestPNASinglePointMeasureTask(object):
 #        process_app_events()
 #
 #        assert_is(self.task.interface, interface)
+
+
+class TestPNAGetTraces(object):
+
+    def setup(self):
+        self.root = RootTask(should_stop=Event(), should_pause=Event())
+        self.task = PNAGetTraces(task_name='Test', tracelist='1,1;1,3;2,1')
+        self.root.children_task.append(self.task)
+        self.root.run_time['drivers'] = {'Test': InstrHelper}
+
+        # This is set simply to make sure the test of InstrTask pass.
+        self.task.selected_driver = 'Test'
+        self.task.selected_profile = 'Test1'
+
+    def test_check1(self):
+        # Test the entries written in the database depending on the mode.
+        self.root.run_time['profiles'] = {'Test1': ({}, {})}
+        test, traceback = self.task.check()
+        assert_true(test)
+        assert_equal(sorted(self.task.get_from_database('Test_sweep_data')),
+                     ['1,1', '1,3', '2,1'])
+
+        self.task.batched = True
+        test, traceback = self.task.check()
+        assert_true(test)
+        assert_equal(sorted(self.task.get_from_database('Test_sweep_data')),
+                     ['1', '2'])
+
+    def test_check2(self):
+        # Test handling a wrong trace list.
+        self.task.tracelist = '1;1,3'
+        test, traceback = self.task.check()
+        assert_false(test)
+        assert_equal(len(traceback), 1)
+
+    def test_perform_batched(self):
+        # Test that all the channels are averaged and read at once.
+        self.task.batched = True
+        channels = {i: InstrHelper(({'sweep_x_axis': np.array([1.0, 2.0]),
+                                     'electrical_delay': 0.0,
+                                     'tracenb': 0,
+                                     'selected_measure': ['M1', 'M2'],
+                                     'measure_numbers': {'M1': 1, 'M2': 3}},
+                                    {}))
+                    for i in (1, 2)}
+        averaged = []
+        read = []
+
+        def average_channels(driver, channels, stop):
+            assert_is(stop, self.root.should_stop)
+            averaged.extend(channels)
+            return True
+
+        def read_channels_data(driver, numbers):
+            read.append(numbers)
+            return {c: [np.array([1.0 + 1j, 2j])*n for n in numbers[c]]
+                    for c in numbers}
+
+        profile = {'Test1': ({'owner': [None]},
+                             {'get_channel': lambda x, i: channels[i],
+                              'average_channels': average_channels,
+                              'read_channels_data': read_channels_data})}
+        self.root.run_time['profiles'] = profile
+        self.root.task_database.prepare_for_running()
+
+        self.task.perform()
+        assert_equal(averaged, [1, 2])
+        assert_equal(read, [{1: [1, 3], 2: [1]}])
+
+        data = self.root.get_from_database('Test_sweep_data')
+        assert_equal(sorted(data), ['1', '2'])
+        assert_equal(data['1'].dtype.names,
+                     ('Freq (GHz)', 'M1 real', 'M1 imag', 'M1 abs',
+                      'M1 phase', 'M2 real', 'M2 imag', 'M2 abs', 'M2 phase'))
+        np.testing.assert_array_equal(data['1']['M2 imag'], [3.0, 6.0])
+        assert_equal(len(data['2'].dtype.names), 5)
+
+    def test_perform_batched_interrupted(self):
+        # Test that nothing is read if the measure is stopped while averaging.
+        self.task.batched = True
+        read = []
+        channel = InstrHelper(({'measure_numbers': {'M1': 1, 'M2': 3}}, {}))
+        profile = {'Test1': ({'owner': [None]},
+                             {'get_channel': lambda x, i: channel,
+                              'average_channels': lambda x, c, stop: False,
+                              'read_channels_data':
+                                  lambda x, n: read.append(n)})}
+        self.root.run_time['profiles'] = profile
+        self.root.task_database.prepare_for_running()
+
+        self.task.perform()
+        assert_equal(read, [])
+        assert_equal(self.root.get_from_database('Test_sweep_data'), {})
+
+    def test_perform_wrong_trace(self):
+        # Test that a trace missing on its channel is reported before reading.
+        self.task.already_measured = True
+        read = []
+        channel = InstrHelper(({'measure_numbers': {'M1': 1}}, {}))
+        profile = {'Test1': ({'owner': [None]},
+                             {'get_channel': lambda x, i: channel,
+                              'read_channels_data':
+                                  lambda x, n: read.append(n)})}
+        self.root.run_time['profiles'] = profile
+        self.root.task_database.prepare_for_running()
+
+        for batched in (False, True):
+            self.task.batched = batched
+            assert_raises(ValueError, self.task.perform)
+        assert_equal(read, [])
+
+    def test_get_channel_traces_same_names(self):
+        # Test that measures sharing a name give distinct fields.
+        channel = InstrHelper(({'sweep_x_axis': np.array([1.0, 2.0]),
+                                'electrical_delay': 0.0,
+                                'tracenb': 0,
+                                'selected_measure': ['M1', 'M1']},
+                               {}))
+        profile = {'Test1': ({'owner': [None]},
+                             {'get_channel': lambda x, i: channel})}
+        self.root.run_time['profiles'] = profile
+        self.task.start_driver()
+
+        data = self.task.get_channel_traces(1, [1, 3],
+                                            [np.array([1.0, 2.0])]*2)
+        assert_equal(data.dtype.names[1::4], ('M1 real', 'M1 (3) real'))
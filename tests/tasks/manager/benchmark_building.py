@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# module : benchmark_building.py
+# author : Matthieu Dartiailh
+# license : MIT license
+# =============================================================================
+import cPickle
+from timeit import repeat
+
+from hqc_meas.tasks.api import RootTask
+from hqc_meas.tasks.tasks_logic.loop_task import LoopTask
+from hqc_meas.tasks.tasks_logic.loop_linspace_interface import\
+    LinspaceLoopInterface
+from hqc_meas.tasks.tasks_util.formula_task import FormulaTask
+from hqc_meas.tasks.tasks_util.log_task import LogTask
+from hqc_meas.tasks.manager.building import (build_task_from_config,
+                                             build_config_snapshot)
+
+
+def time(*args, **kwargs):
+    kwargs['number'] = 1
+    kwargs['repeat'] = 5
+    return min(repeat(*args, **kwargs))/kwargs['number']
+
+
+DEPENDENCIES = {'tasks': {'FormulaTask': FormulaTask, 'LoopTask': LoopTask,
+                          'LogTask': LogTask},
+                'interfaces': {'LinspaceLoopInterface':
+                               LinspaceLoopInterface}}
+
+
+class BenchmarkBuilding(object):
+
+    def setup(self):
+        self.root = RootTask(default_path=u'/tmp')
+        loops = []
+        for i in range(100):
+            loop = LoopTask(task_name='loop{}'.format(i),
+                            interface=LinspaceLoopInterface())
+            for j in range(10):
+                formulas = [('a{}'.format(k), '{}*{}'.format(j, k))
+                            for k in range(10)]
+                loop.children_task.append(
+                    FormulaTask(task_name='f{}_{}'.format(i, j),
+                                formulas=formulas))
+                loop.children_task.append(
+                    LogTask(task_name='l{}_{}'.format(i, j), message='1'))
+            loops.append(loop)
+        self.root.children_task.extend(loops)
+
+    def benchmark_building_from_config(self):
+        # Transfer and build from the ConfigObj of the hierarchy.
+        def run():
+            self.root.update_preferences_from_members()
+            data = cPickle.dumps(self.root.task_preferences, 2)
+            build_task_from_config(cPickle.loads(data), DEPENDENCIES, True)
+
+        print 'Config (2101 tasks)', time(run)
+
+    def benchmark_building_from_snapshot(self):
+        # Transfer and build from the snapshot of the hierarchy.
+        def run():
+            data = cPickle.dumps(build_config_snapshot(self.root), 2)
+            build_task_from_config(cPickle.loads(data), DEPENDENCIES, True)
+
+        print 'Snapshot (2101 tasks)', time(run)
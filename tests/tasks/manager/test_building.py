@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+#==============================================================================
+# module : test_building.py
+# author : Matthieu Dartiailh
+# license : MIT license
+#==============================================================================
+import cPickle
+from nose.tools import assert_equal, assert_is_instance
+
+from hqc_meas.tasks.api import RootTask
+from hqc_meas.tasks.tasks_logic.loop_task import LoopTask
+from hqc_meas.tasks.tasks_logic.loop_linspace_interface import\
+    LinspaceLoopInterface
+from hqc_meas.tasks.tasks_util.formula_task import FormulaTask
+from hqc_meas.tasks.tasks_util.log_task import LogTask
+from hqc_meas.tasks.manager.building import (build_task_from_config,
+                                             build_config_snapshot)
+
+from ...util import complete_line
+
+
+def setup_module():
+    print complete_line(__name__ + ': setup_module()', '~', 78)
+
+
+def teardown_module():
+    print complete_line(__name__ + ': teardown_module()', '~', 78)
+
+
+def build_hierarchy():
+    root = RootTask(default_path=u'/tmp')
+    formula = FormulaTask(task_name='formula',
+                          formulas=[('a', '1.0'),
+                                    ('b', '{root_default_path}')])
+    loop = LoopTask(task_name='loop', timing=True,
+                    interface=LinspaceLoopInterface(start='0', stop='1',
+                                                    step='0.1'))
+    loop.children_task.append(LogTask(task_name='log', message='1'))
+    root.children_task.extend([formula, loop])
+    return root
+
+
+def test_config_snapshot():
+    # Test that a hierarchy rebuilt from a snapshot is identical to the
+    # original one.
+    root = build_hierarchy()
+    snapshot = cPickle.loads(cPickle.dumps(build_config_snapshot(root), 2))
+
+    assert_is_instance(snapshot, dict)
+    assert_equal(snapshot['children_task_0']['formulas'],
+                 [('a', '1.0'), ('b', '{root_default_path}')])
+    assert_equal(snapshot['children_task_1']['timing'], True)
+    assert_equal(snapshot['children_task_1']['children_task_0']['message'],
+                 '1')
+
+    deps = {'tasks': {'FormulaTask': FormulaTask, 'LoopTask': LoopTask,
+                      'LogTask': LogTask},
+            'interfaces': {'LinspaceLoopInterface': LinspaceLoopInterface}}
+    rebuilt = build_task_from_config(snapshot, deps, True)
+
+    root.update_preferences_from_members()
+    rebuilt.update_preferences_from_members()
+    assert_equal(rebuilt.task_preferences.dict(),
+                 root.task_preferences.dict())
@@ -10,6 +10,7 @@ from enaml.workbench.api import Workbench
 import enaml
 import os
 import shutil
+from types import ModuleType
 from configobj import ConfigObj
 from nose.tools import (assert_in, assert_not_in, assert_equal, assert_true,
                         assert_false, assert_not_equal)
@@ -23,6 +24,8 @@ with enaml.imports():
     from hqc_meas.utils.dependencies.manifest import DependenciesManifest
     from hqc_meas.tasks.manager.manifest import TaskManagerManifest
 
+from hqc_meas.tasks.api import SimpleTask, InterfaceableTaskMixin
+from hqc_meas.tasks.manager.plugin import PACKAGE_PATH
 
 from ...util import complete_line, remove_tree, create_test_dir
 
@@ -35,6 +38,20 @@ def teardown_module():
     print complete_line(__name__ + ': teardown_module()', '~', 78)
 
 
+class FalseInterfaceableTask(InterfaceableTaskMixin, SimpleTask):
+    """ Task inheriting once from InterfaceableTaskMixin.
+
+    """
+    pass
+
+
+class TwiceInterfaceableTask(FalseInterfaceableTask, InterfaceableTaskMixin):
+    """ Task inheriting twice from InterfaceableTaskMixin.
+
+    """
+    pass
+
+
 class Test(object):
 
     test_dir = ''
@@ -83,7 +100,9 @@ class Test(object):
 
         # Saving plugin preferences.
         man_conf = {'tasks_loading': str(task_loading),
-                    'templates_folders': str([template_path])}
+                    'templates_folders': str([template_path]),
+                    'index_path': os.path.join(cls.test_dir,
+                                               'tasks_index.json')}
 
         conf = ConfigObj(os.path.join(cls.test_dir, 'default_test.ini'))
         conf[u'hqc_meas.task_manager'] = {}
@@ -138,6 +157,36 @@ class Test(object):
         # Testing templates
         assert_in('Template',  plugin.tasks)
 
+        # Testing the index of the explored modules.
+        assert_true(os.path.isfile(plugin.index_path))
+
+    def test_invalid_interfaceable_tasks(self):
+        # Test that the tasks inheriting twice from InterfaceableTaskMixin are
+        # rejected, even if their module is known from the index.
+        self.workbench.register(TaskManagerManifest())
+        plugin = self.workbench.get_plugin(u'hqc_meas.task_manager')
+
+        module = ModuleType('fake_tasks')
+        module.KNOWN_PY_TASKS = [FalseInterfaceableTask,
+                                 TwiceInterfaceableTask]
+        exports = plugin._describe_tasks_module(module)
+        assert_equal(exports['invalid_tasks'], ['Twice interfaceable'])
+
+        mod = 'tasks.tasks_util.log_task'
+        mod_path = os.path.realpath(os.path.join(PACKAGE_PATH, '..',
+                                                 *mod.split('.'))) + '.py'
+        exports = {'tasks': [('Log', 'LogTask')], 'invalid_tasks': ['Log'],
+                   'interfaces': {}, 'packages': []}
+        plugin._index.update('hqc_meas.' + mod, mod_path, exports)
+        try:
+            tasks, failed = {}, {}
+            plugin._explore_modules([mod], tasks, {}, [], failed,
+                                    prefix='tasks.tasks_util')
+            assert_not_in('Log', tasks)
+            assert_in('Log', failed)
+        finally:
+            plugin._index.discard(mod_path)
+
     def test_load_all(self):
         self.workbench.register(TaskManagerManifest())
         plugin = self.workbench.get_plugin(u'hqc_meas.task_manager')
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# module : test_instr_task.py
+# author : Matthieu Dartiailh
+# license : MIT license
+# =============================================================================
+"""
+"""
+import os
+import time
+from threading import Lock
+from nose.tools import (assert_true, assert_false, assert_equal, assert_in,
+                        assert_is, assert_less)
+from nose.plugins.skip import SkipTest
+
+from hqc_meas.instruments.driver_tools import BaseInstrument, InstrIOError
+from hqc_meas.tasks.api import RootTask, InstrumentTask
+from hqc_meas.tasks.tools.instr_probing import instr_probe_key
+from hqc_meas.tasks.tools.instr_pool import InstrumentPool
+
+try:
+    from hqc_meas.instruments.visa.agilent_pna import AgilentPNA
+except ImportError:
+    # PyVisa is not installed.
+    AgilentPNA = None
+
+from ..util import complete_line
+
+
+def setup_module():
+    print complete_line(__name__ + ': setup_module()', '~', 78)
+
+
+def teardown_module():
+    print complete_line(__name__ + ': teardown_module()', '~', 78)
+
+
+class CountingDriver(BaseInstrument):
+    """ False driver counting the connections opened and closed.
+
+    The connection info 'delay' is the time needed to connect and 'fail'
+    makes the connection fail.
+
+    """
+    connections = 0
+
+    closed = 0
+
+    lock = Lock()
+
+    def __init__(self, connection_info, *args, **kwargs):
+        super(CountingDriver, self).__init__(connection_info, *args, **kwargs)
+        time.sleep(float(connection_info.get('delay', 0)))
+        if connection_info.get('fail'):
+            raise InstrIOError()
+        with self.lock:
+            CountingDriver.connections += 1
+
+    def close_connection(self):
+        with self.lock:
+            CountingDriver.closed += 1
+
+
+def build_root(profiles):
+    """ Build a hierarchy using one instrument task per profile.
+
+    """
+    CountingDriver.connections = 0
+    CountingDriver.closed = 0
+    root = RootTask(default_path=os.path.dirname(__file__))
+    for i, profile in enumerate(sorted(profiles)):
+        root.children_task.append(InstrumentTask(task_name='instr{}'.format(i),
+                                                 selected_profile=profile,
+                                                 selected_driver='Count'))
+    root.run_time = {'drivers': {'Count': CountingDriver},
+                     'profiles': profiles}
+    return root
+
+
+def test_connection_probed_once():
+    # Test that the connection to an instrument is tested only once for a
+    # given profile.
+    config = {'address': '1'}
+    root = build_root({'Test': config})
+    root.children_task.append(InstrumentTask(task_name='instr1',
+                                             selected_profile='Test',
+                                             selected_driver='Count'))
+
+    for child in root.children_task:
+        test, traceback = child.check(test_instr=True)
+        assert_true(test)
+    assert_equal(CountingDriver.connections, 1)
+    assert_in(instr_probe_key('Count', config),
+              root.run_time['probed_instrs'])
+
+    # Changing the profile leads to a new test.
+    root.run_time['profiles']['Test'] = {'address': '2'}
+    root.children_task[0].check(test_instr=True)
+    assert_equal(CountingDriver.connections, 2)
+
+
+def test_parallel_probing():
+    # Test that the root task opens the connections concurrently and does not
+    # keep them.
+    profiles = {'Test{}'.format(i): {'address': str(i), 'delay': '0.3'}
+                for i in range(4)}
+    root = build_root(profiles)
+
+    start = time.time()
+    test, traceback = root.check(test_instr=True)
+    assert_less(time.time() - start, 1.0)
+    assert_true(test)
+    assert_equal(CountingDriver.connections, 4)
+    assert_equal(CountingDriver.closed, 4)
+    assert_false(list(root.instrs))
+
+
+def test_probing_failures():
+    # Test that failed and too slow connections make the checks fail.
+    profiles = {'Fail': {'fail': '1'}, 'Slow': {'delay': '0.5'},
+                'Test': {'address': '1'}}
+    root = build_root(profiles)
+    root.probe_timeout = 0.1
+
+    test, traceback = root.check(test_instr=True)
+    assert_false(test)
+    assert_equal(sorted(traceback), ['root/instr0', 'root/instr1'])
+    assert_in('Timeout', traceback['root/instr1'])
+    assert_false(list(root.instrs))
+    assert_equal(CountingDriver.closed, 1)
+
+    # The connection which took too long is closed once established.
+    time.sleep(0.6)
+    assert_equal(CountingDriver.connections, 2)
+    assert_equal(CountingDriver.closed, 2)
+
+
+class PooledDriver(CountingDriver):
+    """ Counting driver whose connection state can be tweaked.
+
+    """
+    def __init__(self, connection_info, *args, **kwargs):
+        super(PooledDriver, self).__init__(connection_info, *args, **kwargs)
+        self.alive = True
+        self.corrupted = None
+        self.failure = None
+
+    def connected(self):
+        return self.alive
+
+    def check_connection(self):
+        if self.failure:
+            raise self.failure
+        return self.corrupted
+
+
+def test_instr_pool():
+    # Test that the connections given back to the pool are reused by the next
+    # measure if they are still valid and closed otherwise.
+    pool = InstrumentPool(max_idle=0.2)
+    profiles = {'Test': {'address': '1'}, 'Other': {'address': '2'}}
+    root = build_root(profiles)
+    root.run_time['drivers']['Count'] = PooledDriver
+    root.instr_pool = pool
+    assert_true(root.check(test_instr=True)[0])
+    # The connections opened by the checks are not given to the pool.
+    assert_false(list(root.instrs))
+    assert_equal(PooledDriver.closed, 2)
+    for task in root.children_task:
+        task.start_driver()
+    instrs = {p: root.instrs[p] for p in root.instrs}
+    for instr in instrs.values():
+        instr._cache['a'] = 1
+    instrs['Other'].corrupted = False
+    root.close_instrs()
+    assert_equal(PooledDriver.closed, 2)
+    assert_equal(len(pool), 2)
+    CountingDriver.connections = 0
+    CountingDriver.closed = 0
+
+    # Same profiles : no new connection, the cache is kept only if the driver
+    # reports it is not corrupted.
+    root.run_time['probed_instrs'] = set()
+    assert_true(root.check(test_instr=True)[0])
+    assert_equal(PooledDriver.connections, 0)
+    assert_is(root.instrs['Test'], instrs['Test'])
+    assert_equal(instrs['Test']._cache, {})
+    assert_equal(instrs['Other']._cache, {'a': 1})
+    task = root.children_task[0]
+    task.start_driver()
+    assert_equal(PooledDriver.connections, 0)
+    root.close_instrs()
+
+    # Dead connections are not reused.
+    instrs['Test'].alive = False
+    assert_is(pool.acquire(PooledDriver, 'Test', profiles['Test']), None)
+    assert_equal(PooledDriver.closed, 1)
+
+    # Profiles not granted to the measure and connections using another
+    # driver or address are never reused.
+    assert_is(pool.acquire(CountingDriver, 'Other', profiles['Other']), None)
+    assert_is(pool.acquire(PooledDriver, 'Other', {'address': '3'}), None)
+    pool.retain(['Test'])
+    assert_equal(PooledDriver.closed, 2)
+    assert_equal(len(pool), 0)
+
+    # Idle connections are closed.
+    pool.release('Test', profiles['Test'], instrs['Test'])
+    pool.evict_idle()
+    assert_equal(len(pool), 1)
+    time.sleep(0.3)
+    pool.evict_idle()
+    assert_equal(len(pool), 0)
+    assert_equal(PooledDriver.closed, 3)
+
+    # Any error raised while checking a connection prevents its reuse.
+    instrs['Test'].alive = True
+    instrs['Test'].failure = IOError()
+    pool.release('Test', profiles['Test'], instrs['Test'])
+    assert_is(pool.acquire(PooledDriver, 'Test', profiles['Test']), None)
+    assert_equal(PooledDriver.closed, 4)
+
+    # The connections to the released profiles are closed.
+    pool.release('Test', profiles['Test'], instrs['Test'])
+    pool.release('Other', profiles['Other'], instrs['Other'])
+    pool.discard(['Other'])
+    assert_equal(len(pool), 1)
+    assert_equal(PooledDriver.closed, 5)
+    pool.close_all()
+    assert_equal(len(pool), 0)
+
+
+def test_instr_pool_channels():
+    # Test that the channel drivers of a reused PNA are reset along with it.
+    if AgilentPNA is None:
+        raise SkipTest('PyVisa is not installed')
+    config = {'connection_type': 'GPIB', 'address': '0',
+              'additionnal_mode': 'INSTR'}
+    pna = AgilentPNA(config, auto_open=False)
+    # Fake an open connection.
+    pna._driver = object()
+    pna._cache['defined_channels'] = [1]
+    channel = pna.get_channel(1)
+    channel.owner = 'pna'
+    channel._cache['measure_numbers'] = [1, 2]
+
+    pool = InstrumentPool()
+    pool.release('PNA', config, pna)
+    assert_is(pool.acquire(AgilentPNA, 'PNA', config), pna)
+    assert_is(pna.channels[1], channel)
+    assert_equal(channel.owner, '')
+    assert_equal(channel._cache, {})
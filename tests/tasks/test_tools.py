@@ -1,6 +1,12 @@
 # -*- coding: utf-8 -*-
+from atom.api import Int, Str
 from nose.tools import assert_equal
 from hqc_meas.utils.walks import flatten_walk
+from hqc_meas.tasks.api import RootTask, SimpleTask
+from hqc_meas.tasks.tasks_logic.loop_task import LoopTask
+from hqc_meas.tasks.tasks_logic.loop_linspace_interface import\
+    LinspaceLoopInterface
+from hqc_meas.tasks.tools.walk_cache import TaskWalkCache
 
 
 def test_flatten_walk():
@@ -8,3 +14,61 @@ def test_flatten_walk():
             [{'e': 1, 'z': 5}, {'e': 2}, [{'x': 50}]]]
     flat = flatten_walk(walk, ['e', 'x'])
     assert_equal(flat, {'e': set((1, 2)), 'x': set([50])})
+
+
+class CountingTask(SimpleTask):
+    """ Task counting the number of times it was asked for its infos.
+
+    """
+    answers = Int()
+
+    driver = Str()
+
+    def answer(self, members, callables):
+        self.answers += 1
+        return super(CountingTask, self).answer(members, callables)
+
+
+def test_walk_cache():
+    # Test that the cached walk matches the walk and is invalidated by the
+    # modifications of the hierarchy.
+    root = RootTask(default_path='')
+    loop = LoopTask(task_name='loop', interface=LinspaceLoopInterface())
+    tasks = [CountingTask(task_name='t{}'.format(i), driver=str(i))
+             for i in range(3)]
+    loop.children_task.extend(tasks[:2])
+    root.children_task.extend([loop, tasks[2]])
+    members = ['task_class', 'interface_class', 'driver']
+
+    def reference():
+        return flatten_walk(root.walk(members), members)
+
+    cache = TaskWalkCache()
+    assert_equal(cache.flat_walk(root, members), reference())
+    counts = [t.answers for t in tasks]
+
+    # Nothing changed.
+    cache.flat_walk(root, members)
+    assert_equal([t.answers for t in tasks], counts)
+
+    # Changing a member walks again only the modified task.
+    tasks[0].driver = 'a'
+    flat = cache.flat_walk(root, members)
+    counts[0] += 1
+    assert_equal([t.answers for t in tasks], counts)
+    assert_equal(flat, reference())
+
+    # Children and interface changes are taken into account.
+    loop.children_task.remove(tasks[1])
+    assert_equal(cache.flat_walk(root, members), reference())
+    root.children_task.append(tasks[1])
+    loop.interface = None
+    assert_equal(cache.flat_walk(root, members), reference())
+
+    # Removed tasks are no longer observed.
+    root.children_task.remove(tasks[1])
+    cache.flat_walk(root, members)
+    assert_equal(tasks[1].has_observers('driver'), False)
+
+    cache.clear()
+    assert_equal(tasks[0].has_observers('driver'), False)
@@ -2,12 +2,14 @@
 
 import sys
 import logging
+from time import sleep
 from multiprocessing import Queue
-from nose.tools import assert_equal, with_setup
+from nose.tools import assert_equal, assert_true, assert_is_none, with_setup
 from enaml.qt.qt_application import QtApplication
 from hqc_meas.utils.log.tools import (StreamToLogRedirector, QueueHandler,
                                       PanelModel, DayRotatingTimeHandler,
-                                      GuiHandler, QueueLoggerThread)
+                                      GuiHandler, QueueLoggerThread,
+                                      rebuild_record)
 
 from ...util import complete_line
 
@@ -31,7 +33,8 @@ def test_gui_handler():
 
     """
     model = PanelModel()
-    handler = GuiHandler(model)
+    # Records are checked one at a time so do not delay the refreshes.
+    handler = GuiHandler(model, refresh_interval=0)
     logger = logging.getLogger('test')
     logger.addHandler(handler)
     qapp = QtApplication.instance()._qapp
@@ -68,6 +71,56 @@ def test_gui_handler():
     model.text = ''
 
 
+@with_setup(teardown=teardown)
+def test_gui_handler_batching():
+    """ Test that the gui handler appends the messages by batches.
+
+    """
+    model = PanelModel()
+    handler = GuiHandler(model, refresh_interval=0.2)
+    logger = logging.getLogger('test')
+    logger.addHandler(handler)
+    qapp = QtApplication.instance()._qapp
+    updates = []
+    model.observe('text', updates.append)
+
+    for i in range(10):
+        logger.info(str(i))
+    qapp.flush()
+    qapp.processEvents()
+    assert_equal(model.text, ''.join('{}\n'.format(i) for i in range(10)))
+    assert_equal(len(updates), 1)
+
+    # A refresh too close to the previous one is delayed.
+    logger.info('10')
+    qapp.flush()
+    qapp.processEvents()
+    assert_equal(len(updates), 1)
+    sleep(0.25)
+    qapp.processEvents()
+    assert_equal(len(updates), 2)
+    assert_true(model.text.endswith('9\n10\n'))
+
+
+def test_panel_model():
+    """ Test that the panel model only keeps the last lines.
+
+    """
+    model = PanelModel(max_lines=3)
+    model.append('a\nb\n')
+    model.append('c')
+    model.append('d\ne\n')
+    assert_equal(model.text, 'b\ncd\ne\n')
+
+    model.text = ''
+    model.append('f\n')
+    assert_equal(model.text, 'f\n')
+
+    model.max_lines = 1
+    model.append('g\n')
+    assert_equal(model.text, 'g\n')
+
+
 @with_setup(teardown=teardown)
 def test_stream_redirection1():
     """ Test the redirection of a stream toward a logger : INFO.
@@ -223,6 +276,65 @@ def test_queue_handler():
     assert_equal(record.message, 'test')
 
 
+@with_setup(teardown=teardown)
+def test_queue_handler_batching():
+    """ Test the queue handler sending records by batches.
+
+    """
+    logger = logging.getLogger('test')
+    queue = Queue()
+    handler = QueueHandler(queue, capacity=3, flush_interval=0.1)
+    logger.addHandler(handler)
+    for i in range(4):
+        logger.info(str(i))
+
+    batch = queue.get(timeout=1)
+    assert_equal([r[3] for r in batch], ['0', '1', '2'])
+    assert_equal(batch[0][:1] + batch[0][2:],
+                 (logging.INFO, 'test', '0', 'MainProcess'))
+    # The last record is sent once the flush interval elapsed.
+    assert_equal([r[3] for r in queue.get(timeout=1)], ['3'])
+
+    # Errors are sent immediately, with their traceback.
+    logger.info('4')
+    try:
+        raise ValueError()
+    except ValueError:
+        logger.exception('5')
+    messages = [r[3] for r in queue.get(timeout=0.05)]
+    assert_equal(messages[0], '4')
+    assert_true(messages[1].startswith('5\nTraceback'))
+
+    logger.info('6')
+    handler.close()
+    assert_equal([r[3] for r in queue.get(timeout=0.05)], ['6'])
+
+
+@with_setup(teardown=teardown)
+def test_rebuild_record():
+    """ Test rebuilding records only if they will be handled.
+
+    """
+    logger = logging.getLogger('test')
+    logger.setLevel(logging.DEBUG)
+    handler = logging.NullHandler()
+    handler.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        record = rebuild_record((logging.INFO, 10.5, 'test', 'msg', 'Proc'))
+        assert_equal(record.getMessage(), 'msg')
+        assert_equal(record.levelname, 'INFO')
+        assert_equal(record.created, 10.5)
+        assert_equal(record.msecs, 500)
+        assert_equal(record.processName, 'Proc')
+        assert_is_none(rebuild_record((logging.DEBUG, 10.5, 'test', 'msg',
+                                       'Proc')))
+    finally:
+        logger.propagate = True
+        logger.setLevel(logging.NOTSET)
+
+
 @with_setup(teardown=teardown)
 def test_logger_thread():
     """ Test the logger thread.
@@ -234,6 +346,11 @@ def test_logger_thread():
     logger.addHandler(handler)
     logger.info('test')
     logger.removeHandler(handler)
+    handler = QueueHandler(queue, capacity=2)
+    logger.addHandler(handler)
+    logger.info('test2')
+    logger.info('test3')
+    logger.removeHandler(handler)
     queue.put(None)
 
     model = PanelModel()
@@ -251,6 +368,6 @@ def test_logger_thread():
     qapp.flush()
     qapp.processEvents()
 
-    assert_equal(model.text, 'test\n')
+    assert_equal(model.text, 'test\ntest2\ntest3\n')
 
 # TODO add test for DayRotating
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# module : test_discovery.py
+# author : Matthieu Dartiailh
+# license : MIT license
+# =============================================================================
+"""
+"""
+import os
+import time
+from nose.tools import (assert_equal, assert_is, assert_is_none, assert_true,
+                        assert_false, assert_in, assert_not_in)
+
+from watchdog.events import FileCreatedEvent, FileModifiedEvent
+from hqc_meas.utils.discovery import (DiscoveryIndex, LazyObject, LazyDict,
+                                      IndexUpdater)
+
+from ..util import complete_line, create_test_dir, remove_tree
+
+
+def setup_module():
+    print complete_line(__name__ + ': setup_module()', '~', 78)
+
+
+def teardown_module():
+    print complete_line(__name__ + ': teardown_module()', '~', 78)
+
+
+class TestDiscoveryIndex(object):
+
+    test_dir = ''
+
+    @classmethod
+    def setup_class(cls):
+        directory = os.path.dirname(__file__)
+        cls.test_dir = os.path.join(directory, '_temps')
+        create_test_dir(cls.test_dir)
+
+    @classmethod
+    def teardown_class(cls):
+        remove_tree(cls.test_dir)
+
+    def test_persistence(self):
+        # Test that the recorded exports survive a reload of the index and
+        # are discarded when the module is modified.
+        mod_path = os.path.join(self.test_dir, 'mod.py')
+        with open(mod_path, 'w') as f:
+            f.write('A = 1\n')
+        path = os.path.join(self.test_dir, 'index.json')
+
+        index = DiscoveryIndex(path)
+        assert_is_none(index.get('mod', mod_path))
+        index.update('mod', mod_path, {'names': ['A']})
+        index.save()
+
+        index = DiscoveryIndex(path)
+        assert_equal(index.get('mod', mod_path), {'names': ['A']})
+
+        # Modifying the file invalidates the entry.
+        mtime = os.path.getmtime(mod_path)
+        os.utime(mod_path, (time.time(), mtime + 10))
+        assert_is_none(index.get('mod', mod_path))
+
+        # The watchdog discards the entries of the modified files.
+        index.update('mod', mod_path, {'names': ['A']})
+        assert_true(index.discard(mod_path))
+        assert_is_none(index.get('mod', mod_path))
+        assert_false(index.discard(mod_path))
+
+    def test_save_in_missing_folder(self):
+        # Test that the folder of the index is created when saving it.
+        path = os.path.join(self.test_dir, 'prefs', 'index.json')
+        index = DiscoveryIndex(path)
+        index.save()
+        assert_true(os.path.isfile(path))
+
+    def test_index_updater(self):
+        # Test that the watchdog handler discards the entries of the modified
+        # modules and calls the handler only when a module is created.
+        mod_path = os.path.join(self.test_dir, 'mod2.py')
+        with open(mod_path, 'w') as f:
+            f.write('A = 1\n')
+        index = DiscoveryIndex(os.path.join(self.test_dir, 'index2.json'))
+        calls = []
+        updater = IndexUpdater(index, lambda: calls.append(1))
+
+        index.update('mod2', mod_path, {'names': ['A']})
+        updater.dispatch(FileModifiedEvent(mod_path))
+        assert_is_none(index.get('mod2', mod_path))
+        assert_equal(calls, [])
+
+        index.update('mod2', mod_path, {'names': ['A']})
+        updater.dispatch(FileCreatedEvent(mod_path + 'c'))
+        assert_equal(index.get('mod2', mod_path), {'names': ['A']})
+        updater.dispatch(FileCreatedEvent(mod_path))
+        assert_equal(calls, [1])
+
+
+def test_lazy_dict():
+    # Test that the objects are imported only when accessed.
+    lazy = LazyDict({'join': LazyObject('os.path', 'join'),
+                     'sep': LazyObject('os', 'sep'),
+                     'broken': LazyObject('os', '__missing__')})
+    assert_in('join', lazy)
+    assert_false(lazy.is_loaded('join'))
+
+    assert_is(lazy['join'], os.path.join)
+    assert_true(lazy.is_loaded('join'))
+    assert_false(lazy.is_loaded('sep'))
+
+    # Failing objects are dropped.
+    values = dict(lazy.iteritems())
+    assert_equal(values, {'join': os.path.join, 'sep': os.sep})
+    assert_not_in('broken', lazy)
+
+
+def test_lazy_dict_request():
+    # Test that the objects failing to import are reported as missing.
+    lazy = LazyDict({'join': LazyObject('os.path', 'join'),
+                     'broken': LazyObject('os', '__missing__')})
+    assert_is_none(lazy.get('broken'))
+    assert_is_none(lazy.get('unknown'))
+    assert_not_in('broken', lazy)
+
+    lazy['broken'] = LazyObject('os', '__missing__')
+    found, missing = lazy.request(['join', 'broken', 'unknown'])
+    assert_equal(found, {'join': os.path.join})
+    assert_equal(sorted(missing), ['broken', 'unknown'])
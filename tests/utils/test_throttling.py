@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# module : test_throttling.py
+# author : Matthieu Dartiailh
+# license : MIT license
+# =============================================================================
+"""
+"""
+from time import sleep
+from threading import Thread
+from nose.tools import assert_equal
+
+from hqc_meas.utils.throttling import ThrottledCall
+
+from ..util import complete_line, process_app_events
+
+
+def setup_module():
+    print complete_line(__name__ + ': setup_module()', '~', 78)
+
+
+def teardown_module():
+    print complete_line(__name__ + ': teardown_module()', '~', 78)
+
+
+def test_throttled_call():
+    # Test that the requests are coalesced and the calls spaced.
+    calls = []
+    throttled = ThrottledCall(lambda: calls.append(1), 0.2)
+
+    threads = [Thread(target=throttled.request) for i in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    throttled.request()
+    process_app_events()
+    assert_equal(len(calls), 1)
+
+    # A call too close to the previous one is delayed.
+    throttled.request()
+    process_app_events()
+    assert_equal(len(calls), 1)
+    sleep(0.25)
+    process_app_events()
+    assert_equal(len(calls), 2)